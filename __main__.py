@@ -1,52 +1,37 @@
-from experiment_picker import main
-from common.util import load_shared_font
-
-from dda2d.window import main as dda2d_main
-from dda3d.window import main as dda3d_main
-from marching2d.window import main as square_main
-from multi_variable_sorting.sorting import main as mvs_main
-from animator.main import main as animator_main
-from sphere.window import main as sphere_main
-from heightviz.window import main as height_main
-from heightviz2d.window import main as height2d_main
-from rectdemo.window import main as rect_main
-from wavrider.window import main as wav_main
-# from notifications.window import main as notif_main
-from pool.window import main as pool_main
-from perspective.window import main as perp_main
-from progress.window import main as prog_main
-from overlay.window import main as over_main
-from oscilliscope.window import main as osc_main
-from dos.window import main as dos_main
-from portals.window import main as portal_main
-from instanced.window import main as instanced_main
+import sys
 
-# TODO
-from rigidbody.window import main as rigid_main
+from experiment_picker import main, ExperimentEntry
+from common.util import load_shared_font
 
 if __name__ == '__main__':
-    load_shared_font("gohu")
-    main(
-        {   
-            "DOS Terminal": (dos_main, (), {}),
-            "Portal": (portal_main, (), {}),
-            "Oscilliscope": (osc_main, (), {}),
-            "Pool Demo [TEMP LOCATION]": (pool_main, (), {"show_fps": True}),
-            "Perp Demo": (perp_main, (), {}),
-            "Progressor Demo": (prog_main, (), {}),
-            "DDA 2D": (dda2d_main, (), {}),
-            "DDA 3D": (dda3d_main, (), {}),
-            "Rect Demo": (rect_main, (), {}),
-            # "Notification Demo": (notif_main, (), {}),
-            "Marching Squares": (square_main, (), {}),
-            "Multi-Variable Sorting": (mvs_main, (), {}),
-            "Automatic Animator": (animator_main, (), {}),
-            "Sphere 3D": (sphere_main, (), {}),
-            "Scale Visualizer 2D": (height2d_main, (), {}),
-            "Scale Visualizer 3D": (height_main, (), {}),
-            "WavRider": (wav_main, (), {"show_fps": True}),
-            "Overlay": (over_main, (), {}),
-            "Instanced (Style Rect Takeover)": (instanced_main, (), {}),
-            "Rigidbody": (rigid_main, (), {})
-        }
-    )
+    experiments = {
+            "DOS Terminal": ExperimentEntry("dos.window"),
+            "Portal": ExperimentEntry("portals.window"),
+            "Oscilliscope": ExperimentEntry("oscilliscope.window"),
+            "Pool Demo [TEMP LOCATION]": ExperimentEntry("pool.window", kwargs={"show_fps": True}),
+            "Perp Demo": ExperimentEntry("perspective.window"),
+            "Progressor Demo": ExperimentEntry("progress.window"),
+            "DDA 2D": ExperimentEntry("dda2d.window"),
+            "DDA 3D": ExperimentEntry("dda3d.window"),
+            "Rect Demo": ExperimentEntry("rectdemo.window"),
+            # "Notification Demo": ExperimentEntry("notifications.window"),
+            "Marching Squares": ExperimentEntry("marching2d.window"),
+            "Multi-Variable Sorting": ExperimentEntry("multi_variable_sorting.sorting"),
+            "Automatic Animator": ExperimentEntry("animator.main"),
+            "Sphere 3D": ExperimentEntry("sphere.window"),
+            "Scale Visualizer 2D": ExperimentEntry("heightviz2d.window"),
+            "Scale Visualizer 3D": ExperimentEntry("heightviz.window"),
+            "WavRider": ExperimentEntry("wavrider.window", kwargs={"show_fps": True}),
+            "Overlay": ExperimentEntry("overlay.window"),
+            "Instanced (Style Rect Takeover)": ExperimentEntry("instanced.window"),
+            # TODO
+            "Rigidbody": ExperimentEntry("rigidbody.window")
+    }
+
+    # --isolated runs every experiment in a fresh fork and returns to the picker when it closes.
+    if "--isolated" in sys.argv:
+        from launcher import main as launcher_main
+        launcher_main(experiments)
+    else:
+        load_shared_font("gohu")
+        main(experiments, prewarm=True)
@@ -0,0 +1,209 @@
+"""
+Drive experiment windows for a fixed number of frames and time their update and draw.
+
+    python benchmark.py                        # every experiment that can run unattended
+    python benchmark.py "DDA 2D" --frames 600  # just one
+    python benchmark.py --headless --software --out bench.json
+
+Every frame the window gets the same synthetic delta time, any scripted input
+for that frame, then `on_update` and `on_draw` are dispatched and timed.
+The draw timing includes a `ctx.finish()` so it measures the GPU work too.
+"""
+from typing import Callable, Iterable
+from argparse import ArgumentParser
+from importlib import import_module
+from time import perf_counter_ns
+from math import cos, sin, tau
+import json
+import os
+import sys
+
+
+# An input event is the event name and the arguments it is dispatched with.
+InputEvent = tuple[str, tuple]
+InputScript = Callable[[int, int, object], Iterable[InputEvent]]
+
+
+def dda2d_script(frame: int, frames: int, window) -> Iterable[InputEvent]:
+    """Draw a line from the center of the grid out to a point that circles it, restarting every second."""
+    cx, cy = window.center_x, window.center_y - 50
+    x = cx + 250 * cos(tau * frame / frames)
+    y = cy + 250 * sin(tau * frame / frames)
+    if frame % 60 == 0:
+        yield "on_mouse_press", (int(cx), int(cy), 1, 0)
+    yield "on_mouse_motion", (int(x), int(y), 0, 0)
+    if frame % 60 == 59:
+        yield "on_mouse_release", (int(x), int(y), 1, 0)
+
+
+def marching2d_script(frame: int, frames: int, window) -> Iterable[InputEvent]:
+    """Scroll up and down over a point that sweeps across the grid."""
+    x = 50 + (frame * 7) % 400
+    y = 50 + (frame * 3) % 400
+    yield "on_mouse_scroll", (x, y, 0, 1 if (frame // 30) % 2 == 0 else -1)
+
+
+def dda3d_script(frame: int, frames: int, window) -> Iterable[InputEvent]:
+    """Spin the ray around the window center."""
+    x = window.center_x + 200 * cos(tau * frame / frames)
+    y = window.center_y + 200 * sin(tau * frame / frames)
+    yield "on_mouse_motion", (int(x), int(y), 0, 0)
+
+
+class BenchmarkEntry:
+
+    def __init__(self, module: str, factory: Callable, script: InputScript | None = None, needs_display: bool = False):
+        self.module: str = module
+        self.factory: Callable = factory
+        self.script: InputScript | None = script
+        # Some experiments screenshot the desktop, they can't run headless.
+        self.needs_display: bool = needs_display
+
+    def create(self):
+        return self.factory(import_module(self.module))
+
+
+EXPERIMENTS: dict[str, BenchmarkEntry] = {
+    "DOS Terminal": BenchmarkEntry("dos.window", lambda m: m.DOSWindow()),
+    "Portal": BenchmarkEntry("portals.window", lambda m: m.PortalWindow()),
+    "Oscilliscope": BenchmarkEntry("oscilliscope.window", lambda m: m.OscWindow()),
+    "Pool Demo": BenchmarkEntry("pool.window", lambda m: m.PoolWindow(False)),
+    "Perp Demo": BenchmarkEntry("perspective.window", lambda m: m.PerpWindow(m.PerpGrid()), needs_display=True),
+    "Progressor Demo": BenchmarkEntry("progress.window", lambda m: m.ProgressWindow()),
+    "DDA 2D": BenchmarkEntry("dda2d.window", lambda m: m.Application(), dda2d_script),
+    "DDA 2D (512x512)": BenchmarkEntry("dda2d.window", lambda m: m.Application((512, 512), 1), dda2d_script),
+    "DDA 3D": BenchmarkEntry("dda3d.window", lambda m: m.DDA3DWindow(), dda3d_script),
+    "Rect Demo": BenchmarkEntry("rectdemo.window", lambda m: m.RectWindow()),
+    "Marching Squares": BenchmarkEntry("marching2d.window", lambda m: m.SquareWindow(), marching2d_script),
+    "Multi-Variable Sorting": BenchmarkEntry("multi_variable_sorting.sorting", lambda m: m.PlotWindow()),
+    "Automatic Animator": BenchmarkEntry("animator.main", lambda m: m.AnimWindow()),
+    "Sphere 3D": BenchmarkEntry("sphere.window", lambda m: m.App()),
+    "Scale Visualizer 2D": BenchmarkEntry("heightviz2d.window", lambda m: m.HeightViz2DWindow()),
+    "Scale Visualizer 3D": BenchmarkEntry("heightviz.window", lambda m: m.App()),
+    "WavRider": BenchmarkEntry("wavrider.window", lambda m: m.RiderWindow()),
+    "Instanced (Style Rect Takeover)": BenchmarkEntry("instanced.window", lambda m: m.InstancedWindow()),
+    "Rigidbody": BenchmarkEntry("rigidbody.window", lambda m: m.RigidWindow()),
+    "Cursor": BenchmarkEntry("cursor.window", lambda m: m.CursorWindow()),
+    "Deferred PBR": BenchmarkEntry("deferred_pbr.window", lambda m: m.DeferredWindow()),
+    "Global Solver": BenchmarkEntry("global_solver.window", lambda m: m.Window()),
+    "Mighty": BenchmarkEntry("mighty.window", lambda m: m.MightyWindow()),
+    "Notifications": BenchmarkEntry("notifications.window", lambda m: m.NotificationWindow()),
+    "Scoundrel": BenchmarkEntry("scoundrel.window", lambda m: m.Window()),
+}
+
+
+def summarise(samples: list[float]) -> dict[str, float]:
+    """Mean, max and nearest rank percentiles of a list of ms timings."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def percentile(p: float) -> float:
+        return ordered[min(last, int(round(p / 100.0 * last)))]
+
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "max": ordered[-1]
+    }
+
+
+def run_experiment(entry: BenchmarkEntry, frames: int, dt: float, warmup: int = 10) -> dict:
+    update_times: list[float] = []
+    draw_times: list[float] = []
+    window = None
+    try:
+        start = perf_counter_ns()
+        window = entry.create()
+        setup = (perf_counter_ns() - start) * 1e-6
+        # Outside of app.run pyglet queues dispatched events until the next dispatch_events,
+        # so turn that off or the handlers would run outside the timed region.
+        window._enable_event_queue = False
+
+        window.switch_to()
+        window.dispatch_event("on_show")
+        for frame in range(warmup + frames):
+            window.dispatch_events()
+            if entry.script is not None:
+                for event, args in entry.script(frame, frames, window):
+                    window.dispatch_event(event, *args)
+
+            start = perf_counter_ns()
+            window.dispatch_event("on_update", dt)
+            updated = perf_counter_ns()
+            window.dispatch_event("on_draw")
+            window.ctx.finish()
+            drawn = perf_counter_ns()
+            window.flip()
+
+            if frame >= warmup:
+                update_times.append((updated - start) * 1e-6)
+                draw_times.append((drawn - updated) * 1e-6)
+    finally:
+        if window is not None:
+            window.close()
+
+    return {
+        "frames": frames,
+        "dt": dt,
+        "setup_ms": setup,
+        "update_ms": summarise(update_times),
+        "draw_ms": summarise(draw_times)
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = ArgumentParser(description="Run experiments for a fixed number of frames and report their frame times as JSON")
+    parser.add_argument("experiments", nargs="*", help="names of the experiments to run, defaults to all of them")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--dt", type=float, default=1.0 / 60.0, help="the fixed delta time passed to on_update")
+    parser.add_argument("--headless", action="store_true", help="use an offscreen EGL context, needs no display")
+    parser.add_argument("--software", action="store_true", help="force mesa's software rasteriser")
+    parser.add_argument("--out", default=None, help="file to write the JSON report to instead of stdout")
+    parser.add_argument("--list", action="store_true", help="print the known experiment names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(EXPERIMENTS))
+        return
+
+    # These have to be set before arcade (and so pyglet) is first imported.
+    if args.headless:
+        os.environ["ARCADE_HEADLESS"] = "1"
+    if args.software:
+        os.environ["LIBGL_ALWAYS_SOFTWARE"] = "1"
+
+    from common.util import load_shared_font
+    load_shared_font("gohu")
+
+    names = args.experiments or list(EXPERIMENTS)
+    report = {}
+    for name in names:
+        entry = EXPERIMENTS.get(name)
+        if entry is None:
+            report[name] = {"error": "unknown experiment"}
+            continue
+        if args.headless and entry.needs_display:
+            report[name] = {"skipped": "needs a display"}
+            continue
+
+        print(f"running {name}", file=sys.stderr)
+        try:
+            report[name] = run_experiment(entry, args.frames, args.dt, args.warmup)
+        except Exception as e:
+            report[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    output = json.dumps(report, indent=2)
+    if args.out is None:
+        print(output)
+    else:
+        with open(args.out, "w") as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
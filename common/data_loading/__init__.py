@@ -1,14 +1,188 @@
-from typing import Callable
+from typing import Callable, Hashable, Iterable, TypeVar
+from collections import OrderedDict
 from contextlib import contextmanager
+from threading import RLock
 import importlib.resources as pkg_resources
+import sys
+
+from common.data_loading.background import BackgroundLoader, LoadHandle, decode_image, decode_wav, read_bytes
 
 __all__ = (
     "make_package_file_opener",
     "make_package_string_loader",
     "make_package_binary_loader",
-    "make_package_path_finder"
+    "make_package_path_finder",
+    "make_package_asset_loader",
+    "asset_size",
+    "AssetCache",
+    "PackageAssetLoader",
+    "ASSET_CACHE",
+    "BackgroundLoader",
+    "LoadHandle",
+    "decode_image",
+    "decode_wav",
+    "read_bytes"
 )
 
+T = TypeVar('T')
+
+
+def asset_size(asset) -> int:
+    """
+    Roughly how many bytes a decoded asset holds, used to decide what to evict.
+    Recognises bytes, strings, PIL images, arcade textures, and pyglet/arcade sounds.
+    """
+    if isinstance(asset, (bytes, bytearray, memoryview, str)):
+        return len(asset)
+
+    nbytes = getattr(asset, "nbytes", None)  # numpy arrays
+    if isinstance(nbytes, int):
+        return nbytes
+
+    image = getattr(asset, "image", asset)  # arcade textures wrap a PIL image
+    if hasattr(image, "getbands") and hasattr(image, "size"):
+        width, height = image.size
+        return width * height * len(image.getbands())
+
+    source = getattr(asset, "source", asset)  # arcade sounds wrap a pyglet source
+    audio_format = getattr(source, "audio_format", None)
+    duration = getattr(source, "duration", None)
+    if audio_format is not None and duration:
+        return int(duration * audio_format.sample_rate * audio_format.channels * audio_format.sample_size / 8)
+
+    return sys.getsizeof(asset)
+
+
+class AssetCache:
+    """
+    A process wide least recently used cache of decoded assets.
+
+    Entries are keyed by (package, name, type) and the cache evicts the
+    oldest entries once the total decoded size goes over `max_bytes`.
+    Anything bigger than the whole budget is handed back without being cached.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, track_stats: bool = False):
+        self.max_bytes: int = max_bytes
+        self.track_stats: bool = track_stats
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._size: int = 0
+        self._lock = RLock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get(self, key: Hashable, load: Callable[[], T], size_of: Callable[[T], int] = asset_size) -> T:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if self.track_stats:
+                    self.hits += 1
+                return entry[0]
+
+        if self.track_stats:
+            self.misses += 1
+
+        # Decode outside the lock so slow loads don't hold up other threads.
+        asset = load()
+        self.put(key, asset, size_of(asset))
+        return asset
+
+    def put(self, key: Hashable, asset, size: int):
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (asset, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+                if self.track_stats:
+                    self.evictions += 1
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size
+        }
+
+
+ASSET_CACHE = AssetCache()
+
+
+def _package_name(package) -> str:
+    return package if isinstance(package, str) else package.__name__
+
+
+class PackageAssetLoader:
+    """
+    Loads `{name}.{data_type}` from a package through the shared AssetCache.
+
+    :param decode: turns the resolved file path into the asset.
+    :param kind: separates different decodings of the same file in the cache.
+    :param scope: optional extra key, for assets that are only valid in one context (like GL objects).
+    """
+
+    def __init__(self, package, data_type: str, kind: str, decode: Callable, scope: Callable[[], Hashable] | None = None,
+                 cache: AssetCache = ASSET_CACHE):
+        self._package = package
+        self._package_name: str = _package_name(package)
+        self._data_type: str = data_type
+        self._kind: str = kind
+        self._decode: Callable = decode
+        self._scope = scope
+        self._cache: AssetCache = cache
+        self._find_path = make_package_path_finder(package, data_type, cache)
+
+    def key(self, name: str) -> tuple:
+        if self._scope is None:
+            return self._package_name, name, f"{self._data_type}:{self._kind}"
+        return self._package_name, name, f"{self._data_type}:{self._kind}", self._scope()
+
+    def __call__(self, name: str):
+        return self._cache.get(self.key(name), lambda: self._decode(self._find_path(name)))
+
+    def preload(self, names: Iterable[str]):
+        """Decode every named asset now so later calls never touch the disk."""
+        for name in names:
+            self(name)
+
+
+def make_package_asset_loader(package, data_type: str, kind: str, decode: Callable[..., T],
+                              scope: Callable[[], Hashable] | None = None) -> PackageAssetLoader:
+    return PackageAssetLoader(package, data_type, kind, decode, scope)
+
 
 def make_package_file_opener(
         package,
@@ -65,24 +239,45 @@ def make_package_file_opener(
     return _file_loader
 
 
-def make_package_string_loader(package, data_type: str, encoding: str = "utf-8"):
-    def _str_loader(name: str):
+def make_package_string_loader(package, data_type: str, encoding: str = "utf-8", cache: AssetCache | None = ASSET_CACHE):
+    package_name = _package_name(package)
+
+    def _read(name: str):
         file_name = f"{name}.{data_type}"
         return pkg_resources.read_text(package, file_name, encoding=encoding)
+
+    def _str_loader(name: str):
+        if cache is None:
+            return _read(name)
+        return cache.get((package_name, name, f"{data_type}:str:{encoding}"), lambda: _read(name))
     return _str_loader
 
 
-def make_package_binary_loader(package, data_type: str):
-    def _binary_loader(name: str):
+def make_package_binary_loader(package, data_type: str, cache: AssetCache | None = ASSET_CACHE):
+    package_name = _package_name(package)
+
+    def _read(name: str):
         file_name = f"{name}.{data_type}"
         return pkg_resources.read_binary(package, file_name)
+
+    def _binary_loader(name: str):
+        if cache is None:
+            return _read(name)
+        return cache.get((package_name, name, f"{data_type}:bytes"), lambda: _read(name))
     return _binary_loader
 
 
-def make_package_path_finder(package, data_type: str):
-    def _path_finder(name: str):
+def make_package_path_finder(package, data_type: str, cache: AssetCache | None = ASSET_CACHE):
+    package_name = _package_name(package)
+
+    def _find(name: str):
         file_name = f"{name}.{data_type}"
         with pkg_resources.path(package, file_name) as path:
             return path
 
+    def _path_finder(name: str):
+        if cache is None:
+            return _find(name)
+        return cache.get((package_name, name, f"{data_type}:path"), lambda: _find(name), lambda path: len(str(path)))
+
     return _path_finder
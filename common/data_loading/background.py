@@ -0,0 +1,131 @@
+from typing import Callable, TypeVar, Generic
+from concurrent.futures import ThreadPoolExecutor, Future
+from io import BytesIO
+from time import perf_counter
+
+__all__ = (
+    "BackgroundLoader",
+    "LoadHandle",
+    "decode_image",
+    "decode_wav",
+    "read_bytes"
+)
+
+T = TypeVar('T')
+
+
+def decode_image(path, mode: str | None = "RGBA"):
+    """Fully decode an image with PIL, which is safe to do off the main thread."""
+    from PIL import Image
+    img = Image.open(path)
+    img.load()
+    if mode is not None and img.mode != mode:
+        img = img.convert(mode)
+    return img
+
+
+def decode_wav(path):
+    """Decode a sound completely into memory, pyglet only needs the audio driver once it is played."""
+    from arcade import Sound
+    return Sound(path, streaming=False)
+
+
+def read_bytes(path) -> BytesIO:
+    with open(path, "rb") as file:
+        return BytesIO(file.read())
+
+
+class LoadHandle(Generic[T]):
+    """The pending result of one BackgroundLoader submission."""
+
+    def __init__(self, future: Future, finish: Callable[[T], object] | None, weight: float):
+        self._future: Future = future
+        self._finish = finish
+        self.weight: float = weight
+        self.finished: bool = False
+        self.result = None
+
+    @property
+    def decoded(self) -> bool:
+        return self._future.done()
+
+    def _complete(self):
+        value = self._future.result()
+        self.result = value if self._finish is None else self._finish(value)
+        self.finished = True
+
+
+class BackgroundLoader:
+    """
+    Decode assets on a thread pool and finish them on the main thread.
+
+    `decode` runs on a worker and must not touch GL (reading files, PIL, wav decoding).
+    `finish` runs inside `poll` on the main thread and is where GL uploads and
+    sprite creation belong. Call `poll` once a frame, usually from `on_update`.
+
+    :param on_progress: called with the finished fraction (0.0 - 1.0) whenever it changes.
+    :param on_complete: called once all submitted work is finished.
+    """
+
+    def __init__(self, max_workers: int = 4, on_progress: Callable[[float], None] | None = None,
+                 on_complete: Callable[[], None] | None = None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-loader")
+        self._pending: list[LoadHandle] = []
+        self._total: float = 0.0
+        self._finished: float = 0.0
+        self._on_progress = on_progress
+        self._on_complete = on_complete
+        self._completed: bool = True
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if not self._total else self._finished / self._total
+
+    @property
+    def done(self) -> bool:
+        return not self._pending
+
+    def submit(self, decode: Callable[..., T], *args, finish: Callable[[T], object] | None = None,
+               weight: float = 1.0) -> LoadHandle[T]:
+        handle = LoadHandle(self._pool.submit(decode, *args), finish, weight)
+        self._pending.append(handle)
+        self._total += weight
+        self._completed = False
+        return handle
+
+    def poll(self, budget: float | None = None) -> bool:
+        """
+        Finish every decoded asset in submission order. Returns True once nothing is pending.
+
+        :param budget: seconds of main thread time to spend before leaving the rest for the next poll.
+        """
+        if self._completed:
+            return True
+
+        start = perf_counter()
+        progressed = False
+        while self._pending and self._pending[0].decoded:
+            handle = self._pending.pop(0)
+            handle._complete()
+            self._finished += handle.weight
+            progressed = True
+            if budget is not None and perf_counter() - start > budget:
+                break
+
+        if progressed and self._on_progress is not None:
+            self._on_progress(self.progress)
+
+        if not self._pending:
+            self._completed = True
+            if self._on_complete is not None:
+                self._on_complete()
+        return self._completed
+
+    def wait(self):
+        """Block until everything submitted is finished, for callers that need the assets right now."""
+        while self._pending:
+            self._pending[0]._future.result()
+            self.poll()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
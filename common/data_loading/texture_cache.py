@@ -0,0 +1,118 @@
+"""
+A persistent on disk cache of decoded texture data.
+
+The first time an image is loaded it is decoded with PIL and the raw texels are
+written out as a `.npy` file named after the hash of the source file. Every
+later load memory maps that file instead, so there is no PNG decode. The map is copy on write
+so the array is writable (changes never reach the file), which the GL buffer protocol needs.
+Hand it to `ctx.texture` as a `memoryview`, arcade can't test a numpy array for truthiness.
+
+The cache lives in `$ARCADE_EXPERIMENTS_CACHE`, or `$XDG_CACHE_HOME/arcade-experiments`,
+or `~/.cache/arcade-experiments`. Any file in it can be deleted at any time.
+"""
+from pathlib import Path
+from hashlib import blake2b
+import os
+
+import numpy as np
+
+__all__ = (
+    "texture_cache_dir",
+    "load_texel_data",
+    "load_cached_texture",
+    "clear_texture_cache"
+)
+
+# Bump this if the layout of the cached files changes.
+_CACHE_VERSION = 1
+
+# Which numpy type backs each of arcade's texture dtypes.
+_DTYPES = {
+    "f1": np.uint8,
+    "f2": np.float16,
+    "f4": np.float32
+}
+
+_digests: dict[tuple[str, int, int], str] = {}
+
+
+def texture_cache_dir() -> Path:
+    root = os.environ.get("ARCADE_EXPERIMENTS_CACHE")
+    if root is None:
+        root = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "arcade-experiments"
+    return Path(root) / "textures"
+
+
+def _file_digest(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        hasher = blake2b(digest_size=16)
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                hasher.update(chunk)
+        digest = _digests[key] = hasher.hexdigest()
+    return digest
+
+
+def _decode(path: Path, mode: str, dtype: str) -> np.ndarray:
+    from PIL import Image
+    with Image.open(path) as img:
+        if img.mode != mode:
+            img = img.convert(mode)
+        texels = np.array(img)
+
+    if texels.ndim == 2:
+        texels = texels[:, :, np.newaxis]
+    if dtype != "f1":
+        texels = (texels / 255.0).astype(_DTYPES[dtype])
+    return texels
+
+
+def load_texel_data(path, mode: str = "RGBA", dtype: str = "f1") -> np.ndarray:
+    """
+    Get the texels of an image as a copy on write (height, width, components) array.
+
+    :param mode: the PIL mode to convert to before caching.
+    :param dtype: the arcade texture dtype, 'f1' keeps bytes while 'f2' and 'f4' are normalised floats.
+    """
+    if dtype not in _DTYPES:
+        raise ValueError(f"{dtype} is not a supported texture dtype, use one of {tuple(_DTYPES)}")
+
+    path = Path(path)
+    cache_dir = texture_cache_dir()
+    cached = cache_dir / f"{path.stem}-{_file_digest(path)}-{mode}-{dtype}-v{_CACHE_VERSION}.npy"
+
+    try:
+        return np.load(cached, mmap_mode="c")
+    except (FileNotFoundError, ValueError, OSError):
+        pass
+
+    texels = _decode(path, mode, dtype)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a crash or another process can never see half a file.
+        temp = cached.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp, "wb") as file:
+            np.save(file, texels)
+        os.replace(temp, cached)
+    except OSError:
+        # A read only or full disk just means the next launch decodes again.
+        return texels
+    return np.load(cached, mmap_mode="c")
+
+
+def load_cached_texture(ctx, path, mode: str = "RGBA", dtype: str = "f1", **kwargs):
+    """Create a texture on `ctx` from the cached texels of an image. Extra kwargs go to `ctx.texture`."""
+    texels = load_texel_data(path, mode, dtype)
+    height, width, components = texels.shape
+    return ctx.texture((width, height), components=components, dtype=dtype, data=memoryview(texels), **kwargs)
+
+
+def clear_texture_cache():
+    cache_dir = texture_cache_dir()
+    if not cache_dir.exists():
+        return
+    for file in cache_dir.glob("*.npy"):
+        file.unlink(missing_ok=True)
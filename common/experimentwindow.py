@@ -1,23 +1,100 @@
+from time import perf_counter_ns
+
 from arcade import Window, Text
+from pyglet.shapes import Batch, Rectangle, Line
+
+from common.util.duration_tracker import RingBuffer
+
+
+UPDATE_COLOUR = (15, 205, 247, 255)
+DRAW_COLOUR = (153, 0, 178, 255)
+PRESENT_COLOUR = (120, 120, 120, 255)
+BUDGET_COLOUR = (255, 255, 255, 120)
+
+
+class FrameGraph:
+    """
+    A scrolling bar graph of the frame time split into update, draw, and present.
+
+    Each frame only one column's bars are resized (like an oscilloscope sweep)
+    and the whole graph is a single batch so drawing it is one call.
+    """
+
+    def __init__(self, x: float, y: float, columns: int = 120, column_width: int = 2, height: float = 60.0, max_ms: float = 1000.0 / 30.0):
+        self.columns = columns
+        self.height = height
+        self.max_ms = max_ms
+        self.batch = Batch()
+        self._cursor = 0
+
+        self._update_bars: list[Rectangle] = []
+        self._draw_bars: list[Rectangle] = []
+        self._present_bars: list[Rectangle] = []
+        for idx in range(columns):
+            bar_x = x + idx * column_width
+            self._update_bars.append(Rectangle(bar_x, y, column_width, 0, UPDATE_COLOUR, batch=self.batch))
+            self._draw_bars.append(Rectangle(bar_x, y, column_width, 0, DRAW_COLOUR, batch=self.batch))
+            self._present_bars.append(Rectangle(bar_x, y, column_width, 0, PRESENT_COLOUR, batch=self.batch))
+
+        # Mark the 60fps budget so it is easy to see which frames go over.
+        budget_y = y + height * (1000.0 / 60.0) / max_ms
+        self._budget = Line(x, budget_y, x + columns * column_width, budget_y, 1, BUDGET_COLOUR, batch=self.batch)
+
+    def push(self, update_ms: float, draw_ms: float, present_ms: float):
+        scale = self.height / self.max_ms
+        update_h = min(self.height, update_ms * scale)
+        draw_h = min(self.height - update_h, draw_ms * scale)
+        present_h = min(self.height - update_h - draw_h, present_ms * scale)
+
+        idx = self._cursor
+        base = self._update_bars[idx].y
+        self._update_bars[idx].height = update_h
+        self._draw_bars[idx].y = base + update_h
+        self._draw_bars[idx].height = draw_h
+        self._present_bars[idx].y = base + update_h + draw_h
+        self._present_bars[idx].height = present_h
+        self._cursor = (idx + 1) % self.columns
+
+    def draw(self):
+        self.batch.draw()
 
 
 class ExpWin(Window):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, history: int = 600, **kwargs):
         super().__init__(*args, **kwargs)
         self._show_fps: bool = False
         self._average_length: int = 10
-        self._fps_history: list = []
+        self._fps_history: RingBuffer = RingBuffer(self._average_length)
         self._fps_text = Text("", x=self.width, y=0, anchor_x="right", anchor_y="bottom",
                               font_name="GohuFont 11 Nerd Font Mono")
 
+        # All timings are in ms. Updates can run many times per frame so they are
+        # recorded per call, and also summed into the frame they happened in.
+        self._update_times: RingBuffer = RingBuffer(history)
+        self._draw_times: RingBuffer = RingBuffer(history)
+        self._present_times: RingBuffer = RingBuffer(history)
+        self._frame_update_times: RingBuffer = RingBuffer(history)
+        self._dt_history: RingBuffer = RingBuffer(history)
+        self._dt_jitter: RingBuffer = RingBuffer(history)
+        self._frame_update_total: float = 0.0
+        self._last_dt: float | None = None
+
+        self._show_graph: bool = False
+        self._frame_graph: FrameGraph | None = None
+
     def show_fps(self, show: bool = False):
         self._show_fps = show
 
+    def show_frame_graph(self, show: bool = False):
+        self._show_graph = show
+        if show and self._frame_graph is None:
+            self._frame_graph = FrameGraph(5, 5)
+
     def update_fps_text(self, *, n_x=None, n_y=None, n_x_anchor=None, n_y_anchor=None):
         if n_x:
             self._fps_text.x = n_x
-            
+
         if n_y:
             self._fps_text.y = n_y
 
@@ -27,13 +104,62 @@ class ExpWin(Window):
         if n_y_anchor:
             self._fps_text.anchor_y = n_y_anchor
 
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        p50/p95/p99, mean, and max of the recent timings in ms.
+
+        `update` is per on_update call while `frame_update` is the total update time
+        between two draws, `dt` and `jitter` are the update delta time and how much
+        it changed from the previous one.
+        """
+        return {
+            "update": self._update_times.summary(),
+            "frame_update": self._frame_update_times.summary(),
+            "draw": self._draw_times.summary(),
+            "present": self._present_times.summary(),
+            "dt": self._dt_history.summary(),
+            "jitter": self._dt_jitter.summary()
+        }
+
+    def dispatch_event(self, event_type: str, *args):
+        if event_type == "on_update":
+            start = perf_counter_ns()
+            result = super().dispatch_event(event_type, *args)
+            elapsed = (perf_counter_ns() - start) * 1e-6
+            self._update_times.push(elapsed)
+            self._frame_update_total += elapsed
+            return result
+        if event_type == "on_draw":
+            start = perf_counter_ns()
+            result = super().dispatch_event(event_type, *args)
+            self._draw_times.push((perf_counter_ns() - start) * 1e-6)
+            return result
+        return super().dispatch_event(event_type, *args)
+
+    def flip(self):
+        start = perf_counter_ns()
+        super().flip()
+        present = (perf_counter_ns() - start) * 1e-6
+        self._present_times.push(present)
+        self._frame_update_times.push(self._frame_update_total)
+
+        if self._frame_graph is not None:
+            self._frame_graph.push(self._frame_update_total, self._draw_times.last, present)
+        self._frame_update_total = 0.0
+
     def _dispatch_updates(self, delta_time: float):
         super()._dispatch_updates(delta_time)
-        self._fps_history.append(1 / delta_time)
-        if len(self._fps_history) > self._average_length:
-            self._fps_history = self._fps_history[-self._average_length:]
+        self._fps_history.push(1 / delta_time)
+        self._dt_history.push(delta_time * 1e3)
+        if self._last_dt is not None:
+            self._dt_jitter.push(abs(delta_time - self._last_dt) * 1e3)
+        self._last_dt = delta_time
 
     def on_refresh(self, dt):
-        if self._show_fps and self._fps_history:
-            self._fps_text.text = f"FPS: {sum(self._fps_history) / len(self._fps_history): .1f}"
+        if self._show_fps and len(self._fps_history):
+            self._fps_text.text = f"FPS: {self._fps_history.mean(): .1f}"
             self._fps_text.draw()
+
+        if self._show_graph:
+            self.default_camera.use()
+            self._frame_graph.draw()
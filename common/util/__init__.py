@@ -3,12 +3,14 @@
 import arcade
 import pyglet
 import math
+from io import BytesIO
 
 from arcade.types import Point2, Color
 
+import PIL.Image
 from PIL.Image import Image
 
-from common.data_loading import make_package_path_finder
+from common.data_loading import make_package_path_finder, make_package_asset_loader, make_package_binary_loader
 import common.data.fonts as fonts
 import common.data.models as models
 import common.data.sounds as sounds
@@ -23,6 +25,10 @@ __all__ = (
     "load_shared_font",
     "load_shared_sound",
     "load_shared_model",
+    "load_shared_image",
+    "load_shared_texture",
+    "preload_shared_sounds",
+    "preload_shared_textures",
     "ProceduralAnimator",
     "SecondOrderAnimatorBase"
 )
@@ -31,11 +37,27 @@ get_shared_font_path = make_package_path_finder(fonts, "ttf")
 get_shared_sound_path = make_package_path_finder(sounds, "wav")
 get_shared_model_path = make_package_path_finder(models, "obj")
 get_shared_image_path = make_package_path_finder(images, "png")
+# Decoded assets go through the process wide ASSET_CACHE so repeat loads never touch the disk.
+# Models and images are mutable (and models own GL objects), so only their data is cached and
+# every call gets its own copy.
+_shared_sound_loader = make_package_asset_loader(sounds, "wav", "sound", arcade.load_sound)
+_shared_model_data = make_package_binary_loader(models, "obj")
+_shared_image_loader = make_package_asset_loader(images, "png", "image", lambda path: _open_image(path))
+_shared_texture_loader = make_package_asset_loader(images, "png", "texture", arcade.load_texture)
 def load_shared_font(name: str): arcade.load_font(get_shared_font_path(name))
-def load_shared_sound(name: str): return arcade.load_sound(get_shared_sound_path(name))
-def load_shared_model(name: str) -> pyglet.model.Model: return pyglet.model.load(get_shared_model_path(name))
-def load_shared_image(name: str) -> Image: return Image.open(get_shared_image_path(name))
-def load_shared_texture(name: str) -> arcade.Texture: return arcade.load_texture(get_shared_image_path(name))
+def load_shared_sound(name: str) -> arcade.Sound: return _shared_sound_loader(name)
+def load_shared_model(name: str) -> pyglet.model.Model: return pyglet.model.load(str(get_shared_model_path(name)), file=BytesIO(_shared_model_data(name)))
+def load_shared_image(name: str) -> Image: return _shared_image_loader(name).copy()
+def load_shared_texture(name: str) -> arcade.Texture: return _shared_texture_loader(name)
+def preload_shared_sounds(names): _shared_sound_loader.preload(names)
+def preload_shared_textures(names): _shared_texture_loader.preload(names)
+
+
+def _open_image(path) -> Image:
+    # PIL opens lazily, load it now so the cached image never goes back to the file.
+    image = PIL.Image.open(path)
+    image.load()
+    return image
 
 
 def clamp(minVal, val, maxVal):
@@ -0,0 +1,68 @@
+from typing import Callable, Generic, Iterator, TypeVar
+
+__all__ = (
+    "AnimatedTrace",
+)
+
+T = TypeVar('T')
+
+
+class AnimatedTrace(Generic[T]):
+    """
+    Play back a lazy traversal (like `iter_dda`) a few steps per frame.
+
+    Call `update` every frame, it pulls at most `steps_per_second * delta_time` items from the
+    source (carrying over the remainder) and returns only those. Nothing visited earlier is kept,
+    so a trace costs the same memory no matter how long it is.
+
+    :param on_step: called with every item as it is pulled, returning True ends the trace early.
+    """
+
+    def __init__(self, source: Iterator[T], steps_per_second: float = 30.0,
+                 on_step: Callable[[T], bool | None] | None = None):
+        self._source: Iterator[T] = source
+        self.steps_per_second: float = steps_per_second
+        self._on_step = on_step
+        self._accumulated: float = 0.0
+        self.steps: int = 0
+        self.finished: bool = False
+        self.result = None
+
+    def advance(self, steps: int) -> list[T]:
+        """Pull up to `steps` items right now."""
+        items = []
+        if self.finished:
+            return items
+
+        for _ in range(steps):
+            try:
+                item = next(self._source)
+            except StopIteration as stop:
+                self.result = stop.value
+                self.finished = True
+                break
+            items.append(item)
+            self.steps += 1
+            if self._on_step is not None and self._on_step(item):
+                self.stop()
+                break
+        return items
+
+    def update(self, delta_time: float) -> list[T]:
+        self._accumulated += delta_time * self.steps_per_second
+        steps = int(self._accumulated)
+        self._accumulated -= steps
+        return self.advance(steps)
+
+    def finish(self) -> list[T]:
+        """Pull everything left in one go."""
+        items = []
+        while not self.finished:
+            items.extend(self.advance(1024))
+        return items
+
+    def stop(self):
+        close = getattr(self._source, "close", None)
+        if close is not None:
+            close()
+        self.finished = True
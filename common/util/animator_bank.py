@@ -0,0 +1,249 @@
+from math import pi, tau
+from typing import Optional
+
+import numpy as np
+
+from common.util import procedural_animator
+from common.util.procedural_animator import (
+    SecondOrderAnimatorBase,
+    SecondOrderAnimator,
+    SecondOrderAnimatorTCritical,
+    SecondOrderAnimatorKClamped,
+    SecondOrderAnimatorPoleZero
+)
+
+
+__all__ = (
+    'AnimatorBank',
+    'AnimatorView'
+)
+
+
+# Every per element array, in the order update_at gathers them.
+_STATE = ('xp', 'y', 'dy', '_freq', '_damp', '_resp', 'k1', 'k2', 'k3', 'T_crit', '_w', '_d')
+
+
+class AnimatorView:
+    """
+    A lightweight handle onto a single element of an AnimatorBank.
+
+    Lets code that used to hold a list of animators keep reading `.y`
+    without the bank having to create an object per element.
+    """
+    __slots__ = ('_bank', '_index')
+
+    def __init__(self, bank: 'AnimatorBank', index):
+        self._bank = bank
+        self._index = index
+
+    @property
+    def xp(self) -> float:
+        return float(self._bank.xp[self._index])
+
+    @property
+    def y(self) -> float:
+        return float(self._bank.y[self._index])
+
+    @property
+    def dy(self) -> float:
+        return float(self._bank.dy[self._index])
+
+
+class AnimatorBank:
+    """
+    Many second order animators stored as contiguous numpy arrays and stepped in one go.
+
+    The maths is identical to the single animator classes in `procedural_animator`,
+    the `integrator` picks which of the four variants is used. It defaults
+    to whatever `ProceduralAnimator` currently is.
+    """
+
+    def __init__(self, shape: int | tuple[int, ...], frequency: float, damping: float, response: float,
+                 x_initial: float = 0.0, y_initial: float = 0.0, y_d_initial: float = 0.0,
+                 integrator: Optional[type] = None):
+        integrator = integrator or procedural_animator.ProceduralAnimator
+        assert issubclass(integrator, SecondOrderAnimatorBase)
+        self.integrator: type = integrator
+        self._step = self._find_step(integrator)
+
+        self.xp: np.ndarray = np.full(shape, x_initial, dtype=np.float64)
+        self.y: np.ndarray = np.full(shape, y_initial, dtype=np.float64)
+        self.dy: np.ndarray = np.full(shape, y_d_initial, dtype=np.float64)
+
+        # Per element parameters, the k values are only recalculated when these change.
+        self._freq: np.ndarray = np.full(self.y.shape, frequency, dtype=np.float64)
+        self._damp: np.ndarray = np.full(self.y.shape, damping, dtype=np.float64)
+        self._resp: np.ndarray = np.full(self.y.shape, response, dtype=np.float64)
+
+        self.k1: np.ndarray = np.empty(self.y.shape, dtype=np.float64)
+        self.k2: np.ndarray = np.empty(self.y.shape, dtype=np.float64)
+        self.k3: np.ndarray = np.empty(self.y.shape, dtype=np.float64)
+        self.T_crit: np.ndarray = np.empty(self.y.shape, dtype=np.float64)
+        self._w: np.ndarray = np.empty(self.y.shape, dtype=np.float64)
+        self._d: np.ndarray = np.empty(self.y.shape, dtype=np.float64)
+        self._stale: bool = True
+        self.calc_k_vals()
+
+    def _find_step(self, integrator: type):
+        steps = {
+            SecondOrderAnimator: self._step_basic,
+            SecondOrderAnimatorTCritical: self._step_t_critical,
+            SecondOrderAnimatorKClamped: self._step_k_clamped,
+            SecondOrderAnimatorPoleZero: self._step_pole_zero
+        }
+        for cls in integrator.__mro__:
+            if cls in steps:
+                return steps[cls]
+        raise TypeError(f"{integrator.__qualname__} has no vectorised equivalent")
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.y.shape
+
+    @property
+    def size(self) -> int:
+        return self.y.size
+
+    def __len__(self):
+        return len(self.y)
+
+    def __getitem__(self, index) -> AnimatorView:
+        return AnimatorView(self, index)
+
+    @property
+    def frequency(self) -> np.ndarray:
+        return self._freq
+
+    @property
+    def damping(self) -> np.ndarray:
+        return self._damp
+
+    @property
+    def response(self) -> np.ndarray:
+        return self._resp
+
+    def set_parameters(self, frequency=None, damping=None, response=None, where=None):
+        """
+        Set the frequency, damping, and response of many animators at once.
+
+        Each value can be a scalar or an array, and `where` can be any numpy
+        index (mask, slice, index array) to only retune part of the bank.
+        The k values are recalculated in bulk on the next update.
+        """
+        where = Ellipsis if where is None else where
+        if frequency is not None:
+            self._freq[where] = frequency
+            self._stale = True
+        if damping is not None:
+            self._damp[where] = damping
+            self._stale = True
+        if response is not None:
+            self._resp[where] = response
+            self._stale = True
+
+    def update_frequency(self, new_frequency, where=None):
+        self.set_parameters(frequency=new_frequency, where=where)
+
+    def update_damping(self, new_damping, where=None):
+        self.set_parameters(damping=new_damping, where=where)
+
+    def update_response(self, new_response, where=None):
+        self.set_parameters(response=new_response, where=where)
+
+    def update_values(self, new_frequency=None, new_damping=None, new_response=None, where=None):
+        self.set_parameters(new_frequency, new_damping, new_response, where)
+
+    def calc_k_vals(self):
+        freq, damp, resp = self._freq, self._damp, self._resp
+        np.divide(damp, pi * freq, out=self.k1)
+        np.divide(1.0, (tau * freq)**2.0, out=self.k2)
+        np.divide(resp * damp, tau * freq, out=self.k3)
+        self.T_crit[...] = 0.8 * (np.sqrt(4.0 * self.k2 + self.k1 * self.k1) - self.k1)
+        np.multiply(tau, freq, out=self._w)
+        np.multiply(self._w, np.abs(damp * damp - 1.0), out=self._d)
+        self._stale = False
+
+    def update(self, dt: float, nx, dx=None) -> np.ndarray:
+        """
+        Step every animator by dt towards nx, which is either a scalar or an array matching the bank's shape.
+        Returns the `y` array (not a copy).
+        """
+        if dx is None:
+            dx = (nx - self.xp) / dt
+        self.xp[...] = nx
+        if self._stale:
+            self.calc_k_vals()
+        self._step(dt, dx)
+        return self.y
+
+    def update_at(self, dt: float, index, nx, dx=None) -> np.ndarray:
+        """
+        Step only the animators at the flat indices in `index` towards nx, every other one is left untouched.
+        nx is a scalar or an array matching `index`. Returns the new `y` of just those animators.
+        """
+        if self._stale:
+            self.calc_k_vals()
+
+        # Gather the selected elements into a bank of their own so every step function just works.
+        part = object.__new__(AnimatorBank)
+        for name in _STATE:
+            setattr(part, name, getattr(self, name).reshape(-1)[index])
+        part.integrator = self.integrator
+        part._step = part._find_step(self.integrator)
+        part._stale = False
+        part.update(dt, nx, dx)
+
+        self.xp.reshape(-1)[index] = part.xp
+        self.y.reshape(-1)[index] = part.y
+        self.dy.reshape(-1)[index] = part.dy
+        return part.y
+
+    def _step_basic(self, dt: float, dx):
+        self.y += self.dy * dt
+        self.dy += (self.xp + dx * self.k3 - self.y - self.dy * self.k1) * dt / self.k2
+
+    def _step_t_critical(self, dt: float, dx):
+        # Each element needs its own number of sub steps to stay under its critical time step.
+        iterations = np.ceil(dt / self.T_crit)
+        np.maximum(iterations, 1.0, out=iterations)
+        sub_dt = dt / iterations
+        target = self.xp + dx * self.k3
+
+        total = int(iterations.max())
+        if total == int(iterations.min()):
+            for _ in range(total):
+                self.y += self.dy * sub_dt
+                self.dy += (target - self.y - self.dy * self.k1) * sub_dt / self.k2
+            return
+
+        # Elements that have finished their sub steps get a step of zero which leaves them untouched.
+        step = np.empty_like(sub_dt)
+        for idx in range(total):
+            np.multiply(sub_dt, iterations > idx, out=step)
+            self.y += self.dy * step
+            self.dy += (target - self.y - self.dy * self.k1) * step / self.k2
+
+    def _step_k_clamped(self, dt: float, dx):
+        # Clamping k2 it isn't physically correct, but protects against the sim collapsing with lag spikes.
+        k2_stable = np.maximum(self.k2, np.maximum(dt*dt/2.0 + dt*self.k1/2.0, dt*self.k1))
+
+        self.y += self.dy * dt
+        self.dy += (self.xp + dx * self.k3 - self.y - self.dy * self.k1) * dt / k2_stable
+
+    def _step_pole_zero(self, dt: float, dx):
+        damp, w, d = self._damp, self._w, self._d
+
+        # Both branches are computed for every element and then selected,
+        # the unused branch is allowed to overflow.
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            t1 = np.exp(-damp * w * dt)
+            α = 2.0 * t1 * np.where(damp <= 1.0, np.cos(dt * d), np.cosh(dt * d))
+            β = t1 * t1
+            t2 = dt / (1 + β - α)
+
+        low = w * dt < damp
+        k1_stable = np.where(low, self.k1, (1 - β) * t2)
+        k2_stable = np.where(low, np.maximum(self.k2, np.maximum(dt*dt/2.0 + dt*self.k1/2.0, dt*self.k1)), dt * t2)
+
+        self.y += self.dy * dt
+        self.dy += (self.xp + dx * self.k3 - self.y - self.dy * k1_stable) * dt / k2_stable
@@ -1,72 +1,275 @@
 from typing import Callable
 from logging import getLogger
 from time import perf_counter_ns
+from array import array
+from collections import deque
+from functools import wraps
+import threading
+import atexit
+import json
+import os
+
+
+__all__ = (
+    "perf_timed",
+    "perf_timed_context",
+    "perf_zone",
+    "PERF_TRACKER",
+    "FrameProfiler",
+    "ZoneStats",
+    "RingBuffer"
+)
+
+
+# The per frame ring buffer stats are always recorded, like perf_timed always has been.
+# Set PERF_TRACKING=0 before launching to turn them off, then the decorators hand back the
+# undecorated function. Set PERF_TRACE to a file path to also record a chrome trace of the whole session.
+PERF_TRACKING_ENABLED: bool = os.environ.get("PERF_TRACKING", "1") not in ("", "0")
+PERF_TRACE_PATH: str = os.environ.get("PERF_TRACE", "")
+
+
+class RingBuffer:
+    """A fixed size buffer of doubles which overwrites its oldest value once full."""
+
+    def __init__(self, size: int):
+        self._data = array('d', bytes(8 * size))
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, value: float):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    def values(self) -> list[float]:
+        if self._count < self._size:
+            return self._data[:self._count].tolist()
+        return self._data[self._next:].tolist() + self._data[:self._next].tolist()
+
+    @property
+    def last(self) -> float:
+        return self._data[self._next - 1] if self._count else float('nan')
+
+    def mean(self) -> float:
+        if not self._count:
+            return float('nan')
+        return sum(self._data[:self._count]) / self._count
+
+    def percentiles(self, *percents: float) -> tuple[float, ...]:
+        """Nearest rank percentiles of the stored values. NaN if the buffer is empty."""
+        values = sorted(self._data[:self._count])
+        if not values:
+            return tuple(float('nan') for _ in percents)
+        last = len(values) - 1
+        return tuple(values[min(last, int(round(p / 100.0 * last)))] for p in percents)
+
+    def summary(self) -> dict[str, float]:
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        return {
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "mean": self.mean(),
+            "max": max(self._data[:self._count], default=float('nan'))
+        }
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+
+class ZoneStats:
+    """The timings of a single zone, stored as the total time spent in it each frame."""
+
+    def __init__(self, name: str, parent: 'ZoneStats | None', history: int):
+        self.name: str = name
+        self.parent: ZoneStats | None = parent
+        self.path: str = name if parent is None or parent.parent is None else f"{parent.path}/{name}"
+        self.children: dict[str, ZoneStats] = {}
+        self.frame_times: RingBuffer = RingBuffer(history)
+        self.call_count: int = 0
+
+        self._history = history
+        self._frame_time: int = 0
+        self._frame_calls: int = 0
+        self._start: int = 0
+
+    def child(self, name: str) -> 'ZoneStats':
+        zone = self.children.get(name)
+        if zone is None:
+            zone = self.children[name] = ZoneStats(name, self, self._history)
+        return zone
+
+    def commit_frame(self):
+        if self._frame_calls:
+            self.frame_times.push(self._frame_time * 1e-6)
+        self._frame_time = 0
+        self._frame_calls = 0
+        for child in self.children.values():
+            child.commit_frame()
+
+    def percentiles(self, *percents: float) -> tuple[float, ...]:
+        """Nearest rank percentiles of the per frame time in ms. NaN if the zone has never completed a frame."""
+        return self.frame_times.percentiles(*percents)
+
+    def walk(self):
+        yield self
+        for child in self.children.values():
+            yield from child.walk()
 
 
 try:
     import imgui
 
     class _TrackerBase:
-
-        def __init__(self):
-            self._func_timings: dict[Callable, list] = {}
-            self._func_call_count: dict[Callable, int] = {}
-            self._contexts: dict[str, set[Callable]] = {"": set()}
+        _contexts: dict[str, set[str]]
 
         def imgui_draw(self, *contexts):
             for context in contexts:
                 expanded, visible = imgui.collapsing_header(f"Function Timings: {context}")
 
                 if expanded:
-                    for func in self._contexts[context]:
-                        count = self._func_call_count[func]
-                        if not count:
-                            imgui.text(f"{func.__qualname__} - avg: N/A - count: {count}")
-                            if imgui.is_item_hovered():
-                                imgui.set_tooltip(f"{func}")
-                            return
-                        timings = self._func_timings[func]
-                        avg_count = min(count, 10)
-                        avg_timing = sum(timings[-avg_count:]) / avg_count
-
-                        imgui.text(f"{func.__qualname__} - avg: {avg_timing * 1e-6:.3f}ms - count: {count}")
-                        if imgui.is_item_hovered():
-                            imgui.set_tooltip(f"{func}")
+                    for zone in self.zones(context):
+                        p50, p95, p99 = zone.percentiles(50, 95, 99)
+                        imgui.text(f"{zone.path} - p50: {p50:.3f}ms p95: {p95:.3f}ms p99: {p99:.3f}ms - count: {zone.call_count}")
 
             imgui.separator()
 
 except ImportError:
     class _TrackerBase:
 
-        def __init__(self):
-            self._func_timings: dict[Callable, list] = {}
-            self._func_call_count: dict[Callable, int] = {}
-            self._contexts: dict[str, set[Callable]] = {"": set()}
-
         def imgui_draw(self, *contexts):
             raise NotImplementedError("Failed to import Imgui so this func doesn't exsist")
 
 
-__all__ = (
-    "perf_timed",
-    "perf_timed_context",
-    "PERF_TRACKER"
-)
+class _Zone:
+    __slots__ = ('_profiler', '_name')
 
+    def __init__(self, profiler: 'FrameProfiler', name: str):
+        self._profiler = profiler
+        self._name = name
 
-class PerfTracker(_TrackerBase):
+    def __enter__(self):
+        self._profiler.push(self._name)
+
+    def __exit__(self, type, value, traceback):
+        self._profiler.pop()
 
-    def track_function(self, func: Callable, contexts: tuple[str, ...] = ()):
-        if func in self._func_timings:
-            raise KeyError("This function is already being tracked")
 
-        self._func_timings[func] = []
-        self._func_call_count[func] = 0
-        self._contexts[""].add(func)
+class _NullZone:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+_NULL_ZONE = _NullZone()
+
+
+class FrameProfiler(_TrackerBase):
+    """
+    A hierarchical profiler that records how long each zone took per frame.
+
+    Zones nest, so a zone opened while another is running is stored as its child.
+    Each zone keeps the last `history` frame totals in a ring buffer, call
+    `next_frame` once per frame to commit them. When `enabled` is False at
+    decoration time `timed` returns the original function untouched.
+    """
+
+    def __init__(self, history: int = 240, enabled: bool = PERF_TRACKING_ENABLED, trace_limit: int = 1_000_000):
+        self.enabled: bool = enabled
+        self._history: int = history
+        self._root: ZoneStats = ZoneStats("", None, history)
+        self._stack: list[ZoneStats] = [self._root]
+        self._contexts: dict[str, set[str]] = {"": set()}
+        self._frame: int = 0
+
+        self._tracing: bool = False
+        self._trace: deque = deque(maxlen=trace_limit)
+        self._pid: int = os.getpid()
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    def push(self, name: str):
+        zone = self._stack[-1].child(name)
+        self._stack.append(zone)
+        zone._start = perf_counter_ns()
+
+    def pop(self):
+        end = perf_counter_ns()
+        zone = self._stack.pop()
+        elapsed = end - zone._start
+        zone._frame_time += elapsed
+        zone._frame_calls += 1
+        zone.call_count += 1
+        if self._tracing:
+            self._trace.append((zone.path, zone._start, elapsed, threading.get_ident()))
+
+    def zone(self, name: str):
+        """A context manager that times everything inside it as the zone `name`."""
+        if not self.enabled:
+            return _NULL_ZONE
+        return _Zone(self, name)
+
+    def timed(self, func: Callable = None, *, name: str | None = None, contexts: tuple[str, ...] = ()):
+        """Decorate a function so every call is timed as a zone named after its qualname."""
+        if func is None:
+            return lambda f: self.timed(f, name=name, contexts=contexts)
+
+        if not self.enabled:
+            return func
+
+        zone_name = name or func.__qualname__
+        self._contexts[""].add(zone_name)
         for context in contexts:
-            context_funcs = self._contexts.get(context, set())
-            context_funcs.add(func)
-            self._contexts[context] = context_funcs
+            self._contexts.setdefault(context, set()).add(zone_name)
+
+        push, pop = self.push, self.pop
+
+        @wraps(func)
+        def _timed(*args, **kwargs):
+            push(zone_name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                pop()
+
+        return _timed
+
+    def next_frame(self):
+        """Commit the time every zone spent in the frame that just ended."""
+        if not self.enabled:
+            return
+        self._root.commit_frame()
+        self._frame += 1
+        if self._tracing:
+            self._trace.append((None, perf_counter_ns(), self._frame, threading.get_ident()))
+
+    def zones(self, context: str = ""):
+        names = self._contexts.get(context, set())
+        for zone in self._root.walk():
+            if zone is self._root:
+                continue
+            if not context or zone.name in names:
+                yield zone
+
+    def stats(self, context: str = "") -> dict[str, dict[str, float]]:
+        """The p50/p95/p99 and mean frame time in ms for every zone, keyed by its path."""
+        stats = {}
+        for zone in self.zones(context):
+            stats[zone.path] = zone.frame_times.summary()
+            stats[zone.path]["frames"] = len(zone.frame_times)
+            stats[zone.path]["count"] = zone.call_count
+        return stats
 
     def print(self, *contexts):
         if not contexts:
@@ -74,54 +277,60 @@ class PerfTracker(_TrackerBase):
 
         print("|--- PERF TRACKING ---|")
         for context in contexts:
-            funcs = self._contexts[context]
-            for func in funcs:
-                count = self._func_call_count[func]
-                if not count:
-                    print(f"- {func.__qualname__} - Uncalled")
+            for zone in self.zones(context):
+                indent = "  " * (zone.path.count("/"))
+                if not zone.call_count:
+                    print(f"{indent}- {zone.name} - Uncalled")
                     continue
+                p50, p95, p99 = zone.percentiles(50, 95, 99)
+                print(f"{indent}- {zone.name} - p50: {p50: .3f}ms p95: {p95: .3f}ms p99: {p99: .3f}ms - count: {zone.call_count}")
 
-                timings = self._func_timings[func]
-                avg_count = min(count, 10)
-                avg_timing = sum(timings[-avg_count:]) / avg_count
+    def reset(self):
+        self._root = ZoneStats("", None, self._history)
+        self._stack = [self._root]
+        self._trace.clear()
 
-                print(f"- {func.__qualname__} - avg: {avg_timing * 1e-6: .3f}ms - count: {count}")
+    def start_trace(self):
+        self._trace.clear()
+        self._tracing = True
 
-    def __setitem__(self, func: Callable, elapsed_time: float):
-        self._func_timings[func].append(elapsed_time)
-        self._func_call_count[func] += 1
+    def stop_trace(self):
+        self._tracing = False
 
+    def trace_events(self) -> list[dict]:
+        """The recorded zones in the chrome trace event format (chrome://tracing, perfetto)."""
+        events = []
+        for name, start, value, tid in self._trace:
+            if name is None:
+                events.append({"name": f"frame {value}", "ph": "i", "s": "g", "ts": start / 1e3, "pid": self._pid, "tid": tid})
+            else:
+                events.append({"name": name.rsplit("/", 1)[-1], "cat": name, "ph": "X", "ts": start / 1e3, "dur": value / 1e3, "pid": self._pid, "tid": tid})
+        return events
 
-PERF_TRACKER = PerfTracker()
+    def save_trace(self, path: str):
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, file)
 
 
-def perf_timed_context(*contexts):
-    def perf_timed(func: Callable):
-        PERF_TRACKER.track_function(func, contexts)
+PERF_TRACKER = FrameProfiler(enabled=PERF_TRACKING_ENABLED or bool(PERF_TRACE_PATH))
+if PERF_TRACE_PATH:
+    PERF_TRACKER.start_trace()
+    atexit.register(PERF_TRACKER.save_trace, PERF_TRACE_PATH)
 
-        def _count(*args, **kwargs):
-            start = perf_counter_ns()
-            val = func(*args, **kwargs)
-            elapsed = (perf_counter_ns() - start)
-            PERF_TRACKER[func] = elapsed
-            return val
 
-        return _count
+def perf_zone(name: str):
+    return PERF_TRACKER.zone(name)
 
-    return perf_timed
 
+def perf_timed_context(*contexts):
+    def perf_timed(func: Callable):
+        return PERF_TRACKER.timed(func, contexts=contexts)
 
-def perf_timed(func: Callable):
-    PERF_TRACKER.track_function(func, (func.__name__,))
+    return perf_timed
 
-    def _count(*args, **kwargs):
-        start = perf_counter_ns()
-        val = func(*args, **kwargs)
-        elapsed = (perf_counter_ns() - start)
-        PERF_TRACKER[func] = elapsed
-        return val
 
-    return _count
+def perf_timed(func: Callable):
+    return PERF_TRACKER.timed(func, contexts=(func.__name__,))
 
 
 class LogSection:
@@ -0,0 +1,200 @@
+"""
+Uniform grid spatial indices for picking things under the mouse without looking at everything.
+
+Items are any hashable key with an axis aligned (left, right, bottom, top) rect. Each item is filed
+under every grid cell its rect touches, so a point query only has to check the items in one cell
+and a rect query only those in the cells it covers.
+
+A single grid works best when the items are roughly the size of its cells. When they span many
+orders of magnitude (like heightviz2d) use a `BucketedSpatialIndex` with one grid per size bucket.
+"""
+from math import floor
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+__all__ = (
+    "Rect",
+    "SpatialIndex",
+    "BucketedSpatialIndex"
+)
+
+K = TypeVar('K', bound=Hashable)
+B = TypeVar('B', bound=Hashable)
+
+Rect = tuple[float, float, float, float]  # left, right, bottom, top
+
+
+def _contains(rect: Rect, x: float, y: float) -> bool:
+    return rect[0] <= x <= rect[1] and rect[2] <= y <= rect[3]
+
+
+def _overlaps(a: Rect, b: Rect) -> bool:
+    return a[0] <= b[1] and b[0] <= a[1] and a[2] <= b[3] and b[2] <= a[3]
+
+
+class SpatialIndex(Generic[K]):
+    """
+    A sparse uniform grid of `cell_size` cells, only the cells that hold something exist.
+
+    Moving an item within the same cells only updates its rect, so dragging is cheap.
+    """
+
+    def __init__(self, cell_size: float = 1.0):
+        self.cell_size: float = cell_size
+        self._cells: dict[tuple[int, int], set[K]] = {}
+        self._rects: dict[K, Rect] = {}
+        self._spans: dict[K, tuple[int, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, item: K) -> bool:
+        return item in self._rects
+
+    def __iter__(self):
+        return iter(self._rects)
+
+    def rect(self, item: K) -> Rect:
+        return self._rects[item]
+
+    def _span(self, rect: Rect) -> tuple[int, int, int, int]:
+        size = self.cell_size
+        return floor(rect[0] / size), floor(rect[1] / size), floor(rect[2] / size), floor(rect[3] / size)
+
+    def _file(self, item: K, span: tuple[int, int, int, int]):
+        cells = self._cells
+        for cx in range(span[0], span[1] + 1):
+            for cy in range(span[2], span[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = bucket = set()
+                bucket.add(item)
+
+    def _unfile(self, item: K, span: tuple[int, int, int, int]):
+        cells = self._cells
+        for cx in range(span[0], span[1] + 1):
+            for cy in range(span[2], span[3] + 1):
+                bucket = cells[(cx, cy)]
+                bucket.discard(item)
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    def insert(self, item: K, rect: Rect):
+        """Add an item, or move it if it is already in the index."""
+        if item in self._rects:
+            self.move(item, rect)
+            return
+        span = self._span(rect)
+        self._rects[item] = rect
+        self._spans[item] = span
+        self._file(item, span)
+
+    def move(self, item: K, rect: Rect):
+        span = self._span(rect)
+        old = self._spans[item]
+        self._rects[item] = rect
+        if span != old:
+            self._unfile(item, old)
+            self._file(item, span)
+            self._spans[item] = span
+
+    def remove(self, item: K):
+        self._unfile(item, self._spans.pop(item))
+        del self._rects[item]
+
+    def clear(self):
+        self._cells.clear()
+        self._rects.clear()
+        self._spans.clear()
+
+    def query_point(self, x: float, y: float) -> list[K]:
+        """Every item whose rect contains the point."""
+        bucket = self._cells.get((floor(x / self.cell_size), floor(y / self.cell_size)))
+        if not bucket:
+            return []
+        rects = self._rects
+        return [item for item in bucket if _contains(rects[item], x, y)]
+
+    def query_rect(self, rect: Rect) -> list[K]:
+        """Every item whose rect overlaps the given one (touching counts)."""
+        rects = self._rects
+        x0, x1, y0, y1 = self._span(rect)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # Bigger than everything that is filled, so walking the filled cells is cheaper.
+            found = set().union(*(
+                bucket for (cx, cy), bucket in self._cells.items() if x0 <= cx <= x1 and y0 <= cy <= y1
+            ))
+        else:
+            found = set()
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    bucket = self._cells.get((cx, cy))
+                    if bucket:
+                        found.update(bucket)
+        return [item for item in found if _overlaps(rects[item], rect)]
+
+    def nearest(self, x: float, y: float, radius: float) -> K | None:
+        """The item with the closest rect within radius of the point, or None."""
+        best, best_d = None, radius * radius
+        for item in self.query_rect((x - radius, x + radius, y - radius, y + radius)):
+            l, r, b, t = self._rects[item]
+            dx = max(l - x, 0.0, x - r)
+            dy = max(b - y, 0.0, y - t)
+            d = dx * dx + dy * dy
+            if d <= best_d:
+                best, best_d = item, d
+        return best
+
+
+class BucketedSpatialIndex(Generic[B, K]):
+    """
+    One `SpatialIndex` per bucket (like a zoom level), each with a cell size suited to what is in it.
+
+    :param cell_size_for: the cell size to give a bucket the first time something is put in it.
+    """
+
+    def __init__(self, cell_size_for: Callable[[B], float]):
+        self._cell_size_for = cell_size_for
+        self.buckets: dict[B, SpatialIndex[K]] = {}
+        self._bucket_of: dict[K, B] = {}
+
+    def __len__(self) -> int:
+        return len(self._bucket_of)
+
+    def __contains__(self, item: K) -> bool:
+        return item in self._bucket_of
+
+    def bucket_of(self, item: K) -> B:
+        return self._bucket_of[item]
+
+    def insert(self, item: K, rect: Rect, bucket: B):
+        """Add an item to a bucket, moving it out of any other bucket it was in."""
+        old = self._bucket_of.get(item)
+        if old is not None and old != bucket:
+            self.remove(item)
+        index = self.buckets.get(bucket)
+        if index is None:
+            self.buckets[bucket] = index = SpatialIndex(self._cell_size_for(bucket))
+        index.insert(item, rect)
+        self._bucket_of[item] = bucket
+
+    def move(self, item: K, rect: Rect):
+        self.buckets[self._bucket_of[item]].move(item, rect)
+
+    def remove(self, item: K):
+        self.buckets[self._bucket_of.pop(item)].remove(item)
+
+    def clear(self):
+        self.buckets.clear()
+        self._bucket_of.clear()
+
+    def _indices(self, buckets: Iterable[B] | None):
+        if buckets is None:
+            return self.buckets.values()
+        return [self.buckets[bucket] for bucket in buckets if bucket in self.buckets]
+
+    def query_point(self, x: float, y: float, buckets: Iterable[B] | None = None) -> list[K]:
+        """Every item containing the point, only looking in the given buckets (or all of them)."""
+        return [item for index in self._indices(buckets) for item in index.query_point(x, y)]
+
+    def query_rect(self, rect: Rect, buckets: Iterable[B] | None = None) -> list[K]:
+        return [item for index in self._indices(buckets) for item in index.query_rect(rect)]
@@ -0,0 +1,25 @@
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform vec2 origin;
+uniform float tile_size;
+uniform int y_len;
+
+in vec2 in_pos;
+in float in_scale;
+in vec4 in_colour;
+
+out vec4 vs_colour;
+
+void main(){
+    // Cells are laid out x major, so the instance id is x * y_len + y.
+    vec2 cell = vec2(gl_InstanceID / y_len, gl_InstanceID % y_len);
+    vec2 pos = origin + (cell + 0.5) * tile_size + in_pos * tile_size * in_scale;
+    gl_Position = window.projection * window.view * vec4(pos, 0.0, 1.0);
+
+    vs_colour = in_colour;
+}
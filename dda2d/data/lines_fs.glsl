@@ -0,0 +1,24 @@
+#version 330
+
+uniform vec2 origin;
+uniform vec2 size;
+uniform float tile_size;
+uniform float line_width;
+uniform vec4 line_colour;
+
+in vec2 vs_pos;
+
+out vec4 fs_colour;
+
+void main(){
+    // The quad is a little bigger than the grid, so stop the lines poking out past its edges.
+    float half_width = line_width / 2.0;
+    if (any(lessThan(vs_pos, origin - half_width)) || any(greaterThan(vs_pos, origin + size + half_width))) discard;
+
+    // Distance in pixels to the closest grid line along each axis.
+    vec2 offset = (vs_pos - origin) / tile_size;
+    vec2 dist = abs(offset - round(offset)) * tile_size;
+    if (min(dist.x, dist.y) > half_width) discard;
+
+    fs_colour = line_colour;
+}
@@ -1,3 +1,5 @@
+from typing import Callable, Iterator
+
 from pyglet.math import Vec2
 
 PointList = list[Vec2]
@@ -8,8 +10,20 @@ def snap(point: Vec2, step: float, x_offset: float = 0.0, y_offset: float = 0.0)
 
 
 def dda(start: Vec2, end: Vec2) -> PointList:
-    points: PointList = []
+    return list(iter_dda(start, end))
+
+
+def visit_dda(visit: Callable[[Vec2], bool | None], start: Vec2, end: Vec2) -> Vec2 | None:
+    """Call `visit` with every point from start to end until it returns True, returns the last point visited."""
+    point = None
+    for point in iter_dda(start, end):
+        if visit(point):
+            break
+    return point
 
+
+def iter_dda(start: Vec2, end: Vec2) -> Iterator[Vec2]:
+    """Lazily yield the points of `dda`, so the consumer can stop whenever it wants and nothing is stored."""
     dx = end.x - start.x
     dy = end.y - start.y
 
@@ -17,7 +31,9 @@ def dda(start: Vec2, end: Vec2) -> PointList:
     steps = int(abs(dx)) if abs(dx) > abs(dy) else int(abs(dy))
 
     if steps < 1:
-        return [start, end]
+        yield start
+        yield end
+        return
 
     # Rise and rtun
     x_inc = float(dx / steps)
@@ -28,8 +44,6 @@ def dda(start: Vec2, end: Vec2) -> PointList:
 
     # Gen points
     for _ in range(0, steps + 1):
-        points.append(Vec2(px, py))
+        yield Vec2(px, py)
         px += x_inc
         py += y_inc
-
-    return points
@@ -0,0 +1,269 @@
+"""
+Field of view over a 2D occupancy grid, which cells can be seen from a cell within some radius.
+
+There are three strategies that all fill the same kind of (x_len, y_len) bool mask:
+
+- shadowcast: recursive shadow casting, every cell is looked at once per octant.
+- fan: a fan of rays per octant stepped together with numpy, blocked by the first opaque cell.
+- naive: one DDA line from the origin to every cell on the edge of the radius, kept as a reference.
+
+Opaque cells are visible, they just hide what is behind them. `FieldOfView` caches each octant
+of each (origin, radius, strategy) it has worked out, and when a cell changes only the octants
+whose wedge it lies in are recomputed.
+"""
+from math import atan2, ceil, degrees, tau
+
+import numpy as np
+
+from dda2d.raster import CellBuffer, raster_line
+
+__all__ = (
+    "FieldOfView",
+    "octants_of",
+    "shadowcast",
+    "ray_fan",
+    "naive_fov",
+    "STRATEGIES"
+)
+
+# The eight 45 degree wedges, octant k covers the angles from 45k to 45(k+1) degrees.
+_DIRECTIONS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+
+def _octant_transform(octant: int) -> tuple[int, int, int, int]:
+    # Shadow casting works in a frame where rows go along -y and columns lean from -y towards (-1, -1).
+    # Map -y onto the octant's axis edge and (-1, -1) onto its diagonal edge.
+    a, b = _DIRECTIONS[octant], _DIRECTIONS[(octant + 1) % 8]
+    axis, diagonal = (a, b) if octant % 2 == 0 else (b, a)
+    return axis[0] - diagonal[0], -axis[0], axis[1] - diagonal[1], -axis[1]
+
+
+_TRANSFORMS = tuple(_octant_transform(octant) for octant in range(8))
+
+
+def octants_of(dx: int, dy: int) -> tuple[int, ...]:
+    """Every octant the cell at (dx, dy) from the origin overlaps, going by the corners of its square."""
+    if dx == 0 and dy == 0:
+        return tuple(range(8))
+    angles = [degrees(atan2(dy + oy, dx + ox)) % 360.0 for ox in (-0.5, 0.5) for oy in (-0.5, 0.5)]
+    low, high = min(angles), max(angles)
+    if high - low > 180.0:
+        # The square straddles 0 degrees, so its span runs from the lowest corner below the axis
+        # (taken negative) up to the highest corner above it.
+        low = min(angle for angle in angles if angle > 180.0) - 360.0
+        high = max(angle for angle in angles if angle < 180.0)
+    return tuple(
+        octant for octant in range(8)
+        if any(low <= 45.0 * (octant + 1) + turn and 45.0 * octant + turn <= high for turn in (-360.0, 0.0))
+    )
+
+
+def _octants_containing(dx: int, dy: int) -> tuple[int, ...]:
+    # Which octants the center of a cell is in, it is in two when it is exactly on a boundary.
+    angle = degrees(atan2(dy, dx)) % 360.0
+    return tuple(octant for octant in range(8) if 45.0 * octant <= angle <= 45.0 * (octant + 1)) + ((7,) if angle == 0.0 else ())
+
+
+def _in_radius(dx: int, dy: int, radius: int) -> bool:
+    return dx * dx + dy * dy <= radius * radius
+
+
+def _shadowcast_octant(occupancy: np.ndarray, x: int, y: int, radius: int, octant: int, visible: list[int]):
+    x_len, y_len = occupancy.shape
+    xx, xy, yx, yy = _TRANSFORMS[octant]
+
+    def opaque(cx: int, cy: int) -> bool:
+        return not (0 <= cx < x_len and 0 <= cy < y_len) or occupancy[cx, cy]
+
+    def cast(row: int, start: float, end: float):
+        if start < end:
+            return
+        new_start = start
+        for j in range(row, radius + 1):
+            dx, dy = -j - 1, -j
+            blocked = False
+            while dx <= 0:
+                dx += 1
+                cx, cy = x + dx * xx + dy * xy, y + dx * yx + dy * yy
+                l_slope, r_slope = (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5)
+                if start < r_slope:
+                    continue
+                if end > l_slope:
+                    break
+
+                if _in_radius(dx, dy, radius) and 0 <= cx < x_len and 0 <= cy < y_len:
+                    visible.append(cx * y_len + cy)
+
+                if blocked:
+                    if opaque(cx, cy):
+                        new_start = r_slope
+                        continue
+                    blocked = False
+                    start = new_start
+                elif opaque(cx, cy) and j < radius:
+                    blocked = True
+                    cast(j + 1, start, l_slope)
+                    new_start = r_slope
+            if blocked:
+                break
+
+    cast(1, 1.0, 0.0)
+
+
+def _fan_octant(occupancy: np.ndarray, x: int, y: int, radius: int, octant: int, visible: list[int]):
+    x_len, y_len = occupancy.shape
+    # Enough rays that neighbouring ones are less than a cell apart at the edge of the radius.
+    count = max(2, ceil(radius * tau / 8.0 * 2.0) + 1)
+    angles = np.linspace(octant * tau / 8.0, (octant + 1) * tau / 8.0, count)
+    d_x, d_y = np.cos(angles), np.sin(angles)
+
+    with np.errstate(divide='ignore'):
+        dt_x = np.abs(1.0 / d_x)
+        dt_y = np.abs(1.0 / d_y)
+    s_x = np.where(d_x >= 0.0, 1, -1)
+    s_y = np.where(d_y >= 0.0, 1, -1)
+    # Every ray starts at the center of the origin cell, so the first boundary is half a cell away.
+    t_x = dt_x * 0.5
+    t_y = dt_y * 0.5
+    c_x = np.zeros(count, dtype=np.int64)
+    c_y = np.zeros(count, dtype=np.int64)
+
+    state = [t_x, t_y, dt_x, dt_y, s_x, s_y, c_x, c_y]
+    for _ in range(2 * radius + 2):
+        t_x, t_y, dt_x, dt_y, s_x, s_y, c_x, c_y = state
+        step_x = t_x < t_y
+        np.add(t_x, dt_x, out=t_x, where=step_x)
+        np.add(t_y, dt_y, out=t_y, where=~step_x)
+        c_x += s_x * step_x
+        c_y += s_y * ~step_x
+
+        g_x, g_y = c_x + x, c_y + y
+        inside = (c_x * c_x + c_y * c_y <= radius * radius) & (0 <= g_x) & (g_x < x_len) & (0 <= g_y) & (g_y < y_len)
+        flat = g_x[inside] * y_len + g_y[inside]
+        visible.extend(flat.tolist())
+
+        # Rays stop after leaving the radius or the grid, or once they have hit something.
+        going = inside.copy()
+        going[inside] = ~occupancy.reshape(-1)[flat]
+        if not going.all():
+            state = [a[going] for a in state]
+            if not state[0].size:
+                break
+
+
+def _naive_octant(occupancy: np.ndarray, x: int, y: int, radius: int, octant: int, visible: list[int]):
+    x_len, y_len = occupancy.shape
+    buffer = CellBuffer(2 * radius + 2)
+    # The edge cells of the radius square that fall in this octant.
+    edge = [(dx, dy) for dx in range(-radius, radius + 1) for dy in (-radius, radius)]
+    edge += [(dx, dy) for dx in (-radius, radius) for dy in range(-radius + 1, radius)]
+    for dx, dy in edge:
+        if octant not in _octants_containing(dx, dy):
+            continue
+        buffer.clear()
+        for c_x, c_y in raster_line(buffer, x, y, x + dx, y + dy).tolist()[1:]:
+            if not (0 <= c_x < x_len and 0 <= c_y < y_len) or not _in_radius(c_x - x, c_y - y, radius):
+                break
+            visible.append(c_x * y_len + c_y)
+            if occupancy[c_x, c_y]:
+                break
+
+
+def _full_mask(strategy):
+    def compute(occupancy: np.ndarray, origin: tuple[int, int], radius: int) -> np.ndarray:
+        occupancy = np.asarray(occupancy, dtype=bool)
+        visible = [origin[0] * occupancy.shape[1] + origin[1]]
+        for octant in range(8):
+            strategy(occupancy, origin[0], origin[1], radius, octant, visible)
+        mask = np.zeros(occupancy.shape, dtype=bool)
+        mask.reshape(-1)[visible] = True
+        return mask
+    compute.__doc__ = f"Every cell visible from origin within radius, using {strategy.__name__.strip('_')}."
+    return compute
+
+
+shadowcast = _full_mask(_shadowcast_octant)
+ray_fan = _full_mask(_fan_octant)
+naive_fov = _full_mask(_naive_octant)
+
+STRATEGIES = {
+    "shadowcast": _shadowcast_octant,
+    "fan": _fan_octant,
+    "naive": _naive_octant
+}
+
+
+class FieldOfView:
+    """
+    Cached fields of view over an occupancy grid that it owns.
+
+    Change the grid through `set_opaque` so the cache knows which octants went stale.
+    `compute` returns a read only mask that stays valid until the next change.
+    """
+
+    def __init__(self, occupancy: np.ndarray, strategy: str = "shadowcast", max_cached: int = 64):
+        self.occupancy: np.ndarray = np.array(occupancy, dtype=bool)
+        self.strategy: str = strategy
+        self.max_cached: int = max_cached
+        # (origin, radius, strategy) -> [per octant flat visible indices or None when stale, combined mask or None]
+        self._cache: dict[tuple[tuple[int, int], int, str], list] = {}
+        self.octants_computed: int = 0
+
+    def compute(self, origin: tuple[int, int], radius: int, strategy: str | None = None) -> np.ndarray:
+        strategy = strategy or self.strategy
+        origin = (int(origin[0]), int(origin[1]))
+        key = (origin, radius, strategy)
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            entry = [[None] * 8, None]
+            while len(self._cache) >= self.max_cached:
+                self._cache.pop(next(iter(self._cache)))
+        # Re-inserting keeps the dict in least recently used order.
+        self._cache[key] = entry
+
+        octants, mask = entry
+        if mask is not None:
+            return mask
+
+        cast = STRATEGIES[strategy]
+        for octant in range(8):
+            if octants[octant] is None:
+                visible = []
+                cast(self.occupancy, origin[0], origin[1], radius, octant, visible)
+                octants[octant] = np.array(visible, dtype=np.intp)
+                self.octants_computed += 1
+
+        mask = np.zeros(self.occupancy.shape, dtype=bool)
+        flat = mask.reshape(-1)
+        flat[origin[0] * self.occupancy.shape[1] + origin[1]] = True
+        for visible in octants:
+            flat[visible] = True
+        mask.flags.writeable = False
+        entry[1] = mask
+        return mask
+
+    def set_opaque(self, cells, opaque: bool = True):
+        """Change any number of (x, y) cells and drop only the cached octants they could affect."""
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        x_len, y_len = self.occupancy.shape
+        cells = cells[(0 <= cells[:, 0]) & (cells[:, 0] < x_len) & (0 <= cells[:, 1]) & (cells[:, 1] < y_len)]
+        changed = cells[self.occupancy[cells[:, 0], cells[:, 1]] != opaque]
+        if not changed.size:
+            return
+        self.occupancy[changed[:, 0], changed[:, 1]] = opaque
+
+        for (origin, radius, _), entry in self._cache.items():
+            offsets = changed - origin
+            near = np.abs(offsets).max(axis=1) <= radius
+            for dx, dy in offsets[near].tolist():
+                for octant in octants_of(dx, dy):
+                    if entry[0][octant] is not None:
+                        entry[0][octant] = None
+                        entry[1] = None
+
+    def reset(self, occupancy: np.ndarray | None = None):
+        if occupancy is not None:
+            self.occupancy = np.array(occupancy, dtype=bool)
+        else:
+            self.occupancy.fill(False)
+        self._cache.clear()
@@ -0,0 +1,83 @@
+"""
+Time the field of view strategies against the naive one line per edge cell approach.
+
+    python -m dda2d.fov_benchmark
+    python -m dda2d.fov_benchmark --size 512 --radii 16 64 --density 0.05
+
+For every radius each strategy computes the view from the same random origins. Then one
+cell near each origin is toggled and FieldOfView recomputes from its cache, which shows
+how much only redoing the touched octants saves. Every cached mask after an edit is also
+checked against a fresh compute, anything stale means an edit didn't drop an octant it should have.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+
+from dda2d.fov import FieldOfView, STRATEGIES, naive_fov
+
+
+def run(size: int, radius: int, density: float, origins: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    occupancy = rng.random((size, size)) < density
+    points = [tuple(int(v) for v in rng.integers(0, size, 2)) for _ in range(origins)]
+    # Every edit lands inside the radius of one of the origins so it always invalidates something.
+    edits = np.clip(np.array(points) + rng.integers(-radius, radius + 1, (origins, 2)), 0, size - 1)
+    # Plus some right along the axes, where the octants meet and wrap around.
+    axes = rng.integers(1, radius + 1, origins) * rng.choice((-1, 1), origins)
+    along = np.where(rng.random(origins) < 0.5, 0, 1)
+    axis_edits = np.array(points)
+    axis_edits[np.arange(origins), along] += axes
+    edits = np.concatenate((edits, np.clip(axis_edits, 0, size - 1)))
+
+    print(f"{size}x{size} radius {radius}:")
+    reference = [naive_fov(occupancy, point, radius) for point in points]
+    for name in STRATEGIES:
+        fov = FieldOfView(occupancy, name, max_cached=origins)
+
+        start = perf_counter()
+        masks = [fov.compute(point, radius) for point in points]
+        cold = (perf_counter() - start) / origins
+
+        # How much the visible cells overlap with the naive ones (intersection over union).
+        agreement = np.mean([(mask & ref).sum() / (mask | ref).sum() for mask, ref in zip(masks, reference)])
+
+        start = perf_counter()
+        for edit in edits:
+            fov.set_opaque(edit, not fov.occupancy[edit[0], edit[1]])
+            for point in points:
+                fov.compute(point, radius)
+        warm = (perf_counter() - start) / (origins * len(edits))
+
+        stale = count_stale(occupancy, name, points, edits, radius)
+        print(f"    {name:>10}: {cold * 1e3:8.2f}ms cold  {warm * 1e3:8.3f}ms after an edit  {agreement:6.1%} overlap with naive"
+              f"  {stale} stale")
+
+
+def count_stale(occupancy: np.ndarray, strategy: str, points, edits, radius: int) -> int:
+    """Toggle each edit and count the cached masks that differ from computing them from scratch."""
+    fov = FieldOfView(occupancy.copy(), strategy, max_cached=len(points))
+    stale = 0
+    for edit in edits:
+        for point in points:
+            fov.compute(point, radius)
+        fov.set_opaque(edit, not fov.occupancy[edit[0], edit[1]])
+        fresh = FieldOfView(fov.occupancy.copy(), strategy)
+        stale += sum(not np.array_equal(fov.compute(point, radius), fresh.compute(point, radius)) for point in points)
+    return stale
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--radii", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--density", type=float, default=0.08, help="fraction of cells that are opaque")
+    parser.add_argument("--origins", type=int, default=16)
+    args = parser.parse_args()
+
+    for radius in args.radii:
+        run(args.size, radius, args.density, args.origins)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,14 @@
 from itertools import cycle
 import arcade
+import numpy as np
 from pyglet.math import Vec2
 
 from animator.lerp import ease_linear
 from common.util import clamp
-from common.util.procedural_animator import ProceduralAnimator, SecondOrderAnimatorBase
-from common.util.duration_tracker import perf_timed
+from common.util.animator_bank import AnimatorBank
+from common.util.duration_tracker import perf_timed, perf_zone
 from dda2d.dda import PointList, snap
+from dda2d.render import GridRenderer
 
 
 class Grid:
@@ -27,35 +29,23 @@ class Grid:
                                   arcade.color.WHITE))
         self.color = next(self.color_cycle)
 
-        # Create 2D animator array
-        self.animators: list[list[SecondOrderAnimatorBase]] = []
-        for x in range(self.x_len):
-            li = []
-            for y in range(self.y_len):
-                p = ProceduralAnimator(1.0, 0.75, 1.0, 0.0, 0.0, 0.0)
-                li.append(p)
-            self.animators.append(li)
-
-        # Create 2D sprite array and spritelist
-        self.sprite_list = arcade.SpriteList()
-        self.sprites = []
-        for x in range(self.x_len):
-            li = []
-            for y in range(self.y_len):
-                p = self.index_to_point((x, y))
-                s = arcade.SpriteSolidColor(self.tile_size, self.tile_size, p.x, p.y, self.color)
-                li.append(s)
-                self.sprite_list.append(s)
-                s.scale = 0
-            self.sprites.append(li)
+        # Create 2D animator bank
+        self.animators: AnimatorBank = AnimatorBank((self.x_len, self.y_len), 1.0, 0.75, 1.0, 0.0, 0.0, 0.0)
+
+        # Every cell's scale and colour live in one instanced buffer
+        self.renderer = GridRenderer(self.x_len, self.y_len, self.tile_size, self.x_offset, self.y_offset)
+        self.renderer.set_colour(self.color)
 
         # Create 2D scale array
-        self.scales = []
-        for x in range(self.x_len):
-            li = []
-            for y in range(self.y_len):
-                li.append(0)
-            self.scales.append(li)
+        self.scales: np.ndarray = np.zeros((self.x_len, self.y_len))
+
+        # Only cells whose target changed, or who are still animating towards it, get updated.
+        # The active cells are flat indices, and the mask stops them being added twice.
+        self.active: np.ndarray = np.empty(0, dtype=np.intp)
+        self._active_mask: np.ndarray = np.zeros(self.x_len * self.y_len, dtype=bool)
+        # Flat indices of every cell currently targeting a scale of 1.
+        self._lit: np.ndarray = np.empty(0, dtype=np.intp)
+        self.settle_epsilon: float = 1e-3
 
         # Pulse
         self.local_time = 0.0
@@ -72,9 +62,7 @@ class Grid:
 
     def next_color(self):
         self.color = next(self.color_cycle)
-        for x in range(self.x_len):
-            for y in range(self.y_len):
-                self.sprites[x][y].color = self.color
+        self.renderer.set_colour(self.color)
 
     def pulse(self, point: Vec2):
         self.pulse_sprite.position = self.snap(point)
@@ -82,18 +70,10 @@ class Grid:
 
     @perf_timed
     def draw(self, color=arcade.color.WHITE, line_width = 1):
-        cur_x = self.x_offset
-        cur_y = self.y_offset
-
-        self.sprite_list.draw()
-
-        for x in range(int(self.x_size / self.tile_size) + 1):
-            arcade.draw_line(cur_x, self.y_offset, cur_x, self.max_y, color, line_width)
-            cur_x += self.tile_size
-
-        for y in range(int(self.y_size / self.tile_size) + 1):
-            arcade.draw_line(self.x_offset, cur_y, self.max_x, cur_y, color, line_width)
-            cur_y += self.tile_size
+        self.renderer.draw_cells()
+        # Past a point the lines would cover the cells entirely
+        if self.tile_size > 2 * line_width:
+            self.renderer.draw_lines(color, line_width)
 
         arcade.draw.draw_sprite(self.pulse_sprite)
 
@@ -108,21 +88,53 @@ class Grid:
             color
         )
 
+    def activate(self, cells: np.ndarray):
+        """Mark flat cell indices as needing updates until they settle again."""
+        cells = cells[~self._active_mask[cells]]
+        if cells.size:
+            cells = np.unique(cells)
+            self._active_mask[cells] = True
+            self.active = np.concatenate((self.active, cells))
+
     @perf_timed
     def draw_point(self, point: tuple[int, int]):
-        try:
-            self.sprites[point[0]][point[1]]
-        except IndexError:
+        if not (0 <= point[0] < self.x_len and 0 <= point[1] < self.y_len):
             return
-        self.scales[point[0]][point[1]] = 1
+        if self.scales[point[0]][point[1]] != 1:
+            self.scales[point[0]][point[1]] = 1
+            cell = np.array((point[0] * self.y_len + point[1],), dtype=np.intp)
+            self._lit = np.concatenate((self._lit, cell))
+            self.activate(cell)
 
     @perf_timed
     def draw_point_list(self, point_list: PointList):
-        for x in range(self.x_len):
-            for y in range(self.y_len):
-                self.scales[x][y] = 0
-        for p in point_list:
-            self.draw_point(p)
+        self.draw_cells(np.array(list(point_list), dtype=np.intp).reshape(-1, 2))
+
+    @perf_timed
+    def draw_cells(self, *cells: np.ndarray):
+        """
+        Light exactly the cells in the (n, 2) index arrays (such as a CellBuffer's view) and turn off
+        the rest. Only the cells that were or are lit are touched, never the whole grid.
+        """
+        lit = [np.empty(0, dtype=np.intp)]
+        for block in cells:
+            inside = (0 <= block[:, 0]) & (block[:, 0] < self.x_len) & (0 <= block[:, 1]) & (block[:, 1] < self.y_len)
+            lit.append(block[inside, 0].astype(np.intp) * self.y_len + block[inside, 1])
+        lit = np.concatenate(lit)
+
+        targets = self.scales.reshape(-1)
+        was_off = targets[lit] == 0.0
+        targets[self._lit] = 0.0
+        targets[lit] = 1.0
+        turned_off = self._lit[targets[self._lit] == 0.0]
+
+        self.activate(lit[was_off])
+        self.activate(turned_off)
+        self._lit = lit
+
+    def draw_mask(self, mask: np.ndarray, *cells: np.ndarray):
+        """Light every cell set in an (x_len, y_len) bool mask, like a field of view, plus any index arrays."""
+        self.draw_cells(np.argwhere(mask), *cells)
 
     def snap(self, point: Vec2) -> Vec2:
         point = Vec2(clamp(self.x_offset + self.tile_size / 2, point.x, self.max_x - self.tile_size / 2),
@@ -143,10 +155,24 @@ class Grid:
     def update(self, delta_time: float):
         self.local_time += delta_time
 
-        for x in range(self.x_len):
-            for y in range(self.y_len):
-                anim = self.animators[x][y]
-                self.sprites[x][y].scale = anim.update(delta_time, self.scales[x][y])
+        if self.active.size:
+            active = self.active
+            targets = self.scales.reshape(-1)[active]
+            with perf_zone("AnimatorBank.update"):
+                scales = self.animators.update_at(delta_time, active, targets)
+
+            self.renderer.scales[active] = scales
+            self.renderer.dirty = True
+
+            # Retire cells that have arrived, snapping them exactly onto their target.
+            settled = (np.abs(scales - targets) < self.settle_epsilon) & (np.abs(self.animators.dy.reshape(-1)[active]) < self.settle_epsilon)
+            if settled.any():
+                done = active[settled]
+                self.animators.y.reshape(-1)[done] = targets[settled]
+                self.animators.dy.reshape(-1)[done] = 0.0
+                self.renderer.scales[done] = targets[settled]
+                self._active_mask[done] = False
+                self.active = active[~settled]
 
         pulse_scale = ease_linear(1, 2, self.last_pulse_time, self.last_pulse_time + 0.5, self.local_time)
         pulse_alpha = ease_linear(255, 0, self.last_pulse_time, self.last_pulse_time + 0.5, self.local_time)
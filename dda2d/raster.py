@@ -0,0 +1,138 @@
+"""
+Integer line rasterisation straight into a reusable numpy buffer of cell indices.
+
+Lines go from cell center to cell center. Every mode is worked out per column of the
+line's major axis, each column covers a run of cells along the minor axis:
+
+- line: the classic Bresenham cell, exactly one per column.
+- supercover: every cell the line touches, including both cells when it passes exactly through a corner.
+- width: widens every column so the line is roughly `width` cells thick perpendicular to it.
+
+All of it is whole array integer math, so rasterising a line costs a handful of numpy calls
+no matter how long it is, and many segments can be done together with `raster_lines`.
+"""
+import numpy as np
+
+__all__ = (
+    "CellBuffer",
+    "raster_line",
+    "raster_lines",
+    "raster_polyline"
+)
+
+
+class CellBuffer:
+    """
+    A growable (n, 2) int32 array of (x, y) cell indices.
+
+    The rasterisers append to the end of it, and `clear` only resets the count so the
+    same memory gets reused every frame. It only reallocates when it needs to grow.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.cells: np.ndarray = np.empty((capacity, 2), dtype=np.int32)
+        self.count: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def view(self) -> np.ndarray:
+        """The filled part of the buffer, only valid until the next append or clear."""
+        return self.cells[:self.count]
+
+    def clear(self):
+        self.count = 0
+
+    def reserve(self, extra: int) -> np.ndarray:
+        """Make room for `extra` more cells and return the slice they go in."""
+        needed = self.count + extra
+        if needed > self.cells.shape[0]:
+            capacity = max(needed, 2 * self.cells.shape[0])
+            cells = np.empty((capacity, 2), dtype=np.int32)
+            cells[:self.count] = self.cells[:self.count]
+            self.cells = cells
+        start = self.count
+        self.count = needed
+        return self.cells[start:needed]
+
+    def extend(self, cells: np.ndarray):
+        self.reserve(cells.shape[0])[:] = cells
+
+
+def raster_line(buffer: CellBuffer, x0: int, y0: int, x1: int, y1: int,
+                supercover: bool = False, width: float = 1.0) -> np.ndarray:
+    """Append the cells of one line to the buffer and return the slice they were written to."""
+    return raster_lines(buffer, np.array(((x0, y0, x1, y1),)), supercover, width)
+
+
+def raster_polyline(buffer: CellBuffer, points, supercover: bool = False, width: float = 1.0) -> np.ndarray:
+    """Append the cells of a line through every point in order, the shared corners are only written once."""
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    if points.shape[0] == 1:
+        return raster_lines(buffer, np.concatenate((points, points), axis=1), supercover, width)
+    segments = np.concatenate((points[:-1], points[1:]), axis=1)
+    return raster_lines(buffer, segments, supercover, width, skip_joins=True)
+
+
+def raster_lines(buffer: CellBuffer, segments, supercover: bool = False, width: float = 1.0,
+                 skip_joins: bool = False) -> np.ndarray:
+    """
+    Append the cells of every (x0, y0, x1, y1) segment to the buffer, one segment after another.
+
+    :param skip_joins: leave out the first column of every segment after the first, for segments
+                       that start where the previous one ended.
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x0, y0, x1, y1 = segments.T
+    dx = x1 - x0
+    dy = y1 - y0
+    steep = np.abs(dy) > np.abs(dx)
+    major = np.where(steep, np.abs(dy), np.abs(dx))
+    minor = np.where(steep, np.abs(dx), np.abs(dy))
+
+    # One entry per column of every segment.
+    first = np.zeros(segments.shape[0], dtype=np.int64)
+    if skip_joins:
+        first[1:] = 1
+    columns = np.maximum(major + 1 - first, 0)
+    seg = np.repeat(np.arange(segments.shape[0]), columns)
+    column = np.arange(seg.size) - np.repeat(np.cumsum(columns) - columns, columns) + first[seg]
+
+    seg_major = major[seg]
+    seg_minor = minor[seg]
+    flat = seg_major == 0
+    span = np.where(flat, 1, 2 * seg_major)
+    if supercover:
+        # The minor extent of the line inside the column, scaled by 2 * major so it stays integer,
+        # then every row whose cell overlaps it (touching counts).
+        low = np.maximum((2 * column - 1) * seg_minor, 0)
+        high = np.minimum((2 * column + 1) * seg_minor, 2 * seg_major * seg_minor)
+        lo = -((seg_major - low) // span)
+        hi = (high + seg_major) // span
+    else:
+        lo = hi = (2 * column * seg_minor + seg_major) // span
+
+    if width > 1.0:
+        # A column of a line at an angle has to be longer than `width` to be that thick across it.
+        length = np.hypot(dx, dy)
+        stretch = np.where(major == 0, 1.0, length / np.maximum(major, 1))
+        half = np.rint((width * stretch - 1.0) / 2.0).astype(np.int64)[seg]
+        lo = lo - half
+        hi = hi + half
+
+    counts = hi - lo + 1
+    if width <= 1.0 and not supercover:
+        cell_seg, cell_major, cell_minor = seg, column, lo
+    else:
+        cell_seg = np.repeat(seg, counts)
+        cell_major = np.repeat(column, counts)
+        cell_minor = np.repeat(lo, counts) + (np.arange(cell_seg.size) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    cell_steep = steep[cell_seg]
+    s_x = np.where(dx >= 0, 1, -1)[cell_seg]
+    s_y = np.where(dy >= 0, 1, -1)[cell_seg]
+    out = buffer.reserve(cell_seg.size)
+    out[:, 0] = x0[cell_seg] + s_x * np.where(cell_steep, cell_minor, cell_major)
+    out[:, 1] = y0[cell_seg] + s_y * np.where(cell_steep, cell_major, cell_minor)
+    return out
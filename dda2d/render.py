@@ -0,0 +1,87 @@
+from array import array
+
+import numpy as np
+from arcade import get_window
+import arcade.gl as gl
+
+from common.data_loading import make_package_string_loader
+import dda2d.data as data
+
+get_shader = make_package_string_loader(data, 'glsl')
+
+
+class GridRenderer:
+    """
+    Draw every cell of a grid as one instanced quad and all of the grid lines with one shader pass.
+
+    Each cell is a scale and an RGBA colour (0.0 - 1.0) in a single float32 array, in x major order
+    like the rest of the grid's flat indices. Write into `scales` or `colours` and the whole array
+    is uploaded once on the next draw. The cell positions come from the instance id so they never
+    need uploading at all.
+    """
+
+    def __init__(self, x_len: int, y_len: int, tile_size: float, x_offset: float, y_offset: float):
+        self.ctx = ctx = get_window().ctx
+        self.x_len = x_len
+        self.y_len = y_len
+        self.tile_size = tile_size
+        self.origin = (x_offset, y_offset)
+
+        self.instances: np.ndarray = np.zeros((x_len * y_len, 5), dtype=np.float32)
+        self.scales: np.ndarray = self.instances[:, 0]
+        self.colours: np.ndarray = self.instances[:, 1:]
+        self.dirty: bool = True
+
+        self._instance_buffer = ctx.buffer(reserve=self.instances.nbytes)
+        quad = ctx.buffer(data=array('f', (-0.5, -0.5, 0.5, -0.5, -0.5, 0.5, 0.5, 0.5)))
+        self._cells = ctx.geometry(
+            [
+                gl.BufferDescription(quad, '2f', ['in_pos']),
+                gl.BufferDescription(self._instance_buffer, '1f 4f', ['in_scale', 'in_colour'], instanced=True)
+            ],
+            mode=ctx.TRIANGLE_STRIP
+        )
+        self._cell_program = ctx.program(
+            vertex_shader=get_shader('cell_vs'),
+            fragment_shader=get_shader('cell_fs')
+        )
+        self._cell_program['origin'] = self.origin
+        self._cell_program['tile_size'] = tile_size
+        self._cell_program['y_len'] = y_len
+
+        # One quad over the whole grid (plus a little for the outer lines), the fragment shader finds the lines.
+        width, height = x_len * tile_size, y_len * tile_size
+        self._line_pad = tile_size / 2.0
+        self._lines = gl.geometry.quad_2d(
+            size=(width + 2 * self._line_pad, height + 2 * self._line_pad),
+            pos=(x_offset + width / 2.0, y_offset + height / 2.0)
+        )
+        self._line_program = ctx.program(
+            vertex_shader=get_shader('lines_vs'),
+            fragment_shader=get_shader('lines_fs')
+        )
+        self._line_program['origin'] = self.origin
+        self._line_program['size'] = width, height
+        self._line_program['tile_size'] = tile_size
+
+    def set_colour(self, colour, where=slice(None)):
+        """Set the colour of cells from a 0 - 255 RGB(A) colour."""
+        colour = tuple(colour)
+        if len(colour) == 3:
+            colour = colour + (255,)
+        self.colours[where] = np.array(colour, dtype=np.float32) / 255.0
+        self.dirty = True
+
+    def draw_cells(self):
+        if self.dirty:
+            self._instance_buffer.write(self.instances)
+            self.dirty = False
+        self._cells.render(self._cell_program, instances=self.x_len * self.y_len)
+
+    def draw_lines(self, colour=(255, 255, 255, 255), line_width: float = 1.0):
+        colour = tuple(colour)
+        if len(colour) == 3:
+            colour = colour + (255,)
+        self._line_program['line_colour'] = tuple(c / 255.0 for c in colour)
+        self._line_program['line_width'] = line_width
+        self._lines.render(self._line_program)
@@ -1,12 +1,14 @@
 import arcade
+import numpy as np
 from pyglet.math import Vec2
 
 from animator.lerp import ease_linear
-from dda2d.dda import dda
+from dda2d.fov import FieldOfView
 from dda2d.grid import Grid
+from dda2d.raster import CellBuffer, raster_line
 from common.util import clamp, load_shared_sound
 from common.data_loading import make_package_path_finder
-# from common.util.duration_tracker import PERF_TRACKER, perf_timed
+from common.util.duration_tracker import PERF_TRACKER, perf_timed
 
 import dda2d.data.sounds as sounds
 
@@ -15,16 +17,17 @@ get_sounds_path = make_package_path_finder(sounds, "wav")
 GRID_X_SIZE = 525
 GRID_Y_SIZE = 525
 GRID_TILE_SIZE = 25
+FOV_RADIUS = 6
 
 
 class Application(arcade.Window):
-    def __init__(self):
+    def __init__(self, grid_size: tuple[int, int] = (GRID_X_SIZE, GRID_Y_SIZE), tile_size: int = GRID_TILE_SIZE):
         super().__init__(1280, 720, "DDA 2D")
         self.started = False
         self.local_time = 0.0
 
-        self.grid = Grid(GRID_X_SIZE, GRID_Y_SIZE, GRID_TILE_SIZE,
-                         (self.width - GRID_X_SIZE) / 2, (self.height - GRID_Y_SIZE) / 2 - 50)
+        self.grid = Grid(grid_size[0], grid_size[1], tile_size,
+                         (self.width - grid_size[0]) / 2, (self.height - grid_size[1]) / 2 - 50)
 
         text_center_y = self.height - ((self.height - self.grid.max_y) / 2)
         self.text = arcade.Text("[LMB] to draw, [MMB] to change color, [RMB] to clear",
@@ -37,10 +40,16 @@ class Application(arcade.Window):
         self.cursor = Vec2(-100, -100)
         self.start_point = Vec2(-100, -100)
         self.end_point = Vec2(-100, -100)
-        self.point_list = set()
-        self.all_points = set()
+        # The line being drawn and every line drawn so far, as grid indices.
+        self.line_cells = CellBuffer()
+        self.drawn_cells = CellBuffer()
+        self.line_ends: tuple[tuple[int, int], tuple[int, int]] | None = None
         self.drawing = False
 
+        # [F] shows what the cursor can see, with every drawn line acting as a wall.
+        self.fov = FieldOfView(np.zeros((self.grid.x_len, self.grid.y_len), dtype=bool))
+        self.show_fov = False
+
         self.first_click: float = None
         self.fade_time = 1.0
 
@@ -66,11 +75,13 @@ class Application(arcade.Window):
         if self.started:
             self.cursor = Vec2(x, y)
             if self.drawing:
-                old_point_list = self.point_list
+                old_line_ends = self.line_ends
                 self.end_point = Vec2(x, y)
-                self.point_list = set(self.grid.point_to_index(p) for p in dda(self.grid.snap(self.start_point), self.grid.snap(self.end_point)))
+                self.line_ends = (self.grid.point_to_index(self.start_point), self.grid.point_to_index(self.end_point))
+                self.line_cells.clear()
+                raster_line(self.line_cells, *self.line_ends[0], *self.line_ends[1])
 
-                if old_point_list != self.point_list and self.last_played_sound + self.sounds["blip_e"].get_length() / 2 <= self.local_time:
+                if old_line_ends != self.line_ends and self.last_played_sound + self.sounds["blip_e"].get_length() / 2 <= self.local_time:
                     self.play_sound("blip_e")
                     self.last_played_sound = self.local_time
 
@@ -85,25 +96,44 @@ class Application(arcade.Window):
         if button == arcade.MOUSE_BUTTON_MIDDLE:
             self.grid.next_color()
         if button == arcade.MOUSE_BUTTON_RIGHT:
-            self.point_list = set()
-            self.all_points = set()
+            self.line_cells.clear()
+            self.drawn_cells.clear()
+            self.line_ends = None
+            self.fov.reset()
             self.play_sound("blip_c")
 
     def on_mouse_release(self, x: int, y: int, button: int, modifiers: int):
         if button == arcade.MOUSE_BUTTON_LEFT:
             self.drawing = False
             self.end_point = Vec2(x, y)
-            self.point_list = set()
-            self.all_points |= set(self.grid.point_to_index(p) for p in dda(self.grid.snap(self.start_point), self.grid.snap(self.end_point)))
+            self.line_cells.clear()
+            self.line_ends = None
+            start, end = self.grid.point_to_index(self.start_point), self.grid.point_to_index(self.end_point)
+            self.fov.set_opaque(raster_line(self.drawn_cells, *start, *end))
+
+    def on_key_press(self, symbol: int, modifiers: int):
+        if symbol == arcade.key.F:
+            self.show_fov = not self.show_fov
 
+    @perf_timed
     def on_draw(self):
         self.clear()
         self.grid.draw()
-        self.grid.draw_point_list(self.all_points | self.point_list)
+        if self.show_fov:
+            visible = self.fov.compute(self.grid.point_to_index(self.cursor), FOV_RADIUS)
+            self.grid.draw_mask(visible, self.line_cells.view)
+        else:
+            self.grid.draw_cells(self.drawn_cells.view, self.line_cells.view)
         self.grid.draw_cursor(self.cursor)
         self.text.draw()
 
     def on_update(self, delta_time: float):
+        # The frame starts before any zone is open, so each zone's time lands in the frame it was spent in.
+        PERF_TRACKER.next_frame()
+        self.update(delta_time)
+
+    @perf_timed
+    def update(self, delta_time: float):
         self.local_time += delta_time
 
         if self.local_time <= self.fade_time:
@@ -0,0 +1,81 @@
+"""
+Compare the flat dda_hit against BrickMap.trace on large sparse grids.
+
+    python -m dda3d.brick_benchmark                  # 256^3 and 1024^3
+    python -m dda3d.brick_benchmark --sizes 512 --rays 5000
+
+Both traversals get the same scene and rays, the results are checked against
+each other and the mean cells visited and rays per second are printed.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+
+from dda3d.dda import dda_hit
+from dda3d.brickmap import BrickMap
+
+
+def make_scene(size: int, boxes: int, seed: int = 0) -> BrickMap:
+    """A floor one cell thick and a scattering of boxes, mostly empty space like a real scene."""
+    bricks = BrickMap((size, size, size))
+    bricks.fill_box((0, 0, 0), (size, size, 1))
+
+    rng = np.random.default_rng(seed)
+    for _ in range(boxes):
+        lo = rng.integers(0, size, 3)
+        hi = lo + rng.integers(1, max(2, size // 32), 3)
+        bricks.fill_box(tuple(int(v) for v in lo), tuple(int(v) for v in hi))
+    return bricks
+
+
+def make_rays(size: int, count: int, seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    origins = rng.random((count, 3)) * size
+    directions = rng.normal(size=(count, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    return origins, directions
+
+
+def run(size: int, rays: int, boxes: int):
+    start = perf_counter()
+    bricks = make_scene(size, boxes)
+    print(f"{size}^3: built with {boxes} boxes in {perf_counter() - start:.2f}s")
+
+    origins, directions = make_rays(size, rays)
+    # Python floats keep numpy scalar overhead out of both traversals.
+    origins, directions = origins.tolist(), directions.tolist()
+
+    start = perf_counter()
+    flat = [dda_hit(*o, *d, bricks.cells) for o, d in zip(origins, directions)]
+    flat_time = perf_counter() - start
+
+    start = perf_counter()
+    tiered = [bricks.trace(*o, *d) for o, d in zip(origins, directions)]
+    tiered_time = perf_counter() - start
+
+    mismatched = sum(
+        a.hit != b.hit or (a.hit and (a.x, a.y, a.z) != (b.x, b.y, b.z))
+        for a, b in zip(flat, tiered)
+    )
+    hits = sum(a.hit for a in flat)
+
+    print(f"    flat:     {sum(a.steps for a in flat) / rays:8.1f} cells/ray  {rays / flat_time:10.0f} rays/s")
+    print(f"    brickmap: {sum(b.steps for b in tiered) / rays:8.1f} cells/ray  {rays / tiered_time:10.0f} rays/s")
+    print(f"    {hits}/{rays} rays hit, {mismatched} results differ")
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024], help="grid sides, multiples of 64")
+    parser.add_argument("--rays", type=int, default=2000)
+    parser.add_argument("--boxes", type=int, default=None, help="defaults to scale with the grid area")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        boxes = args.boxes if args.boxes is not None else max(16, (size // 64) ** 2 * 4)
+        run(size, args.rays, boxes)
+
+
+if __name__ == '__main__':
+    main()
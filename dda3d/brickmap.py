@@ -0,0 +1,231 @@
+from math import floor
+
+import numpy as np
+
+from dda3d.dda import DDAHit, VoxelBits
+
+# How many bits are set in each byte, so a brick's solid count is a lookup and a sum.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class BrickMap:
+    """
+    A voxel grid with coarser occupancy levels on top so rays can skip empty space.
+
+    Level 0 is the cells themselves packed as VoxelBits. Each level above counts the solid
+    cells inside every brick of `brick`^3 cells of the level below, so a level 2 brick covers
+    512^3 cells with the default of 8. Traversal walks the top level and only drops a level
+    inside bricks that have something in them.
+
+    Edits keep the counts up to date by only recounting the bricks they touch.
+    Every side of the grid has to be a multiple of `brick ** (levels - 1)`, and `brick` has
+    to be a multiple of 8 so a brick row is whole bytes.
+    """
+
+    def __init__(self, size: tuple[int, int, int], brick: int = 8, levels: int = 3):
+        if brick % 8:
+            raise ValueError(f"brick size has to be a multiple of 8, not {brick}")
+        if levels < 2:
+            raise ValueError("a brick map needs at least 2 levels")
+        top = brick ** (levels - 1)
+        if any(side % top for side in size):
+            raise ValueError(f"every side of {size} has to be a multiple of {top}")
+
+        self.size: tuple[int, int, int] = size
+        self.brick: int = brick
+        self.levels: int = levels
+        self.cells: VoxelBits = VoxelBits(size)
+        self._steps: int = 0
+
+        # counts[0] is unused so the list lines up with the level numbers.
+        self.counts: list[np.ndarray | None] = [None]
+        # One byte per brick, non zero if anything in it is solid. Traversal reads these
+        # instead of the counts because indexing a bytearray is much cheaper than numpy.
+        self.flags: list[bytearray | None] = [None]
+        self.shapes: list[tuple[int, int, int]] = [size]
+        for level in range(1, levels):
+            shape = tuple(side // brick ** level for side in size)
+            self.shapes.append(shape)
+            self.counts.append(np.zeros(shape, dtype=np.uint32))
+            self.flags.append(bytearray(shape[0] * shape[1] * shape[2]))
+
+    @classmethod
+    def from_array(cls, occupancy, brick: int = 8, levels: int = 3) -> "BrickMap":
+        occupancy = np.asarray(occupancy, dtype=bool)
+        bricks = cls(occupancy.shape, brick, levels)
+        bricks.cells = VoxelBits.from_array(occupancy)
+        bricks._recount((0, 0, 0), occupancy.shape)
+        return bricks
+
+    def _byte_view(self) -> np.ndarray:
+        x, y, z = self.size
+        return np.frombuffer(self.cells.bits, dtype=np.uint8).reshape(x, y, z // 8)
+
+    def _recount(self, lo: tuple[int, int, int], hi: tuple[int, int, int]):
+        """Recount every brick on every level that overlaps the cells from lo to hi."""
+        brick = self.brick
+        lo = tuple(side // brick for side in lo)
+        hi = tuple(-(-side // brick) for side in hi)
+
+        x0, y0, z0 = (side * brick for side in lo)
+        x1, y1, z1 = (side * brick for side in hi)
+        block = _POPCOUNT[self._byte_view()[x0:x1, y0:y1, z0 // 8:z1 // 8]]
+        counts = block.reshape(
+            hi[0] - lo[0], brick, hi[1] - lo[1], brick, hi[2] - lo[2], brick // 8
+        ).sum(axis=(1, 3, 5), dtype=np.uint32)
+
+        for level in range(1, self.levels):
+            region = tuple(slice(l, h) for l, h in zip(lo, hi))
+            self.counts[level][region] = counts
+            flags = np.frombuffer(self.flags[level], dtype=np.uint8).reshape(self.shapes[level])
+            flags[region] = counts > 0
+
+            if level + 1 < self.levels:
+                lo = tuple(side // brick for side in lo)
+                hi = tuple(-(-side // brick) for side in hi)
+                counts = self.counts[level][
+                    lo[0] * brick:hi[0] * brick, lo[1] * brick:hi[1] * brick, lo[2] * brick:hi[2] * brick
+                ].reshape(
+                    hi[0] - lo[0], brick, hi[1] - lo[1], brick, hi[2] - lo[2], brick
+                ).sum(axis=(1, 3, 5), dtype=np.uint32)
+
+    def __getitem__(self, cell: tuple[int, int, int]) -> bool:
+        return self.cells[cell]
+
+    def __setitem__(self, cell: tuple[int, int, int], solid: bool):
+        solid = bool(solid)
+        if self.cells[cell] == solid:
+            return
+        self.cells[cell] = solid
+
+        change = 1 if solid else -1
+        x, y, z = cell
+        for level in range(1, self.levels):
+            x, y, z = x // self.brick, y // self.brick, z // self.brick
+            count = int(self.counts[level][x, y, z]) + change
+            self.counts[level][x, y, z] = count
+            _, ny, nz = self.shapes[level]
+            self.flags[level][(x * ny + y) * nz + z] = count > 0
+
+    def fill_box(self, lo: tuple[int, int, int], hi: tuple[int, int, int], solid: bool = True):
+        """Set every cell from lo up to (but not including) hi, then recount the bricks it touched."""
+        lo = tuple(max(0, side) for side in lo)
+        hi = tuple(min(limit, side) for limit, side in zip(self.size, hi))
+        if any(h <= l for l, h in zip(lo, hi)):
+            return
+
+        (x0, y0, z0), (x1, y1, z1) = lo, hi
+        b0, b1 = z0 // 8, -(-z1 // 8)
+        view = self._byte_view()
+        bits = np.unpackbits(view[x0:x1, y0:y1, b0:b1], axis=-1, bitorder='little')
+        bits[:, :, z0 - b0 * 8:z1 - b0 * 8] = solid
+        view[x0:x1, y0:y1, b0:b1] = np.packbits(bits, axis=-1, bitorder='little')
+        self._recount(lo, hi)
+
+    def to_array(self) -> np.ndarray:
+        return self.cells.to_array()
+
+    def trace(self, x: float, y: float, z: float, d_x: float, d_y: float, d_z: float) -> DDAHit:
+        """
+        Find the first solid cell along a ray, like dda_hit but skipping empty bricks.
+
+        The origin can be outside the grid. `steps` counts the cells visited on every level,
+        so it is comparable with the steps of a flat dda_hit.
+        """
+        # Clip to the grid so rays can start anywhere.
+        t_enter, t_exit, axis = 0.0, float('inf'), -1
+        for a, (o, d, side) in enumerate(zip((x, y, z), (d_x, d_y, d_z), self.size)):
+            if d == 0.0:
+                if not 0.0 <= o < side:
+                    return DDAHit(False, -1, -1, -1, float('inf'), 0, 0, 0, 0)
+                continue
+            t0, t1 = -o / d, (side - o) / d
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > t_enter:
+                t_enter, axis = t0, a
+            t_exit = min(t_exit, t1)
+        if t_enter >= t_exit:
+            return DDAHit(False, -1, -1, -1, float('inf'), 0, 0, 0, 0)
+
+        self._steps = 0
+        top = self.levels - 1
+        found = self._walk(top, (0, 0, 0), self.shapes[top], (x, y, z), (d_x, d_y, d_z), t_enter, axis)
+        if found is None:
+            return DDAHit(False, -1, -1, -1, float('inf'), 0, 0, 0, self._steps)
+
+        c_x, c_y, c_z, t, axis = found
+        s = (1 if d_x >= 0.0 else -1, 1 if d_y >= 0.0 else -1, 1 if d_z >= 0.0 else -1)
+        n = [0, 0, 0]
+        if axis >= 0:
+            n[axis] = -s[axis]
+        return DDAHit(True, c_x, c_y, c_z, t, n[0], n[1], n[2], self._steps)
+
+    def _walk(self, level: int, lo: tuple[int, int, int], hi: tuple[int, int, int],
+              o: tuple[float, float, float], d: tuple[float, float, float], t: float, axis: int):
+        """
+        DDA over one level inside the box lo to hi (in that level's cells), starting at t.
+        Returns the hit cell, t, and entry axis, or None if the ray left the box.
+        """
+        x, y, z = o
+        d_x, d_y, d_z = d
+        scale = self.brick ** level
+        _, n_y, n_z = self.shapes[level]
+        flags = self.cells.bits if level == 0 else self.flags[level]
+
+        # Where the ray is at t, clamped into the box so rounding on a face can't put us outside it.
+        lo_x, lo_y, lo_z = lo
+        hi_x, hi_y, hi_z = hi
+        i_x = min(max(int(floor((x + d_x * t) / scale)), lo_x), hi_x - 1)
+        i_y = min(max(int(floor((y + d_y * t) / scale)), lo_y), hi_y - 1)
+        i_z = min(max(int(floor((z + d_z * t) / scale)), lo_z), hi_z - 1)
+
+        s_x = 1 if d_x >= 0.0 else -1
+        s_y = 1 if d_y >= 0.0 else -1
+        s_z = 1 if d_z >= 0.0 else -1
+
+        dt_x = float('inf') if d_x == 0 else scale / abs(d_x)
+        dt_y = float('inf') if d_y == 0 else scale / abs(d_y)
+        dt_z = float('inf') if d_z == 0 else scale / abs(d_z)
+
+        t_x = float('inf') if d_x == 0 else ((i_x + (s_x > 0)) * scale - x) / d_x
+        t_y = float('inf') if d_y == 0 else ((i_y + (s_y > 0)) * scale - y) / d_y
+        t_z = float('inf') if d_z == 0 else ((i_z + (s_z > 0)) * scale - z) / d_z
+
+        while True:
+            self._steps += 1
+            i = (i_x * n_y + i_y) * n_z + i_z
+            if level == 0:
+                if flags[i >> 3] >> (i & 7) & 1:
+                    return i_x, i_y, i_z, t, axis
+            elif flags[i]:
+                brick = self.brick
+                found = self._walk(
+                    level - 1,
+                    (i_x * brick, i_y * brick, i_z * brick), ((i_x + 1) * brick, (i_y + 1) * brick, (i_z + 1) * brick),
+                    o, d, t, axis
+                )
+                if found is not None:
+                    return found
+
+            if t_x < t_y and t_x < t_z:
+                t = t_x
+                t_x += dt_x
+                i_x += s_x
+                axis = 0
+                if not lo_x <= i_x < hi_x:
+                    return None
+            elif t_y < t_x and t_y < t_z:
+                t = t_y
+                t_y += dt_y
+                i_y += s_y
+                axis = 1
+                if not lo_y <= i_y < hi_y:
+                    return None
+            else:
+                t = t_z
+                t_z += dt_z
+                i_z += s_z
+                axis = 2
+                if not lo_z <= i_z < hi_z:
+                    return None
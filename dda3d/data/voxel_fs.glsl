@@ -0,0 +1,11 @@
+#version 330
+
+uniform sampler2D view_texture;
+
+in vec2 vs_uv;
+
+out vec4 fs_colour;
+
+void main(){
+    fs_colour = vec4(texture(view_texture, vs_uv).rgb, 1.0);
+}
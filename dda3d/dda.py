@@ -1,6 +1,8 @@
-from typing import NamedTuple
+from typing import NamedTuple, Generator, Callable
 from math import floor
 
+import numpy as np
+
 
 class DDAPoint(NamedTuple):
     x: int
@@ -20,7 +22,66 @@ class DDAResult(NamedTuple):
     path: tuple[DDAPoint, ...]
 
 
-def dda(x: float, y: float, z: float, d_x: float, d_y: float, d_z: float, bounds_x: int, bounds_y: int, bounds_z: int) -> DDAResult:
+class DDAHit(NamedTuple):
+    hit: bool
+    x: int
+    y: int
+    z: int
+    d: float
+    n_x: int
+    n_y: int
+    n_z: int
+    steps: int  # how many cells were visited, including the hit
+
+
+class VoxelBits:
+    """
+    A solid/empty voxel grid packed into one bit per cell, indexed [x, y, z] with z changing fastest.
+
+    This is 8x smaller than a bool array and reading a cell is plain integer math on a
+    bytearray, which is far cheaper than indexing a numpy array one cell at a time.
+    """
+
+    def __init__(self, size: tuple[int, int, int], bits: bytearray | None = None):
+        self.size: tuple[int, int, int] = size
+        count = size[0] * size[1] * size[2]
+        self.bits: bytearray = bytearray((count + 7) // 8) if bits is None else bits
+        if len(self.bits) * 8 < count:
+            raise ValueError(f"{len(self.bits)} bytes can't hold a grid of size {size}")
+
+    @classmethod
+    def from_array(cls, occupancy) -> "VoxelBits":
+        occupancy = np.asarray(occupancy, dtype=bool)
+        return cls(occupancy.shape, bytearray(np.packbits(occupancy, axis=None, bitorder='little').tobytes()))
+
+    def to_array(self) -> np.ndarray:
+        count = self.size[0] * self.size[1] * self.size[2]
+        bits = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), count=count, bitorder='little')
+        return bits.astype(bool).reshape(self.size)
+
+    def _index(self, x: int, y: int, z: int) -> int:
+        return (x * self.size[1] + y) * self.size[2] + z
+
+    def __getitem__(self, cell: tuple[int, int, int]) -> bool:
+        i = self._index(*cell)
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def __setitem__(self, cell: tuple[int, int, int], solid: bool):
+        i = self._index(*cell)
+        if solid:
+            self.bits[i >> 3] |= 1 << (i & 7)
+        else:
+            self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+
+def iter_dda(x: float, y: float, z: float, d_x: float, d_y: float, d_z: float, bounds_x: int, bounds_y: int, bounds_z: int,
+             occupancy: VoxelBits | None = None) -> Generator[DDAPoint, None, float]:
+    """
+    Lazily yield the points of `dda` one cell at a time, the generator's return value is the final `d`.
+
+    Nothing is kept between steps so any length of ray costs the same memory, and the
+    consumer can stop early by just not asking for any more points.
+    """
     i_x, i_y, i_z = int(floor(x)), int(floor(y)), int(floor(z))  # grid indices (index coord)
 
     # distance traveled when moving 1 unit along the x, y, and z axis (change in parametric value t at coord)
@@ -42,8 +103,11 @@ def dda(x: float, y: float, z: float, d_x: float, d_y: float, d_z: float, bounds
     t_o = 0.0
     n_x, n_y, n_z = i_x, i_y, i_z  # (next coord)
     l_x, l_y, l_z = i_x, i_y, i_z  # (last coord)
-    path = []
     while True:
+        if occupancy is not None and occupancy[l_x, l_y, l_z]:
+            yield DDAPoint(l_x, l_y, l_z, 0.0)
+            return t
+
         if t_x < min(t_y, t_z):
             t = t_x
             t_x += dt_x
@@ -57,18 +121,242 @@ def dda(x: float, y: float, z: float, d_x: float, d_y: float, d_z: float, bounds
             t_z += dt_z
             n_z += s_z
 
-        path.append(DDAPoint(l_x, l_y, l_z, t - t_o))
+        yield DDAPoint(l_x, l_y, l_z, t - t_o)
         if not (0 <= n_x < bounds_x) or not (0 <= n_y < bounds_y) or not (0 <= n_z < bounds_z):
             # If we stepped out of bounds we want to quit.
-            break
+            return t
         l_x, l_y, l_z = n_x, n_y, n_z
         t_o = t
 
+
+def dda(x: float, y: float, z: float, d_x: float, d_y: float, d_z: float, bounds_x: int, bounds_y: int, bounds_z: int,
+        occupancy: VoxelBits | None = None) -> DDAResult:
+    """
+    Walk the ray cell by cell until it leaves the bounds, or until it reaches a solid cell when
+    given an occupancy grid. On a hit the solid cell is the last point of the path and `d`
+    is the distance to the face it was entered through. Use `dda_hit` when the path isn't needed,
+    and `iter_dda` or `visit_dda` to consume it as it goes.
+    """
+    path = []
+    walk = iter_dda(x, y, z, d_x, d_y, d_z, bounds_x, bounds_y, bounds_z, occupancy)
+    while True:
+        try:
+            path.append(next(walk))
+        except StopIteration as stop:
+            d = stop.value
+            break
+
     start = path[0]
     end = path[-1]
-    d = t
     return DDAResult(
         start[0], start[1], start[2],
         end[0], end[1], end[2],
         d, tuple(path)
     )
+
+
+def visit_dda(visit: Callable[[DDAPoint], bool | None], x: float, y: float, z: float, d_x: float, d_y: float, d_z: float,
+              bounds_x: int, bounds_y: int, bounds_z: int, occupancy: VoxelBits | None = None) -> DDAPoint | None:
+    """
+    Call `visit` with every point of the ray in order until it returns True or the ray ends.
+    Returns the last point visited.
+    """
+    point = None
+    for point in iter_dda(x, y, z, d_x, d_y, d_z, bounds_x, bounds_y, bounds_z, occupancy):
+        if visit(point):
+            break
+    return point
+
+
+def dda_hit(x: float, y: float, z: float, d_x: float, d_y: float, d_z: float, occupancy: VoxelBits) -> DDAHit:
+    """
+    Find the first solid cell along a ray starting inside the grid, without building a path.
+
+    The work is proportional to the distance to the hit rather than to the edge of the grid,
+    and nothing is allocated per step. The bits are read through a flat index that is stepped
+    along with the cell. The normal is of the face the ray entered the hit cell through,
+    and is zero if the ray started inside a solid cell.
+    """
+    bounds_x, bounds_y, bounds_z = occupancy.size
+    bits = occupancy.bits
+    i_x, i_y, i_z = int(floor(x)), int(floor(y)), int(floor(z))
+
+    dt_x = float('inf') if d_x == 0 else 1.0 / abs(d_x)
+    dt_y = float('inf') if d_y == 0 else 1.0 / abs(d_y)
+    dt_z = float('inf') if d_z == 0 else 1.0 / abs(d_z)
+
+    t_x = ((1.0 - (x % 1)) if d_x >= 0.0 else (x % 1)) * dt_x
+    t_y = ((1.0 - (y % 1)) if d_y >= 0.0 else (y % 1)) * dt_y
+    t_z = ((1.0 - (z % 1)) if d_z >= 0.0 else (z % 1)) * dt_z
+
+    s_x = 1 if d_x >= 0.0 else -1
+    s_y = 1 if d_y >= 0.0 else -1
+    s_z = 1 if d_z >= 0.0 else -1
+
+    # How far the flat bit index moves for a step along each axis.
+    f_x = s_x * bounds_y * bounds_z
+    f_y = s_y * bounds_z
+    f_z = s_z
+    i = (i_x * bounds_y + i_y) * bounds_z + i_z
+
+    t = 0.0
+    axis = -1
+    steps = 1
+    while not bits[i >> 3] >> (i & 7) & 1:
+        if t_x < t_y and t_x < t_z:
+            t = t_x
+            t_x += dt_x
+            i_x += s_x
+            i += f_x
+            axis = 0
+            if not 0 <= i_x < bounds_x:
+                return DDAHit(False, i_x, i_y, i_z, t, 0, 0, 0, steps)
+        elif t_y < t_x and t_y < t_z:
+            t = t_y
+            t_y += dt_y
+            i_y += s_y
+            i += f_y
+            axis = 1
+            if not 0 <= i_y < bounds_y:
+                return DDAHit(False, i_x, i_y, i_z, t, 0, 0, 0, steps)
+        else:
+            t = t_z
+            t_z += dt_z
+            i_z += s_z
+            i += f_z
+            axis = 2
+            if not 0 <= i_z < bounds_z:
+                return DDAHit(False, i_x, i_y, i_z, t, 0, 0, 0, steps)
+        steps += 1
+
+    return DDAHit(
+        True, i_x, i_y, i_z, t,
+        -s_x if axis == 0 else 0, -s_y if axis == 1 else 0, -s_z if axis == 2 else 0,
+        steps
+    )
+
+
+class DDAHits(NamedTuple):
+    hit: np.ndarray  # (n,) bool, whether the ray hit anything before leaving the grid
+    cell: np.ndarray  # (n, 3) int, the first solid cell or -1
+    distance: np.ndarray  # (n,) float, parametric distance to the hit face or inf
+    normal: np.ndarray  # (n, 3) int, the face normal of the hit or 0 if the ray started inside a solid cell
+
+
+def dda_batch(origins, directions, occupancy, max_steps: int | None = None) -> DDAHits:
+    """
+    Trace many rays through a voxel grid at once and find the first solid cell each one hits.
+
+    Every ray steps one cell per iteration in lockstep, and rays drop out of the working set
+    as soon as they hit or leave the grid, so each iteration only touches the rays still going.
+    Rays starting outside the grid are first moved to where they enter it.
+
+    :param origins: (n, 3) ray origins in cell coordinates.
+    :param directions: (n, 3) ray directions, distances are in multiples of their length.
+    :param occupancy: (bounds_x, bounds_y, bounds_z) grid where truthy cells are solid, or VoxelBits.
+    :param max_steps: cap on the cells each ray visits, defaults to enough to cross the whole grid.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    if isinstance(occupancy, VoxelBits):
+        occupancy = occupancy.to_array()
+    occupancy = np.asarray(occupancy, dtype=bool)
+    bounds = np.array(occupancy.shape, dtype=np.int64)
+    count = origins.shape[0]
+
+    hit = np.zeros(count, dtype=bool)
+    cell = np.full((count, 3), -1, dtype=np.int64)
+    distance = np.full(count, np.inf)
+    normal = np.zeros((count, 3), dtype=np.int8)
+
+    if max_steps is None:
+        max_steps = int(bounds.sum()) + 3
+
+    # Clip every ray against the grid's bounding box (slab test), axes the ray doesn't move
+    # along either never constrain it or always miss depending on if the origin is inside.
+    zero = directions == 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / directions
+        t_low = (0.0 - origins) * inv
+        t_high = (bounds - origins) * inv
+    inside = (0.0 <= origins) & (origins < bounds)
+    t_near = np.where(zero, np.where(inside, -np.inf, np.inf), np.minimum(t_low, t_high))
+    t_far = np.where(zero, np.where(inside, np.inf, -np.inf), np.maximum(t_low, t_high))
+
+    enter_axis = np.argmax(t_near, axis=1)
+    t_enter = t_near.max(axis=1)
+    started_outside = t_enter > 0.0
+    t_enter = np.maximum(t_enter, 0.0)
+    live = t_enter < t_far.min(axis=1)
+
+    idx = np.flatnonzero(live)
+    if not idx.size:
+        return DDAHits(hit, cell, distance, normal)
+
+    o = origins[idx]
+    d = directions[idx]
+    t = t_enter[idx]
+    step = np.where(d >= 0.0, 1, -1)
+    start = np.clip(np.floor(o + d * t[:, None]).astype(np.int64), 0, bounds - 1)
+
+    # The axis of the last face crossed, rays that started inside the grid haven't crossed one.
+    axis = np.where(started_outside[idx], enter_axis[idx], -1)
+
+    # t at the next cell boundary along each axis, and the t between boundaries.
+    t_delta = np.abs(inv[idx])
+    with np.errstate(invalid='ignore'):
+        t_max = np.where(zero[idx], np.inf, (start + (step > 0) - o) * inv[idx])
+
+    # Each axis gets its own contiguous array, indexing columns of an (n, 3) array every step
+    # costs far more than the stepping itself. The occupancy lookup uses a flat index that is
+    # stepped along with the cell so there is no 3D fancy indexing either.
+    solid_flat = occupancy.ravel()
+    stride = np.array(occupancy.strides, dtype=np.int64) // occupancy.itemsize
+    bx, by, bz = (int(b) for b in bounds)
+    cx, cy, cz = (start[:, i].copy() for i in range(3))
+    tx, ty, tz = (t_max[:, i].copy() for i in range(3))
+    dx, dy, dz = (t_delta[:, i].copy() for i in range(3))
+    sx, sy, sz = (step[:, i].copy() for i in range(3))
+    flat = start @ stride
+    state = [idx, t, axis, cx, cy, cz, tx, ty, tz, dx, dy, dz, sx, sy, sz, flat]
+
+    for _ in range(max_steps):
+        idx, t, axis, cx, cy, cz, tx, ty, tz, dx, dy, dz, sx, sy, sz, flat = state
+        solid = solid_flat[flat]
+        if solid.any():
+            done = idx[solid]
+            hit[done] = True
+            cell[done, 0], cell[done, 1], cell[done, 2] = cx[solid], cy[solid], cz[solid]
+            distance[done] = t[solid]
+            crossed = axis[solid]
+            faced = crossed >= 0
+            signs = np.stack((sx[solid], sy[solid], sz[solid]), axis=1)
+            normal[done[faced], crossed[faced]] = -signs[faced, crossed[faced]]
+
+            going = ~solid
+            state = [a[going] for a in state]
+            idx, t, axis, cx, cy, cz, tx, ty, tz, dx, dy, dz, sx, sy, sz, flat = state
+            if not idx.size:
+                break
+
+        # Same tie breaking as dda, z wins unless x or y is strictly closer.
+        mx = (tx < ty) & (tx < tz)
+        my = (ty < tx) & (ty < tz)
+        mz = ~(mx | my)
+        t[mx], t[my], t[mz] = tx[mx], ty[my], tz[mz]
+        axis[:] = my + 2 * mz
+        np.add(tx, dx, out=tx, where=mx)
+        np.add(ty, dy, out=ty, where=my)
+        np.add(tz, dz, out=tz, where=mz)
+        cx += sx * mx
+        cy += sy * my
+        cz += sz * mz
+        flat += (sx * mx) * stride[0] + (sy * my) * stride[1] + (sz * mz) * stride[2]
+
+        inside = (0 <= cx) & (cx < bx) & (0 <= cy) & (cy < by) & (0 <= cz) & (cz < bz)
+        if not inside.all():
+            state = [a[inside] for a in state]
+            if not state[0].size:
+                break
+
+    return DDAHits(hit, cell, distance, normal)
@@ -0,0 +1,112 @@
+from math import cos, sin, tan, radians
+
+import numpy as np
+from arcade import gl, get_window
+
+from common.data_loading import make_package_string_loader
+from dda3d.dda import dda_batch
+import dda3d.data as data
+
+get_shader = make_package_string_loader(data, 'glsl')
+
+
+VOXEL_SIZE = (64, 64, 32)
+VIEW_SIZE = (320, 180)
+FOV = 70.0
+
+SKY_COLOUR = np.array((20, 24, 40), dtype=np.float32)
+LOW_COLOUR = np.array((40, 120, 60), dtype=np.float32)
+HIGH_COLOUR = np.array((230, 230, 220), dtype=np.float32)
+# How bright a face is depending on which axis it faces, tops are lit and the sides are in shade.
+FACE_LIGHT = np.array((0.75, 0.6, 1.0), dtype=np.float32)
+
+
+def make_terrain(size: tuple[int, int, int] = VOXEL_SIZE, seed: int = 0) -> np.ndarray:
+    """A rolling heightmap with a few floating blocks so there is something to look at."""
+    x_len, y_len, z_len = size
+    x = np.arange(x_len)[:, None]
+    y = np.arange(y_len)[None, :]
+    height = z_len * (0.3 + 0.12 * np.sin(x / 7.0) * np.cos(y / 9.0) + 0.08 * np.sin((x + 2 * y) / 13.0))
+
+    occupancy = np.arange(z_len)[None, None, :] < height[:, :, None]
+
+    rng = np.random.default_rng(seed)
+    for _ in range(12):
+        bx, by = rng.integers(0, x_len - 4), rng.integers(0, y_len - 4)
+        bz = rng.integers(z_len // 2, z_len - 4)
+        occupancy[bx:bx + 4, by:by + 4, bz:bz + 2] = True
+    return occupancy
+
+
+class VoxelView:
+    """
+    Ray cast a voxel grid on the CPU with dda_batch, one ray per pixel of a small view
+    that is uploaded to a texture and stretched over the window.
+    """
+
+    def __init__(self, occupancy: np.ndarray | None = None, view_size: tuple[int, int] = VIEW_SIZE):
+        self._ctx = ctx = get_window().ctx
+        self.occupancy: np.ndarray = make_terrain() if occupancy is None else occupancy
+        self.view_size = view_size
+
+        self._texture = ctx.texture(view_size, components=4, filter=(ctx.NEAREST, ctx.NEAREST))
+        self._geometry = gl.geometry.quad_2d_fs()
+        self._program = ctx.program(
+            vertex_shader=get_shader('voxel_vs'),
+            fragment_shader=get_shader('voxel_fs')
+        )
+        self._program['view_texture'] = 0
+        self._pixels = np.zeros((view_size[1], view_size[0], 4), dtype=np.uint8)
+        self._pixels[:, :, 3] = 255
+
+        # The per pixel offsets on the image plane never change so only the camera basis is recomputed.
+        w, h = view_size
+        half = tan(radians(FOV) / 2.0)
+        u = (np.arange(w) + 0.5) / w * 2.0 - 1.0
+        v = (np.arange(h) + 0.5) / h * 2.0 - 1.0
+        self._u, self._v = np.meshgrid(u * half * w / h, v * half)
+
+        self.yaw: float = 45.0
+        self.pitch: float = 30.0
+        self.distance: float = 0.9 * max(self.occupancy.shape)
+        self.last_hits = None
+        self.dirty: bool = True
+
+    def orbit(self, yaw: float, pitch: float):
+        self.yaw = yaw
+        self.pitch = max(-89.0, min(89.0, pitch))
+        self.dirty = True
+
+    def trace(self):
+        self.dirty = False
+        center = np.array(self.occupancy.shape, dtype=np.float64) / 2.0
+        yaw, pitch = radians(self.yaw), radians(self.pitch)
+        forward = -np.array((cos(pitch) * cos(yaw), cos(pitch) * sin(yaw), sin(pitch)))
+        position = center - forward * self.distance
+        right = np.cross(forward, (0.0, 0.0, 1.0))
+        right /= np.linalg.norm(right)
+        up = np.cross(right, forward)
+
+        directions = forward + self._u[..., None] * right + self._v[..., None] * up
+        directions /= np.linalg.norm(directions, axis=-1, keepdims=True)
+        directions = directions.reshape(-1, 3)
+        origins = np.broadcast_to(position, directions.shape)
+
+        hits = self.last_hits = dda_batch(origins, directions, self.occupancy)
+
+        # Colour by height, shade by face, and fade into the sky with distance.
+        height = (hits.cell[:, 2] + 0.5) / self.occupancy.shape[2]
+        colour = LOW_COLOUR + (HIGH_COLOUR - LOW_COLOUR) * height[:, None]
+        colour *= FACE_LIGHT[np.abs(hits.normal).argmax(axis=1)][:, None]
+        fog = np.clip((hits.distance - self.distance * 0.5) / (self.distance * 1.5), 0.0, 1.0)[:, None]
+        colour = colour * (1.0 - fog) + SKY_COLOUR * fog
+        colour[~hits.hit] = SKY_COLOUR
+
+        self._pixels[:, :, :3] = colour.reshape(self.view_size[1], self.view_size[0], 3)
+        self._texture.write(self._pixels)
+
+    def draw(self):
+        if self.dirty:
+            self.trace()
+        self._texture.use(0)
+        self._geometry.render(self._program)
@@ -1,8 +1,10 @@
-from arcade import Window, camera, draw, SpriteSolidColor, SpriteList
+from arcade import Window, camera, draw, SpriteSolidColor, SpriteList, key as keys
 from pyglet.math import Vec3
 
-from dda3d.dda import dda
+from dda3d.dda import dda, iter_dda, DDAPoint
+from dda3d.voxel import VoxelView
 from common.util import clamp
+from common.util.animated_trace import AnimatedTrace
 
 
 GRID_SIZE = (10, 10, 1)
@@ -29,11 +31,27 @@ class DDA3DWindow(Window):
 
         self._dirty = True
 
+        # With A toggled on the ray is traced a few cells per second instead of all at once.
+        self._animate: bool = False
+        self._trace: AnimatedTrace[DDAPoint] | None = None
+        self._trace_last: DDAPoint | None = None
+
+        # TAB swaps between the single ray and a full ray cast voxel view.
+        self._voxel_view: VoxelView | None = None
+        self._show_voxels: bool = False
+
     def do_dda(self):
         self._dirty = False
         for sprite in self._grid_sprites:
             sprite.color = 0, 0, 0, 0
 
+        if self._animate:
+            self._trace = AnimatedTrace(iter_dda(*self._ray_pos, *self._ray_dir, *GRID_SIZE), steps_per_second=15.0)
+            self._trace_last = None
+            self._ray_len = 0.0
+            return
+        self._trace = None
+
         result = dda(*self._ray_pos, *self._ray_dir, *GRID_SIZE)
 
         for point in result.path[1:-1]:
@@ -49,10 +67,14 @@ class DDA3DWindow(Window):
         self._ray_len = result.d
 
     def on_draw(self):
+        self.clear()
+        if self._show_voxels:
+            self._voxel_view.draw()
+            return
+
         if self._dirty:
             self.do_dda()
 
-        self.clear()
         self._camera.use()
         self._grid_sprites.draw()
         draw.draw_line(
@@ -63,7 +85,37 @@ class DDA3DWindow(Window):
         )
         draw.draw_point(self._ray_pos[0]*SQUARE_SIZE, self._ray_pos[1]*SQUARE_SIZE, (255, 0, 0, 255), 2)
 
+    def on_update(self, delta_time: float):
+        if self._trace is None or self._trace.finished:
+            return
+
+        for point in self._trace.update(delta_time):
+            sprite = self._grid[(point.x, point.y)]
+            if self._trace_last is None:
+                sprite.color = 0, 0, 255, 255
+            else:
+                sprite.color = 0, 255, 255, int(255 * (point.d / 2**0.5))
+            self._ray_len += point.d
+            self._trace_last = point
+
+        if self._trace.finished and self._trace_last is not None:
+            self._grid[(self._trace_last.x, self._trace_last.y)].color = 0, 255, 0, 255
+            self._ray_len = self._trace.result
+
+    def on_key_press(self, symbol: int, modifiers: int):
+        if symbol == keys.A:
+            self._animate = not self._animate
+            self._dirty = True
+        if symbol == keys.TAB:
+            if self._voxel_view is None:
+                self._voxel_view = VoxelView()
+            self._show_voxels = not self._show_voxels
+
     def on_mouse_motion(self, x: int, y: int, dx: int, dy: int):
+        if self._show_voxels:
+            self._voxel_view.orbit(360.0 * x / self.width, 178.0 * y / self.height - 89.0)
+            return
+
         n_x, n_y, _ = self._camera.unproject((x, y))
         d_x = n_x / SQUARE_SIZE - self._ray_pos[0]
         d_y = n_y / SQUARE_SIZE - self._ray_pos[1]
@@ -73,6 +125,9 @@ class DDA3DWindow(Window):
         self._dirty = True
 
     def on_mouse_press(self, x: int, y: int, button: int, modifiers: int):
+        if self._show_voxels:
+            return
+
         n_x, n_y, _ = self._camera.unproject((x, y))
         x = clamp(0.0001, n_x / SQUARE_SIZE, GRID_SIZE[0] - 0.0001)
         y = clamp(0.0001, n_y / SQUARE_SIZE, GRID_SIZE[1] - 0.0001)
@@ -0,0 +1,29 @@
+#version 330
+
+// Draws the whole character screen in one go. Each cell is three texels of `cells` in a row,
+// the glyph code (in red), the foreground, and the background.
+
+uniform sampler2D cells;
+uniform sampler2D glyphs;  // The CP437 sheet, 16 x 16 glyphs with the first row at the top
+uniform ivec2 char_size;
+uniform vec2 screen_size;
+
+in vec2 vs_uv;
+
+out vec4 fs_colour;
+
+void main(){
+    ivec2 pixel = ivec2(vs_uv * screen_size);
+    ivec2 cell = pixel / char_size;
+    ivec2 local = pixel - cell * char_size;
+
+    int glyph = int(texelFetch(cells, ivec2(3 * cell.x, cell.y), 0).r * 255.0 + 0.5);
+    vec4 fore = texelFetch(cells, ivec2(3 * cell.x + 1, cell.y), 0);
+    vec4 back = texelFetch(cells, ivec2(3 * cell.x + 2, cell.y), 0);
+
+    // The sheet's rows go down the image, the screen's go up.
+    ivec2 texel = ivec2((glyph % 16) * char_size.x + local.x, (glyph / 16 + 1) * char_size.y - 1 - local.y);
+    vec4 ink = texelFetch(glyphs, texel, 0) * fore;
+
+    fs_colour = vec4(mix(back.rgb, ink.rgb, ink.a), max(back.a, ink.a));
+}
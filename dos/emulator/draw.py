@@ -1,8 +1,8 @@
 from enum import IntEnum
+import re
 
 from arcade.types import Color
-from dos.emulator.sheet import CharSheet, MAP
-from dos.emulator.screen import Screen
+from dos.emulator.screen import Screen, encode
 
 
 class Boundary(IntEnum):
@@ -11,42 +11,37 @@ class Boundary(IntEnum):
     DOUBLE = 2
 
 
-def draw_text(text: str, colour: Color, start_x: int, start_y: int, screen: Screen, sheet: CharSheet = None):
-    for idx, char in enumerate(text):
-        if char == '\b':
-            continue
-        screen.set_char((start_x + idx, start_y), MAP[char], colour, sheet=sheet)
+TEXT_RUN = re.compile('[^\b]+')
+
+
+def draw_text(text: str, colour: Color, start_x: int, start_y: int, screen: Screen):
+    # Backspaces take up a cell but leave it alone.
+    for run in TEXT_RUN.finditer(text):
+        screen.write(start_x + run.start(), start_y, encode(run.group()), colour)
 
 # TODO: Add boundary options
 def draw_box(colour: Color, left: int, right: int, bottom: int, top: int, screen: Screen):
+    width, height = right - left, top - bottom
+    screen.fill(left + 1, top - 1, width - 2, 1, 0xCD, colour)
+    screen.fill(left + 1, bottom, width - 2, 1, 0xCD, colour)
+    screen.fill(left, bottom + 1, 1, height - 2, 0xBA, colour)
+    screen.fill(right - 1, bottom + 1, 1, height - 2, 0xBA, colour)
     screen[left, bottom] = 0xC8, colour
     screen[right-1, top-1] = 0xBB, colour
     screen[left, top-1] = 0xC9, colour
     screen[right-1, bottom] = 0xBC, colour
-    for col in range(left+1, right-1):
-        screen[col, top-1] = 0xCD, colour
-        screen[col, bottom] = 0xCD, colour
-    for row in range(bottom+1, top-1):
-        screen[left, row] = 0xBA, colour
-        screen[right-1, row] = 0xBA, colour
 
 def colour_box(colour: Color, left: int, right: int, bottom: int, top: int, screen: Screen):
-    for x in range(left, right):
-        for y in range(bottom, top):
-            screen[x, y] = colour
+    screen.fill(left, bottom, right - left, top - bottom, back=colour)
 
 def colour_row(colour: Color, row: int, column_start: int, column_end: int, screen: Screen):
-    for idx in range(column_start, column_end):
-        screen[idx, row] = colour
+    screen.fill(column_start, row, column_end - column_start, 1, back=colour)
 
 def draw_row(char: int, colour: Color, row: int, column_start: int, column_end: int, screen: Screen):
-        for idx in range(column_start, column_end):
-            screen[idx, row] = char, colour
+    screen.fill(column_start, row, column_end - column_start, 1, char, colour)
 
 def colour_column(colour: Color, column: int, row_start: int, row_end: int, screen: Screen):
-    for idx in range(row_start, row_end):
-        screen[column, idx] = colour
+    screen.fill(column, row_start, 1, row_end - row_start, back=colour)
 
 def draw_column(char: int, colour: Color, column: int, row_start: int, row_end: int, screen: Screen):
-    for idx in range(row_start, row_end):
-        screen[column, idx] = char, colour
\ No newline at end of file
+    screen.fill(column, row_start, 1, row_end - row_start, char, colour)
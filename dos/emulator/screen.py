@@ -1,23 +1,47 @@
-from typing import Any
-from arcade import ArcadeContext, SpriteList, Sprite, Texture, SpriteSolidColor, Camera2D, XYWH, LBWH, color as colours
+"""
+The character screen of the terminal.
+
+The state of every cell lives in one uint8 array `cells` of shape (rows, columns, 3, 4): the glyph
+code, the foreground RGBA and the background RGBA side by side. `glyphs`, `fore` and `back` are
+views of it indexed [x, y] like the screen always has been, so drawing is just slice writes and
+negative rows wrap like they used to. The array is mirrored in one (columns * 3, rows) texture
+and a single full screen shader looks each glyph up in the CP437 sheet.
+
+Every write marks the rectangle of cells it touched. When the screen is drawn those rectangles are
+compared against what was last uploaded, and only the cells that really changed go up to the texture.
+If nothing changed, and none of the frame's processes are animated, the last CRT output is drawn
+again as is, so an idle screen costs one quad. Anything that writes into the views directly has
+to `mark` the cells first.
+
+`capture` doesn't copy anything. It makes the cells read only and hands them out as the snapshot,
+and `restore` just takes a snapshot back the same way. The first `mark` after either copies the
+cells once before they are written to, so a snapshot is never changed under whoever holds it.
+"""
+from arcade import ArcadeContext, color as colours
 from arcade.types import Color
 import arcade.gl as gl
+import numpy as np
 
 from dos import get_shader_path
 from dos.emulator.sheet import CharSheet, MAP
 from dos.processing.frame import Frame, FrameConfig, TextureConfig, CRT
 
+SPACE = MAP[' ']
+# More dirty rectangles than this in one frame are merged into their bounds.
+MAX_DIRTY = 8
 
-class CharSprite(Sprite):
 
-    def __init__(self, char: int, sheet: CharSheet, center_x, center_y, color: Color = Color(255, 255, 255)) -> None:
-        super().__init__(sheet[char], 1.0, center_x, center_y)
-        self.char = char
-        self.color = color
+def rgba(colour: Color | tuple[int, ...]) -> tuple[int, int, int, int]:
+    return tuple(colour) if len(colour) == 4 else (*colour, 255)
+
+
+def encode(text: str) -> np.ndarray:
+    """The glyph codes of a string."""
+    return np.frombuffer(bytes(MAP[char] for char in text), dtype=np.uint8)
 
 
 class Screen:
-    
+
     def __init__(self, count: tuple[int, int], size: tuple[int, int], pos: tuple[int, int], ctx: ArcadeContext) -> None:
         self.ctx = ctx
         self.char_count = count
@@ -25,31 +49,33 @@ class Screen:
         self.size = (size[0] * count[0]), (size[1] * count[1]) # Pixel size of screen
         self.default = CharSheet('MxPlus_IBM_CGA-2y', size)
 
-        # for x, y 
-        self.character_list = SpriteList(capacity=2 * count[0] * count[1])
-        self._character_grid: list[list[CharSprite]] = []
-        self._backing_grid: list[list[CharSprite]] = []
-
-        start_char = MAP[' ']
-        hw, hh = size[0] / 2.0, size[1] / 2.0
-        for x in range(self.char_count[0]):
-            cc = []
-            cb = []
-            self._character_grid.append(cc)
-            self._backing_grid.append(cb)
-            x_pos = hw + x * size[0]
-            for y in range(self.char_count[1]):
-                y_pos = hh + y * size[1]
-                char = CharSprite(start_char, self.default, center_x=x_pos, center_y=y_pos)
-                back = SpriteSolidColor(size[0], size[1], x_pos, y_pos, colours.BLACK)
-                cc.append(char)
-                cb.append(back)
-                self.character_list.append(back)
-                self.character_list.append(char)
+        columns, rows = count
+        self._bind(np.zeros((rows, columns, 3, 4), dtype=np.uint8))
+        # What the cell texture holds, starts out different from everything so the first draw uploads it all.
+        self._shown = np.zeros_like(self.cells)
+        self._dirty: list[tuple[int, int, int, int]] = []
+        self._drawn: bool = False
+        self.bytes_uploaded: int = 0
+        self.clear()
 
         self.refresh_colour: Color = colours.BLACK
 
-        self.frame_camera = Camera2D(viewport=LBWH(0, 0, self.size[0],self.size[1]), position=(0, 0), projection=LBWH(0.0, 0.0, self.size[0], self.size[1]))
+        self._cell_texture = ctx.texture((columns * 3, rows), components=4, dtype='f1', filter=(gl.NEAREST, gl.NEAREST))
+        texels = self.default.texels
+        self._glyph_texture = ctx.texture(
+            (texels.shape[1], texels.shape[0]), components=4, dtype='f1', data=texels.tobytes(),
+            filter=(gl.NEAREST, gl.NEAREST)
+        )
+        self._geo = gl.geometry.quad_2d_fs()
+        self._program = ctx.load_program(
+            vertex_shader=get_shader_path('basic_vs'),
+            fragment_shader=get_shader_path('screen_fs')
+        )
+        self._program['cells'] = 0
+        self._program['glyphs'] = 1
+        self._program['char_size'] = size
+        self._program['screen_size'] = self.size
+
         self.frame = Frame(
             FrameConfig((self.size[0],self.size[1]), self.size, pos, TextureConfig()),
             ctx,
@@ -77,51 +103,119 @@ class Screen:
     def __getitem__(self, loc: tuple[int, int]) -> tuple[int, Color]:
         return self.get_char(loc)
 
+    def _bind(self, cells: np.ndarray):
+        self.cells = cells
+        self.glyphs = cells[:, :, 0, 0].T
+        self.fore = cells[:, :, 1].transpose(1, 0, 2)
+        self.back = cells[:, :, 2].transpose(1, 0, 2)
+
+    def mark(self, left: int, bottom: int, width: int = 1, height: int = 1):
+        """Note that a rectangle of cells is about to change."""
+        if not self.cells.flags.writeable:
+            # Still shared with a snapshot.
+            self._bind(self.cells.copy())
+        columns, rows = self._span(left, width, 0), self._span(bottom, height, 1)
+        x1, y1 = min(columns.stop, self.char_count[0]), min(rows.stop, self.char_count[1])
+        if columns.start < x1 and rows.start < y1:
+            self._dirty.append((columns.start, rows.start, x1, y1))
+
+    def mark_all(self):
+        self._dirty = [(0, 0, self.char_count[0], self.char_count[1])]
+
+    def _upload(self) -> bool:
+        # Send the cells of the dirty rectangles that differ from the texture, returns if there were any.
+        dirty = self._dirty
+        self._dirty = []
+        if len(dirty) > MAX_DIRTY:
+            x0, y0, x1, y1 = zip(*dirty)
+            dirty = [(min(x0), min(y0), max(x1), max(y1))]
+
+        changed = False
+        for x0, y0, x1, y1 in dirty:
+            area = slice(y0, y1), slice(x0, x1)
+            rows, columns = np.nonzero((self.cells[area] != self._shown[area]).any(axis=(2, 3)))
+            if not rows.size:
+                continue
+            x0, x1 = x0 + columns.min(), x0 + columns.max() + 1
+            y0, y1 = y0 + rows.min(), y0 + rows.max() + 1
+            area = slice(y0, y1), slice(x0, x1)
+            self._shown[area] = self.cells[area]
+            # Always a copy, the cells may be a read only snapshot which GL can't take a pointer to.
+            data = self.cells[area].tobytes()
+            self._cell_texture.write(data, viewport=(3 * x0, y0, 3 * (x1 - x0), y1 - y0))
+            self.bytes_uploaded += len(data)
+            changed = True
+        return changed
+
     def draw(self):
+        changed = self._upload()
+        if self._drawn and not changed and not self.frame.animated:
+            self.frame.blit()
+            return
+
+        self._drawn = True
         with self.frame as fbo:
             fbo.clear(colour=self.refresh_colour)
-            with self.frame_camera.activate():
-                self.character_list.draw(pixelated=True)
+            self._cell_texture.use(0)
+            self._glyph_texture.use(1)
+            self._geo.render(self._program)
 
-    def set_char(self, loc: tuple[int, int], char: int = None, fore: Color = None, back: Color = None, sheet: CharSheet = None):
-        sheet = sheet or self.default
-        character = self._character_grid[loc[0]][loc[1]]
-        background = self._backing_grid[loc[0]][loc[1]]
+    def set_char(self, loc: tuple[int, int], char: int = None, fore: Color = None, back: Color = None):
+        x, y = loc
+        self.mark(x, y)
         if char is not None:
-            character.char = char
-            character.texture = sheet[char]
+            self.glyphs[x, y] = char
         if fore is not None:
-            character.color = fore
+            self.fore[x, y] = rgba(fore)
         if back is not None:
-            background.color = back
+            self.back[x, y] = rgba(back)
 
     def get_char(self, loc: tuple[int, int]) -> tuple[int, Color, Color]:
-        character = self._character_grid[loc[0]][loc[1]]
-        background = self._backing_grid[loc[0]][loc[1]]
-        return character.char, character.color, background.color
-    
+        x, y = loc
+        return int(self.glyphs[x, y]), Color(*self.fore[x, y].tolist()), Color(*self.back[x, y].tolist())
+
+    def _span(self, start: int, length: int, axis: int) -> slice:
+        # Negative starts count back from the end, like indexing a single cell does.
+        if start < 0:
+            start += self.char_count[axis]
+        return slice(max(start, 0), max(start + length, 0))
+
+    def fill(self, left: int, bottom: int, width: int, height: int, char: int = None, fore: Color = None, back: Color = None):
+        """Set every cell of a rectangle at once, anything left as None is untouched."""
+        area = self._span(left, width, 0), self._span(bottom, height, 1)
+        self.mark(left, bottom, width, height)
+        if char is not None:
+            self.glyphs[area] = char
+        if fore is not None:
+            self.fore[area] = rgba(fore)
+        if back is not None:
+            self.back[area] = rgba(back)
+
+    def write(self, x: int, y: int, codes: np.ndarray, fore: Color = None, back: Color = None):
+        """Write a run of glyph codes along a row, whatever runs off the right edge is dropped."""
+        columns = self._span(x, len(codes), 0)
+        columns = slice(columns.start, min(columns.stop, self.char_count[0]))
+        count = columns.stop - columns.start
+        if count <= 0:
+            return
+        self.mark(columns.start, y, count)
+        self.glyphs[columns, y] = codes[:count]
+        if fore is not None:
+            self.fore[columns, y] = rgba(fore)
+        if back is not None:
+            self.back[columns, y] = rgba(back)
+
     def clear(self, l: int = 0, b: int = 0, w: int = 0, h: int = 0):
         w = w or self.char_count[0]
         h = h or self.char_count[1]
-        start_char = MAP[' ']
-        for x in range(l, l+w):
-            for y in range(b, b+h):
-                char = self._character_grid[x][y]
-                back = self._backing_grid[x][y]
-
-                char.color = colours.WHITE
-                char.char = start_char
-                char.texture = self.default[start_char]
-                
-                back.color = colours.BLACK
-
-    def capture(self):
-        cap = []
-        for col in range(self.char_count[0]):
-            lis = []
-            cap.append(lis)
-            for row in range(self.char_count[1]):
-                char = self._character_grid[col][row]
-                back = self._character_grid[col][row]
-                lis.append((char.texture, char.char, char.color, back.color))
-        return cap
\ No newline at end of file
+        self.fill(l, b, w, h, SPACE, colours.WHITE, colours.BLACK)
+
+    def capture(self) -> np.ndarray:
+        """A read only snapshot of the cells, which can be given back to `restore` any number of times."""
+        self.cells.flags.writeable = False
+        self._bind(self.cells)
+        return self.cells
+
+    def restore(self, capture: np.ndarray):
+        self._bind(capture)
+        self.mark_all()
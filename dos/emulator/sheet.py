@@ -1,5 +1,8 @@
-from arcade import load_spritesheet, Texture
+from arcade import SpriteSheet, Texture
+from PIL import Image
+import numpy as np
 
+from common.data_loading.texture_cache import load_texel_data
 from dos import get_image_path
 
 # '                '
@@ -51,7 +54,9 @@ class CharSheet:
     def __init__(self, name: str, size: tuple[int, int]) -> None:
         self.name = name
         self.char_size = size
-        self.sheet = load_spritesheet(get_image_path(name))
+        # The sheet's texels come from the on disk texture cache, so the PNG is only decoded once.
+        self.texels = load_texel_data(get_image_path(name))
+        self.sheet = SpriteSheet(image=Image.fromarray(np.asarray(self.texels)))
         self.chars = self.sheet.get_texture_grid(size, 16, 256)
 
     def __getitem__(self, key: int) -> Texture:
@@ -1,12 +1,14 @@
 from functools import partial
 from typing import Callable
 from contextlib import contextmanager
+import re
 
 import arcade
 from arcade.types import Color
+import numpy as np
 
 from dos.emulator import CHAR_COUNT, CHAR_SIZE
-from dos.emulator.screen import Screen
+from dos.emulator.screen import Screen, encode, rgba
 from dos.emulator.sheet import CharSheet, MAP, IMAP
 from dos.processing.frame import Frame, FrameConfig, TextureConfig, CRT, Bloom
 from dos.emulator.draw import Boundary
@@ -16,6 +18,9 @@ from dos.emulator.app import App
 TPS = 20 # Ticks per second
 TR = 1.0 / TPS # Tick Rate
 
+# The runs of a line draw_text writes, form feeds and tabs split them up.
+TEXT_RUN = re.compile('[^\f\t]+')
+
 class Terminal:
     
     def __init__(self, position: tuple[int, int] = None, window: arcade.Window = None) -> None:
@@ -23,9 +28,8 @@ class Terminal:
 
         self.screen = Screen(CHAR_COUNT, CHAR_SIZE, position, window.ctx)
         self.saved_clear_grid = self.screen.capture()
-
-        self.char_sheet: CharSheet = None
-
+        # Named snapshots of the screen, apps push one to draw over and pop it to put back what was there.
+        self.layers: list[tuple[str, np.ndarray]] = []
 
         self.awake_app: App = None
         self.asleep_apps: list[App] = []
@@ -72,11 +76,7 @@ class Terminal:
         if self.saved_clear_grid is None:
             self.screen.clear()
             return
-        for col in range(self.screen.char_count[0]):
-            for row in range(self.screen.char_count[1]):
-                char = self.screen._character_grid[col][row]
-                char.texture, char.char, char.color, self.screen._backing_grid[col][row].color = self.saved_clear_grid[col][row]
-
+        self.screen.restore(self.saved_clear_grid)
 
     @contextmanager
     def record_clear(self, reset: bool = True, clear: bool = True):
@@ -92,30 +92,40 @@ class Terminal:
     def reset_clear(self):
         self.saved_clear_grid = None
 
+    def push_layer(self, name: str):
+        """Snapshot the screen as it is now, `pop_layer` puts it back."""
+        self.layers.append((name, self.screen.capture()))
+
+    def pop_layer(self, name: str = None):
+        """Restore the top layer, or the named one and drop every layer above it."""
+        if not self.layers:
+            raise ValueError('There are no layers to pop')
+        if name is not None:
+            names = [layer[0] for layer in self.layers]
+            if name not in names:
+                raise ValueError(f'There is no layer named {name}')
+            del self.layers[len(names) - names[::-1].index(name):]
+        _, snapshot = self.layers.pop()
+        self.screen.restore(snapshot)
+
     def draw_char(self, x, y, char: str = None, fore: Color = None, back: Color = None):
         if char is not None:
             char = MAP[char]
-        self.screen.set_char((x, y), char, fore, back, self.char_sheet)
+        self.screen.set_char((x, y), char, fore, back)
 
     def draw_text(self, start_x: int, start_y: int, text: str = None, fore: Color = None, back: Color = None):
         s = self.screen
-        c = self.char_sheet
-        line_shift = 0
-        idx_shift = 0
-        for idx, char in enumerate(text):
-            if char == '\f' or char == '\t':continue
-            if char == '\n': 
-                idx_shift = idx + 1
-                line_shift += 1
-                continue
-            if char == '\r':
-                idx_shift = idx + 1
-                continue
-            s.set_char((start_x + idx - idx_shift, start_y - line_shift), MAP[char], fore, back, c)
+        for line_shift, line in enumerate(text.split('\n')):
+            # A carriage return goes back to the start of the line and writes over it.
+            for segment in line.split('\r'):
+                # Form feeds and tabs take up a cell but leave it alone.
+                for run in TEXT_RUN.finditer(segment):
+                    s.write(start_x + run.start(), start_y - line_shift, encode(run.group()), fore, back)
 
     def draw_box(self, left: int, bottom: int, width: int, height: int, bound: Boundary | int = Boundary.NONE, fore: Color = None, back: Color = None, is_filled: bool = True, is_edged: bool = True):
         l, b = left, bottom
         r, t = l + width, b + height
+        s = self.screen
 
         if is_edged:
             match bound:
@@ -126,44 +136,38 @@ class Terminal:
                 case _:
                     bounds = (None, None, None, None, None, None) # bl, br, tl, tr, v, h
 
-            s = self.screen
-            c = self.char_sheet
-
-            s.set_char((l, b), bounds[0], fore, back, c)
-            s.set_char((r-1, b), bounds[1], fore, back, c)
-            s.set_char((l, t-1), bounds[2], fore, back, c)
-            s.set_char((r-1, t-1), bounds[3], fore, back, c)
-
-            for y in range(b+1, t-1):
-                s.set_char((l, y), bounds[4], fore, back, c)
-                s.set_char((r-1, y), bounds[4], fore, back, c)
+            s.fill(l + 1, b, width - 2, 1, bounds[5], fore, back)
+            s.fill(l + 1, t - 1, width - 2, 1, bounds[5], fore, back)
+            s.fill(l, b + 1, 1, height - 2, bounds[4], fore, back)
+            s.fill(r - 1, b + 1, 1, height - 2, bounds[4], fore, back)
 
-            for x in range(l + 1, r - 1):
-                s.set_char((x, b), bounds[5], fore, back, c)
-                s.set_char((x, t-1), bounds[5], fore, back, c)
+            s.set_char((l, b), bounds[0], fore, back)
+            s.set_char((r-1, b), bounds[1], fore, back)
+            s.set_char((l, t-1), bounds[2], fore, back)
+            s.set_char((r-1, t-1), bounds[3], fore, back)
 
         if is_filled:
-            for x in range(l+1, r-1):
-                for y in range(b+1, t-1):
-                    s.set_char((x, y), None, None, back)
+            s.fill(l + 1, b + 1, width - 2, height - 2, back=back)
 
     def draw_row(self, row: int, start: int = 0, stop: int = None, step: int = 1, char: str = None, fore: Color = None, back: Color = None):
         s = self.screen
-        c = self.char_sheet
+        s.mark(0, row, s.char_count[0], 1)
         if char is not None:
-            char = MAP[char]
-        stop = stop if stop is not None else s.char_count[0]
-        for idx in range(start, stop, step):
-            s.set_char((idx, row), char, fore, back, c)
+            s.glyphs[start:stop:step, row] = MAP[char]
+        if fore is not None:
+            s.fore[start:stop:step, row] = rgba(fore)
+        if back is not None:
+            s.back[start:stop:step, row] = rgba(back)
 
     def draw_column(self, column: int, start: int = 0, stop: int = None, step: int= 1, char: str = None, fore: Color = None, back: Color = None):
         s = self.screen
-        c = self.char_sheet
+        s.mark(column, 0, 1, s.char_count[1])
         if char is not None:
-            char = MAP[char]
-        stop = stop if stop is not None else s.char_count[1]
-        for idx in range(start, stop, step):
-            s.set_char((column, idx), char, fore, back, c)
+            s.glyphs[column, start:stop:step] = MAP[char]
+        if fore is not None:
+            s.fore[column, start:stop:step] = rgba(fore)
+        if back is not None:
+            s.back[column, start:stop:step] = rgba(back)
 
 
     # COLOUR COMMANDS --------------------------
\ No newline at end of file
@@ -32,11 +32,16 @@ class SnakeApp(App):
 
     def on_open(self, tick: int):
         self.last_open_tick = tick
+        self.terminal.push_layer('snake')
         with self.terminal.record_clear():
             self.terminal.draw_row(-1, back=(255, 255, 255))
             self.terminal.draw_text(1, -1, 'SNAKE V0.3', fore=(0, 0, 0))
         self.reset()
 
+    def on_close(self, tick: int):
+        self.terminal.pop_layer('snake')
+        super().on_close(tick)
+
     def on_run(self, tick: int):
         self.move_timer += 1
         if self.move_timer < 2:
@@ -99,7 +104,7 @@ class SnakeApp(App):
     
     def draw(self):
         l, b = self.snake_window.l, self.snake_window.b
-        self.terminal.screen.clear(h = self.terminal.screen.char_count[1]-1)
+        self.terminal.clear()
         self.snake_window.draw()
         for pos in self.food:
             self.terminal.draw_char(l+1+pos[0], b+1+pos[1], back=(255, 0, 0))
@@ -61,8 +61,9 @@ class SuperTicTacToeApp(App):
         self.selected = 4
 
 
-    def on_run(self, tick):
-        self.draw()
+    def on_open(self, tick: int):
+        self.terminal.push_layer('tictactoe')
+        # The logo and grid never change, so they are recorded once and every draw starts from them.
         with self.terminal.record_clear():
             # Draw Logo
             self.terminal.draw_text(57, 26, logo_str, (255, 255, 255), (0, 0, 0))
@@ -76,6 +77,13 @@ class SuperTicTacToeApp(App):
             self.terminal.draw_char(37, 16, '┼', (255, 255, 255))
             self.terminal.draw_char(43, 16, '┼', (255, 255, 255))
 
+    def on_close(self, tick: int):
+        self.terminal.pop_layer('tictactoe')
+        super().on_close(tick)
+
+    def on_run(self, tick: int):
+        self.draw()
+
 
     def draw(self):
         self.terminal.clear()
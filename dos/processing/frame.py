@@ -30,6 +30,8 @@ class FrameConfig:
 
 
 class Process:
+    # Whether the process changes over time, if none of a frame's processes do it can skip re-rendering.
+    animated: bool = False
 
     def __init__(self, ctx: arcade.ArcadeContext = None) -> None:
         self.ctx = ctx or arcade.get_window().ctx
@@ -237,7 +239,14 @@ class Frame:
             self.ctx.viewport = self._previous_viewport
         self._previous_viewport = self._previous_camera = self._previous_fbo = None
 
-        
+        self.blit()
+
+    @property
+    def animated(self) -> bool:
+        return any(process.animated for process in self.processes)
+
+    def blit(self):
+        """Draw the last processed result again without running anything."""
         func = self.ctx.blend_func
         self.ctx.blend_func = self.ctx.BLEND_DEFAULT
         with self.ctx.enabled(self.ctx.BLEND):
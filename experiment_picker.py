@@ -1,17 +1,71 @@
 from typing import Callable
+from importlib import import_module
+from threading import Thread
 import arcade
 import pyglet
 
 from common.util import ProceduralAnimator, SecondOrderAnimatorBase, load_shared_sound
 
 
+class ExperimentEntry:
+    """
+    An experiment that is only imported once it is picked.
+
+    :param module: the dotted path of the module holding the entry point.
+    :param entry_point: the name of the function to call within the module.
+    """
+
+    def __init__(self, module: str, entry_point: str = "main", args: tuple = (), kwargs: dict | None = None):
+        self.module: str = module
+        self.entry_point: str = entry_point
+        self.args: tuple = args
+        self.kwargs: dict = kwargs or {}
+        self._prewarm_thread: Thread | None = None
+
+    def load(self) -> Callable:
+        return getattr(import_module(self.module), self.entry_point)
+
+    def prewarm(self):
+        """Start importing the module on a background thread so that selecting it later is instant."""
+        if self._prewarm_thread is not None:
+            return
+        self._prewarm_thread = Thread(target=self._import_quietly, name=f"prewarm {self.module}", daemon=True)
+        self._prewarm_thread.start()
+
+    def _import_quietly(self):
+        try:
+            import_module(self.module)
+        except Exception:
+            # Any import error will be raised again when the experiment is actually selected.
+            pass
+
+    def __call__(self):
+        main_func = self.load()
+        main_func(*self.args, **self.kwargs)
+
+
+Experiment = ExperimentEntry | tuple[Callable, tuple, dict]
+
+
+def launch_experiment(experiment: Experiment):
+    if isinstance(experiment, ExperimentEntry):
+        main_func, args, kwargs = experiment.load(), experiment.args, experiment.kwargs
+    else:
+        main_func, args, kwargs = experiment
+    main_func(*args, **kwargs)
+
+
 class ExperimentPickerWindow(arcade.Window):
 
-    def __init__(self, experiments: dict[str, tuple[Callable, tuple, dict]]):
+    def __init__(self, experiments: dict[str, Experiment], prewarm: bool = False,
+                 on_select: Callable[[str], None] | None = None, selected: int = 0):
         super().__init__(640, 360, style=pyglet.window.Window.WINDOW_STYLE_BORDERLESS)
         self.center_window()
         self._experiments = experiments
         self._experiment_names = tuple(experiments.keys())
+        self._prewarm = prewarm
+        # When set the picker only reports the chosen name rather than launching it itself.
+        self._on_select = on_select
 
         self._selected: int = 0
         self._blip_sound: arcade.Sound = load_shared_sound("blip_c")
@@ -36,6 +90,22 @@ class ExperimentPickerWindow(arcade.Window):
         self._selector_right = arcade.Text("<", int(max_right) + 10, 0, font_name="GohuFont 11 Nerd Font Mono", font_size=22, batch=self._text_batch, anchor_x="left", anchor_y="center")
         self._title_text = arcade.Text("Arcade Experiments", int(self.center_x), self.height-10, font_name="GohuFont 11 Nerd Font Mono", font_size=40, anchor_x="center", anchor_y="top")
 
+        self._selected = selected % len(self._experiment_names)
+        y = self._text[self._selected].position[1]
+        self._selector_left.y = y
+        self._selector_right.y = y
+        self._scroll_animator.y = self._scroll_animator.xp = y
+
+        self.prewarm_selected()
+
+    def prewarm_selected(self):
+        if not self._prewarm:
+            return
+
+        experiment = self._experiments[self._experiment_names[self._selected]]
+        if isinstance(experiment, ExperimentEntry):
+            experiment.prewarm()
+
     def on_draw(self):
         self.clear()
         self.default_camera.use()
@@ -49,6 +119,7 @@ class ExperimentPickerWindow(arcade.Window):
         y = self._text[self._selected].position[1]
         self._selector_left.y = y
         self._selector_right.y = y
+        self.prewarm_selected()
 
         if silent:
             return
@@ -60,6 +131,7 @@ class ExperimentPickerWindow(arcade.Window):
         y = self._text[self._selected].position[1]
         self._selector_left.y = y
         self._selector_right.y = y
+        self.prewarm_selected()
 
         if silent:
             return
@@ -69,12 +141,15 @@ class ExperimentPickerWindow(arcade.Window):
     def select(self):
         self._select_sound.play()
         selected = self._experiment_names[self._selected]
-        main_func, args, kwargs = self._experiments[selected]
+        experiment = self._experiments[selected]
         del self._experiments
         del self._experiment_names
         self.default_camera.use()
         self.close()
-        main_func(*args, **kwargs)
+        if self._on_select is not None:
+            self._on_select(selected)
+            return
+        launch_experiment(experiment)
 
     def on_key_press(self, symbol: int, modifiers: int):
         match symbol:
@@ -109,6 +184,6 @@ class ExperimentPickerWindow(arcade.Window):
         self._text_cam.position = 0, int(self._scroll_animator.y)
 
 
-def main(experiments: dict[str, tuple[Callable, tuple, dict]]):
-    window = ExperimentPickerWindow(experiments)
+def main(experiments: dict[str, Experiment], prewarm: bool = False):
+    window = ExperimentPickerWindow(experiments, prewarm)
     window.run()
@@ -1,9 +1,10 @@
-from PIL import Image
+import numpy as np
 
 from arcade import gl
 from arcade import get_window
 
-from common.data_loading import make_package_string_loader, make_package_path_finder
+from common.data_loading import make_package_string_loader, make_package_path_finder, BackgroundLoader
+from common.data_loading.texture_cache import load_texel_data
 import sphere.data as data
 
 get_shader_string = make_package_string_loader(data, 'glsl')
@@ -12,7 +13,7 @@ get_img_path = make_package_path_finder(data, "png")
 
 class Renderer:
 
-    def __init__(self):
+    def __init__(self, loader: BackgroundLoader | None = None):
         self._ctx = ctx = get_window().ctx
 
         self._sphere = gl.geometry.sphere(1.0, 1024, 1024)
@@ -23,12 +24,36 @@ class Renderer:
         self._texture_program["radius"] = 6371
         self._texture_program["wrldText"] = 0
         self._texture_program["elevText"] = 1
-        img = Image.open(get_img_path("world_blend_oct"))
-        self._world_texture = ctx.texture(img.size, components=4, data=img.tobytes(), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.CLAMP_TO_EDGE)
-        img = Image.open(get_img_path("world_bump"))
-        self._elev_texture = ctx.texture(img.size, components=4, data=img.tobytes(), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.CLAMP_TO_EDGE)
+
+        # The texels come from the on disk texture cache so only the first ever launch decodes the PNGs.
+        # Without a loader they are loaded here, otherwise the sphere isn't drawn until both arrive.
+        self._world_texture: gl.Texture2D | None = None
+        self._elev_texture: gl.Texture2D | None = None
+        if loader is None:
+            self._set_world_texture(load_texel_data(get_img_path("world_blend_oct")))
+            self._set_elev_texture(load_texel_data(get_img_path("world_bump")))
+        else:
+            loader.submit(load_texel_data, get_img_path("world_blend_oct"), finish=self._set_world_texture, weight=4.0)
+            loader.submit(load_texel_data, get_img_path("world_bump"), finish=self._set_elev_texture, weight=4.0)
+
+    def _create_texture(self, texels: np.ndarray) -> gl.Texture2D:
+        height, width, components = texels.shape
+        return self._ctx.texture((width, height), components=components, data=memoryview(texels), wrap_x=self._ctx.CLAMP_TO_EDGE, wrap_y=self._ctx.CLAMP_TO_EDGE)
+
+    def _set_world_texture(self, texels: np.ndarray):
+        self._world_texture = self._create_texture(texels)
+
+    def _set_elev_texture(self, texels: np.ndarray):
+        self._elev_texture = self._create_texture(texels)
+
+    @property
+    def loaded(self) -> bool:
+        return self._world_texture is not None and self._elev_texture is not None
 
     def draw(self):
+        if not self.loaded:
+            return
+
         self._ctx.enable(self._ctx.DEPTH_TEST)
 
         self._world_texture.use(0)
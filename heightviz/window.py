@@ -1,9 +1,11 @@
 import math
 
-from arcade import Text, Window, camera, key
+from arcade import Text, Window, camera, key, draw_sprite
 from pyglet.math import Vec2, Vec3
 
-from common.util import clamp
+from common.util import clamp, load_shared_image
+from common.data_loading import BackgroundLoader
+from progress.window import Progessor
 
 from heightviz.render import Renderer
 from heightviz.person import PersonRenderer
@@ -18,7 +20,11 @@ class App(Window):
     def __init__(self):
         super().__init__(1280, 720, "3D Sphere")
 
-        self._renderer = Renderer()
+        self._progressor = Progessor(load_shared_image("normal"), load_shared_image("mask"))
+        self._progressor.position = self.center
+        self._loader = BackgroundLoader(on_progress=self._progressor.update)
+
+        self._renderer = Renderer(self._loader)
         self._person = PersonRenderer()
         self._camera_data_ortho = camera.CameraData(
             position=(0.0, 0.0, 0.0)
@@ -185,8 +191,12 @@ class App(Window):
         with self._gui_cam.activate():
             self.ctx.disable(self.ctx.DEPTH_TEST)
             self.text.draw()
+            if not self._loader.done:
+                draw_sprite(self._progressor)
 
     def on_update(self, delta_time: float):
+        self._loader.poll()
+
         if self._is_in_center_view_mode:
             if self.vertical:
                 self._radius = clamp(7000, self._radius + self.vertical * 1000.0 * delta_time, 10000)
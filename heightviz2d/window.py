@@ -4,8 +4,10 @@ import random
 
 import arcade
 
-from common.data_loading import make_package_file_opener, make_package_path_finder
-from common.util import load_shared_sound
+from common.data_loading import make_package_file_opener, make_package_path_finder, BackgroundLoader, decode_image
+from common.util import load_shared_sound, load_shared_image
+from common.util.spatial_index import BucketedSpatialIndex
+from progress.window import Progessor
 import heightviz2d.data as data
 import heightviz2d.bg as bg
 
@@ -41,7 +43,18 @@ class ZoomBucket:
         self.current_focus_level: int = 0
         self._item_map: dict[str, float] = {}
 
-    def load_items(self, scale_data: dict):
+        # Sprites are indexed in focus level 0 units, so zooming never has to touch the index.
+        # Every level gets cells about as big as its items.
+        self._index: BucketedSpatialIndex[int, arcade.Sprite] = BucketedSpatialIndex(lambda level: 10.0 ** (level + 1))
+        # Draw order of every sprite, the highest one under the mouse gets picked.
+        self._order: dict[arcade.Sprite, int] = {}
+        self._next_order: int = 0
+
+    def load_items(self, scale_data: dict, loader: BackgroundLoader | None = None):
+        """
+        Create a sprite for every item. With a loader the images are decoded in the background
+        and the sprites appear as `loader.poll` finishes them, otherwise everything loads now.
+        """
         for name, scale in scale_data.items():
             level = int(math.log10(scale / 10.0))
             if not (self._min <= level <= self._max):
@@ -49,23 +62,60 @@ class ZoomBucket:
                 continue
 
             self._item_map[name] = scale
-            sprite = arcade.Sprite(
-                get_png_path(name),
-                center_x=2.0 * (random.random() - 0.5) * 10**level
-            )
-            aspect = sprite.width / sprite.height
-
-            sprite.height = scale
-            sprite.depth = -scale
-            sprite.width = scale * aspect
-            sprite.center_y = sprite.height / 2.0
-            sprite.properties["name"] = name
-            sprite.properties['level'] = level
-
-            self.zoom_levels[level].append(sprite)
-            self._sprites.append(sprite)
-
+            if loader is None:
+                self.add_item(name, scale, level, arcade.load_texture(get_png_path(name)))
+            else:
+                loader.submit(
+                    decode_image, get_png_path(name),
+                    finish=lambda img, name=name, scale=scale, level=level: self.add_item(name, scale, level, arcade.Texture(img, hash=f"heightviz2d:{name}"))
+                )
+
+        if loader is None:
+            self.sort()
+
+    def add_item(self, name: str, scale: float, level: int, texture: arcade.Texture):
+        sprite = arcade.Sprite(
+            texture,
+            center_x=2.0 * (random.random() - 0.5) * 10**level
+        )
+        aspect = sprite.width / sprite.height
+
+        # Items that finish loading after a zoom need to match the current focus level.
+        focus = 100 ** self.current_focus_level
+        sprite.height = scale / focus
+        sprite.depth = -scale
+        sprite.width = scale * aspect / focus
+        sprite.center_x /= focus
+        sprite.center_y = sprite.height / 2.0
+        sprite.properties["name"] = name
+        sprite.properties['level'] = level
+
+        self.zoom_levels[level].append(sprite)
+        self._sprites.append(sprite)
+        self._order[sprite] = self._next_order
+        self._next_order += 1
+        self._index.insert(sprite, self._base_rect(sprite), level)
+
+    def _base_rect(self, sprite: arcade.Sprite) -> tuple[float, float, float, float]:
+        focus = 100 ** self.current_focus_level
+        return sprite.left * focus, sprite.right * focus, sprite.bottom * focus, sprite.top * focus
+
+    def moved(self, sprite: arcade.Sprite):
+        """Call after changing a sprite's position or size so picking keeps up."""
+        self._index.move(sprite, self._base_rect(sprite))
+
+    def pick(self, x: float, y: float, level_range: int = 2) -> arcade.Sprite | None:
+        """The top most sprite at a world position, only looking at levels near the current focus."""
+        focus = 100 ** self.current_focus_level
+        levels = range(self.current_focus_level - level_range, self.current_focus_level + level_range + 1)
+        hits = self._index.query_point(x * focus, y * focus, levels)
+        return max(hits, key=self._order.__getitem__, default=None)
+
+    def sort(self):
         self._sprites.sort(key=lambda s: s.depth)
+        for order, sprite in enumerate(self._sprites):
+            self._order[sprite] = order
+        self._next_order = len(self._sprites)
 
     def draw(self):
         self._sprites.draw()
@@ -89,6 +139,8 @@ class ZoomBucket:
     def bring_to_front(self, sprite):
         self._sprites.remove(sprite)
         self._sprites.append(sprite)
+        self._order[sprite] = self._next_order
+        self._next_order += 1
 
 
 class HeightViz2DWindow(arcade.Window):
@@ -99,8 +151,11 @@ class HeightViz2DWindow(arcade.Window):
         self._cam = arcade.camera.Camera2D(position=(0.0, 0.0), far=10000001)
 
         self._zoom_buckets = ZoomBucket()
+        self._progressor = Progessor(load_shared_image("normal"), load_shared_image("mask"))
+        self._progressor.position = self.center
+        self._loader = BackgroundLoader(on_progress=self._progressor.update, on_complete=self._zoom_buckets.sort)
         with open_json_file('scales') as file:
-            self._zoom_buckets.load_items(json.load(file))
+            self._zoom_buckets.load_items(json.load(file), self._loader)
 
         self.selected_box: tuple[float, float, float, float] | None = None
         self.selected_sprite: arcade.Sprite = None
@@ -154,24 +209,21 @@ class HeightViz2DWindow(arcade.Window):
         self.modifiers = modifiers
         if self.dragging and self.selected_sprite:
             self.selected_sprite.center_y = self.selected_sprite.height / 2.0
+            self._zoom_buckets.moved(self.selected_sprite)
         self.dragging = False
 
     def on_mouse_motion(self, x: int, y: int, dx: int, dy: int):
         old_selected_name = self.selected_name
         x, y, _ = self._cam.unproject((x, y))
-        for sprite in self._zoom_buckets._sprites[::-1]:
-            if abs(sprite.properties.get('level', 1000000) - self._zoom_buckets.current_focus_level) > 2:
-                continue
-
-            if (sprite.left <= x <= sprite.right) and (sprite.bottom <= y <= sprite.top):
-                self.selected_box = (sprite.left, sprite.right, sprite.bottom, sprite.top)
-                self.selected_name = sprite.properties["name"]
-                self.selected_size = sprite.height * (10 ** (self._zoom_buckets.current_focus_level * 2))
-                self.selected_sprite = sprite
-
-                if self.selected_name != old_selected_name:
-                    self.beep.play()
-                break
+        sprite = self._zoom_buckets.pick(x, y)
+        if sprite is not None:
+            self.selected_box = (sprite.left, sprite.right, sprite.bottom, sprite.top)
+            self.selected_name = sprite.properties["name"]
+            self.selected_size = sprite.height * (10 ** (self._zoom_buckets.current_focus_level * 2))
+            self.selected_sprite = sprite
+
+            if self.selected_name != old_selected_name:
+                self.beep.play()
         else:
             self.selected_box = None
             self.selected_sprite = None
@@ -186,6 +238,7 @@ class HeightViz2DWindow(arcade.Window):
             elif scroll_y < 0.0:
                 self.selected_sprite.height /= 1.1
                 self.selected_sprite.width /= 1.1
+            self._zoom_buckets.moved(self.selected_sprite)
             return
 
         if scroll_y > 0:
@@ -221,12 +274,15 @@ class HeightViz2DWindow(arcade.Window):
 
             p = self.selected_sprite.position
             self.selected_sprite.position = p[0] + (n_dx - self._cam.left), p[1] + (n_dy - self._cam.bottom)
+            self._zoom_buckets.moved(self.selected_sprite)
             self.dragging = True
         else:
             self.on_mouse_motion(x, y, dx, dy)
 
     def on_update(self, delta_time: float):
         self.local_time += delta_time
+        # Leave most of the frame free so the progress indicator keeps animating while sprites are made.
+        self._loader.poll(budget=0.008)
 
     def draw_bg(self):
         if self.one_hundred_px < 0.1:
@@ -315,6 +371,9 @@ class HeightViz2DWindow(arcade.Window):
                          font_name="GohuFont 11 Nerd Font Mono",
                          font_size=22)
 
+        if not self._loader.done:
+            arcade.draw_sprite(self._progressor)
+
         # Draw measurement bar
         arcade.draw_line(5, self.height - 65, 5 + self.closest_length_px_length, self.height - 65, arcade.color.WHITE_SMOKE, 3)
         arcade.draw_line(5, self.height - 60, 5, self.height - 70, arcade.color.WHITE_SMOKE, 3)
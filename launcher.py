@@ -0,0 +1,136 @@
+"""
+Run the picker and every experiment in its own forked process.
+
+The launching process never opens a window. It imports arcade and loads the shared
+font and sounds once, then keeps a forked worker waiting on a pipe. Each picker or
+experiment run uses up that worker, and a new one is forked straight away, so
+nothing leaks between experiments and the picker reopens without paying for
+interpreter or arcade startup again.
+
+Only available where `os.fork` exists, `main` falls back to the normal
+in process picker everywhere else.
+"""
+from time import monotonic_ns
+import importlib.resources as pkg_resources
+import os
+import sys
+
+# Imported up front so every fork starts with it already loaded.
+import arcade
+
+from common.util import load_shared_font, preload_shared_sounds
+import common.data.sounds as sounds
+from experiment_picker import Experiment, ExperimentPickerWindow, launch_experiment, main as picker_main
+
+
+class WarmWorker:
+    """
+    A forked copy of the launcher that blocks until it is told what to run.
+
+    Commands and results are tab separated lines over a pair of pipes.
+    `pick` opens the picker and replies with `select\\t<name>`,
+    `run\\t<name>\\t<ns>` launches an experiment and replies with
+    `first_frame\\t<ns>` once it has drawn its first frame.
+    """
+
+    def __init__(self, experiments: dict[str, Experiment]):
+        self._experiments = experiments
+        command_r, self._command_w = os.pipe()
+        self._result_r, result_w = os.pipe()
+
+        self.pid: int = os.fork()
+        if self.pid == 0:
+            os.close(self._command_w)
+            os.close(self._result_r)
+            self._serve(command_r, result_w)
+
+        os.close(command_r)
+        os.close(result_w)
+
+    def _serve(self, command_r: int, result_w: int):
+        # Only ever runs in the child, and never returns.
+        status = 0
+        try:
+            with os.fdopen(command_r, "r") as commands, os.fdopen(result_w, "w", buffering=1) as results:
+                line = commands.readline().rstrip("\n")
+                if line:
+                    command, *args = line.split("\t")
+                    if command == "pick":
+                        self._pick(results, int(args[0]))
+                    elif command == "run":
+                        self._run(results, args[0], int(args[1]))
+        except BaseException as e:
+            print(f"worker failed: {type(e).__name__}: {e}", file=sys.stderr)
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _pick(self, results, selected: int):
+        def _on_select(name: str):
+            results.write(f"select\t{name}\n")
+
+        window = ExperimentPickerWindow(self._experiments, prewarm=True, on_select=_on_select, selected=selected)
+        window.run()
+
+    def _run(self, results, name: str, launched: int):
+        # We are in a throwaway process so patching arcade to catch the first frame is harmless.
+        flip = arcade.Window.flip
+
+        def _first_flip(window):
+            arcade.Window.flip = flip
+            results.write(f"first_frame\t{monotonic_ns() - launched}\n")
+            return flip(window)
+
+        arcade.Window.flip = _first_flip
+        launch_experiment(self._experiments[name])
+
+    def send(self, *command: str) -> list[tuple[str, ...]]:
+        """Send a command, then wait for the worker to exit and return everything it replied with."""
+        os.write(self._command_w, ("\t".join(command) + "\n").encode())
+        os.close(self._command_w)
+
+        with os.fdopen(self._result_r, "r") as results:
+            replies = [tuple(line.rstrip("\n").split("\t")) for line in results]
+        os.waitpid(self.pid, 0)
+        return replies
+
+    def close(self):
+        os.close(self._command_w)
+        os.close(self._result_r)
+        os.waitpid(self.pid, 0)
+
+
+def main(experiments: dict[str, Experiment]):
+    if not hasattr(os, "fork"):
+        picker_main(experiments, prewarm=True)
+        return
+
+    load_shared_font("gohu")
+    # Decoded into the ASSET_CACHE before any fork, so no experiment loads them from disk.
+    preload_shared_sounds(file.name[:-4] for file in pkg_resources.files(sounds).iterdir() if file.name.endswith(".wav"))
+    names = tuple(experiments.keys())
+
+    # There is always a spare worker forked and waiting while another one is running.
+    spare = WarmWorker(experiments)
+    selected = 0
+    while True:
+        worker, spare = spare, WarmWorker(experiments)
+        replies = worker.send("pick", str(selected))
+
+        picked = next((reply[1] for reply in replies if reply[0] == "select"), None)
+        if picked is None:
+            break
+        selected = names.index(picked)
+
+        worker, spare = spare, WarmWorker(experiments)
+        replies = worker.send("run", picked, str(monotonic_ns()))
+
+        first_frame = next((int(reply[1]) for reply in replies if reply[0] == "first_frame"), None)
+        if first_frame is None:
+            print(f"{picked}: exited before drawing a frame")
+        else:
+            print(f"{picked}: launch to first frame {first_frame * 1e-6:.1f}ms")
+
+    spare.close()
@@ -0,0 +1,95 @@
+"""
+Time the numpy marching squares mesher against the old one square at a time version.
+
+    python -m marching2d.benchmark
+    python -m marching2d.benchmark --sizes 128 2048 --reference-limit 512
+    python -m marching2d.benchmark --headless
+
+The field is the same wavy one the window starts with. The reference gets slow quickly,
+so it is skipped for anything bigger than --reference-limit.
+
+After that a brush is painted into one corner of a tiled mesh, which shows how little has to
+be remeshed and uploaded compared to the whole thing. The upload is what a real MarchRenderer
+writes (the tile slots and the band of node rows), so that part opens a hidden window,
+--headless makes it an offscreen EGL one.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+import os
+
+from marching2d.field import CircleBrush, paint
+from marching2d.mesher import TiledMesh, march, march_reference, wavy_field
+
+
+def best_of(func, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def run(size: int, repeats: int, reference_limit: int):
+    field = wavy_field(size, size)
+    vertices = march(field)
+    fast = best_of(lambda: march(field), repeats)
+    line = f"{size:>5}x{size:<5} numpy {fast * 1e3:9.2f}ms  {vertices.shape[0] // 3:>9,} triangles"
+
+    if size <= reference_limit:
+        reference = march_reference(field)
+        slow = best_of(lambda: march_reference(field), 1)
+        line += f"  reference {slow * 1e3:9.2f}ms  {reference.shape[0] // 3:>9,} triangles  {slow / fast:6.1f}x"
+    print(line)
+
+
+def run_edit(size: int, tile: int):
+    # Imported here so the timings above don't need arcade or a GL context.
+    from marching2d.render import MarchRenderer
+
+    field = wavy_field(size, size)
+    mesh = TiledMesh(size, size, tile)
+    mesh.rebuild(field)
+    renderer = MarchRenderer(size, size, 1.0, mesh)
+    renderer.upload_tiles(range(len(mesh.meshes)))
+    renderer.set_nodes(field)
+    whole = renderer.bytes_uploaded
+    renderer.bytes_uploaded = 0
+
+    start = perf_counter()
+    window = paint(field, CircleBrush(8.0, 8.0, 6.0))
+    mesh.mark_window(window)
+    changed = mesh.rebuild(field)
+    took = perf_counter() - start
+    # The same uploads MarchGrid.mesh does after an edit.
+    renderer.upload_tiles(changed.tolist())
+    renderer.set_nodes(field, window[0])
+
+    print(f"{size:>5}x{size:<5} corner edit {took * 1e3:7.2f}ms  {changed.size} of {len(mesh.meshes)} tiles"
+          f"  {renderer.bytes_uploaded / 1024:8.1f}KiB uploaded vs {whole / 1024:8.1f}KiB for the whole mesh and nodes")
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--reference-limit", type=int, default=1024)
+    parser.add_argument("--tile", type=int, default=64, help="squares per side of a mesh tile")
+    parser.add_argument("--headless", action="store_true", help="use an offscreen EGL context for the upload sizes")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.repeats, args.reference_limit)
+
+    # This has to be set before arcade (and so pyglet) is first imported.
+    if args.headless:
+        os.environ["ARCADE_HEADLESS"] = "1"
+    import arcade
+    window = arcade.Window(64, 64, "marching2d benchmark", visible=False)
+    for size in args.sizes:
+        run_edit(size, args.tile)
+    window.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Marching cubes, the 3D sibling of the marching squares in `mesher`.
+
+Corner i of a cube is at (i & 1, (i >> 1) & 1, (i >> 2) & 1) and the field is indexed [x, y, z]
+like the dda3d voxels, above zero is inside. Rather than paste in the usual 256 case table it is
+built on import: every face of the cube joins up the edges its corners cross on (keeping
+diagonal inside corners apart when a face is ambiguous), the segments chain into loops, and
+each loop is fanned into triangles facing out of the inside. Two cubes always agree on the
+face they share, so the surface has no cracks.
+
+`march_cubes` does a whole block at once with numpy. The triangles index into a shared vertex
+array with one vertex per crossed grid edge, so neighbouring cubes reuse the same vertices.
+`ChunkedCubes` meshes a big field as separate chunks and only remeshes the ones that changed.
+"""
+from math import ceil
+
+import numpy as np
+
+__all__ = (
+    "CORNERS",
+    "EDGES",
+    "cube_triangulations",
+    "march_cubes",
+    "march_cubes_reference",
+    "blob_field",
+    "ChunkedCubes"
+)
+
+CORNERS = tuple((i & 1, (i >> 1) & 1, (i >> 2) & 1) for i in range(8))
+# (low corner, high corner, axis), every edge goes along +axis from its low corner.
+EDGES = tuple((a, a | 1 << axis, axis) for axis in range(3) for a in range(8) if not a >> axis & 1)
+
+
+def _faces() -> list[list[int]]:
+    # The corners of every face, anticlockwise when looking at the cube from outside.
+    faces = []
+    for axis in range(3):
+        u, v = (axis + 1) % 3, (axis + 2) % 3
+        for side in (0, 1):
+            cycle = []
+            for c_u, c_v in ((0, 0), (1, 0), (1, 1), (0, 1)):
+                corner = [0, 0, 0]
+                corner[axis], corner[u], corner[v] = side, c_u, c_v
+                cycle.append(corner[0] | corner[1] << 1 | corner[2] << 2)
+            faces.append(cycle if side else cycle[::-1])
+    return faces
+
+
+def _triangulate(case: int, faces: list[list[int]]) -> tuple[tuple[int, int, int], ...]:
+    edge_of = {frozenset(edge[:2]): index for index, edge in enumerate(EDGES)}
+    corner_sets = [set(cycle) for cycle in faces]
+
+    def on_one_face(a: int, b: int) -> bool:
+        corners = set(EDGES[a][:2]) | set(EDGES[b][:2])
+        return any(corners <= face for face in corner_sets)
+
+    # Going anticlockwise round a face, every run of inside corners is entered on one edge and left
+    # on another. Joining each exit to its entry gives segments that chain the same way on every face.
+    following = {}
+    for cycle in faces:
+        inside = [case >> corner & 1 for corner in cycle]
+        edges = [edge_of[frozenset((cycle[k], cycle[(k + 1) % 4]))] for k in range(4)]
+        for k in range(4):
+            if inside[k] and not inside[(k + 1) % 4]:
+                start = (k - 1) % 4
+                while inside[start] or not inside[(start + 1) % 4]:
+                    start = (start - 1) % 4
+                following[edges[k]] = edges[start]
+
+    triangles = []
+    done = set()
+    for first in following:
+        if first in done:
+            continue
+        loop = [first]
+        edge = following[first]
+        while edge != first:
+            loop.append(edge)
+            edge = following[edge]
+        done.update(loop)
+        # Fan from a vertex that shares no face with the ones it joins to, otherwise a diagonal would
+        # lie in a face and overlap the segment the neighbouring cube puts there.
+        start = next(
+            (i for i in range(len(loop)) if not any(on_one_face(loop[i], loop[(i + j) % len(loop)]) for j in range(2, len(loop) - 1))),
+            0
+        )
+        loop = loop[start:] + loop[:start]
+        triangles.extend((loop[0], loop[i + 1], loop[i]) for i in range(1, len(loop) - 1))
+    return tuple(triangles)
+
+
+cube_triangulations = tuple(_triangulate(case, _faces()) for case in range(256))
+
+_TRIANGLE_COUNT = np.array([len(case) for case in cube_triangulations], dtype=np.intp)
+_TRIANGLES = np.zeros((256, int(_TRIANGLE_COUNT.max()), 3), dtype=np.intp)
+for _case, _tris in enumerate(cube_triangulations):
+    if _tris:
+        _TRIANGLES[_case, :len(_tris)] = _tris
+
+_EDGE_CORNER = np.array([CORNERS[edge[0]] for edge in EDGES], dtype=np.intp)
+_EDGE_AXIS = np.array([edge[2] for edge in EDGES], dtype=np.intp)
+
+
+def march_cubes(values: np.ndarray, offset: tuple[int, int, int] = (0, 0, 0)) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mesh everything above zero in an [x, y, z] field.
+
+    Returns (vertices, indices): an (n, 3) float32 array of positions in voxels (plus `offset`),
+    and an (m, 3) uint32 array of triangles indexing into them.
+    """
+    inside = values > 0
+    nx, ny, nz = (size - 1 for size in values.shape)
+    case = np.zeros((nx, ny, nz), dtype=np.uint8)
+    for corner, (c_x, c_y, c_z) in enumerate(CORNERS):
+        case |= inside[c_x:c_x + nx, c_y:c_y + ny, c_z:c_z + nz].view(np.uint8) << corner
+
+    cube = np.flatnonzero((case != 0) & (case != 255))
+    if not cube.size:
+        return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.uint32)
+    case = case.reshape(-1)[cube]
+    cx, cy, cz = np.unravel_index(cube, (nx, ny, nz))
+
+    counts = _TRIANGLE_COUNT[case]
+    owner = np.repeat(np.arange(cube.size), counts)
+    nth = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    edge = _TRIANGLES[case[owner], nth].reshape(-1)
+    owner = np.repeat(owner, 3)
+
+    # Name every edge by its low node and axis, so the cubes either side of it find the same one.
+    shape = values.shape
+    node = np.ravel_multi_index(
+        (cx[owner] + _EDGE_CORNER[edge, 0], cy[owner] + _EDGE_CORNER[edge, 1], cz[owner] + _EDGE_CORNER[edge, 2]),
+        shape
+    )
+    name = _EDGE_AXIS[edge] * values.size + node
+
+    # Number the edges in use with a lookup over every possible edge, cheaper than sorting them.
+    lookup = np.zeros(3 * values.size, dtype=np.uint32)
+    lookup[name] = 1
+    used = np.flatnonzero(lookup)
+    lookup[used] = np.arange(used.size, dtype=np.uint32)
+    indices = lookup[name].reshape(-1, 3)
+
+    axis, node = np.divmod(used, values.size)
+    x, y, z = np.unravel_index(node, shape)
+    flat = values.reshape(-1)
+    low = flat[node]
+    step = np.array((shape[1] * shape[2], shape[2], 1))[axis]
+    high = flat[node + step]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(low == high, 0.5, -low / (high - low))
+
+    vertices = np.empty((used.size, 3), dtype=np.float32)
+    vertices[:, 0] = x + offset[0] + t * (axis == 0)
+    vertices[:, 1] = y + offset[1] + t * (axis == 1)
+    vertices[:, 2] = z + offset[2] + t * (axis == 2)
+    return vertices, indices
+
+
+def march_cubes_reference(values: np.ndarray) -> np.ndarray:
+    """One cube at a time with no sharing, returns an (m, 3, 3) array of triangle corners."""
+    nx, ny, nz = (size - 1 for size in values.shape)
+    triangles = []
+    for x in range(nx):
+        for y in range(ny):
+            for z in range(nz):
+                corners = [float(values[x + c_x, y + c_y, z + c_z]) for c_x, c_y, c_z in CORNERS]
+                case = sum(1 << i for i, value in enumerate(corners) if value > 0)
+                if not cube_triangulations[case]:
+                    continue
+                points = []
+                for low, high, axis in EDGES:
+                    a, b = corners[low], corners[high]
+                    t = 0.5 if a == b else -a / (b - a)
+                    point = [x + CORNERS[low][0], y + CORNERS[low][1], z + CORNERS[low][2]]
+                    point[axis] += t
+                    points.append(point)
+                triangles.extend([points[e] for e in tri] for tri in cube_triangulations[case])
+    return np.array(triangles, dtype=np.float32).reshape(-1, 3, 3)
+
+
+def blob_field(size: int, blobs: int = 24, seed: int = 0) -> np.ndarray:
+    """A (size, size, size) field of overlapping spheres with some ripples on them, to mesh."""
+    rng = np.random.default_rng(seed)
+    axis = np.arange(size, dtype=np.float32)
+    field = np.full((size, size, size), -1.0, dtype=np.float32)
+    for center, radius in zip(rng.uniform(0.15, 0.85, (blobs, 3)) * size, rng.uniform(0.05, 0.2, blobs) * size):
+        d2 = ((axis - center[0]) ** 2)[:, None, None] + ((axis - center[1]) ** 2)[None, :, None] + ((axis - center[2]) ** 2)[None, None, :]
+        np.maximum(field, 1.0 - np.sqrt(d2) / radius, out=field)
+    ripple = np.sin(axis * (24.0 / size))
+    field += 0.15 * (ripple[:, None, None] * ripple[None, :, None] * ripple[None, None, :])
+    return field
+
+
+class ChunkedCubes:
+    """
+    A marching cubes mesh of an [x, y, z] field split into `chunk` sized cubes of cubes.
+
+    Each chunk keeps its own (vertices, indices), vertices on a chunk border are repeated in both.
+    Mark changed voxels with `mark_window` or `mark_voxels` and `rebuild` only remeshes the chunks
+    around them. Chunks are numbered like the field, `meshes[np.ravel_multi_index(chunk, chunks)]`.
+    """
+
+    def __init__(self, shape: tuple[int, int, int], chunk: int = 32):
+        self.shape = shape
+        self.chunk = chunk
+        self.cubes = tuple(size - 1 for size in shape)
+        self.chunks = tuple(ceil(size / chunk) for size in self.cubes)
+
+        empty = (np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.uint32))
+        self.meshes: list[tuple[np.ndarray, np.ndarray]] = [empty] * int(np.prod(self.chunks))
+        self.dirty: np.ndarray = np.ones(self.chunks, dtype=bool)
+
+    @property
+    def triangle_count(self) -> int:
+        return sum(indices.shape[0] for _, indices in self.meshes)
+
+    def mark_all(self):
+        self.dirty[:] = True
+
+    def mark_window(self, window: tuple[slice, slice, slice]):
+        """Mark the chunks around an (x, y, z) window of changed voxels."""
+        chunk_slices = []
+        for axis_slice, size, cubes in zip(window, self.shape, self.cubes):
+            first, last, _ = axis_slice.indices(size)
+            # A voxel is a corner of the cubes before and after it.
+            start, stop = max(first - 1, 0), min(last, cubes)
+            if start >= stop:
+                return
+            chunk_slices.append(slice(start // self.chunk, (stop - 1) // self.chunk + 1))
+        self.dirty[tuple(chunk_slices)] = True
+
+    def mark_voxels(self, index: np.ndarray):
+        """Mark the chunks around changed voxels given by flat indices into the field."""
+        coords = np.unravel_index(index, self.shape)
+        for corner in CORNERS:
+            cube = [c - (1 - o) for c, o in zip(coords, corner)]
+            inside = np.ones(index.shape, dtype=bool)
+            for c, cubes in zip(cube, self.cubes):
+                inside &= (0 <= c) & (c < cubes)
+            self.dirty[tuple(c[inside] // self.chunk for c in cube)] = True
+
+    def rebuild(self, values: np.ndarray) -> np.ndarray:
+        """Remesh every dirty chunk from the field and return which chunks changed."""
+        changed = np.flatnonzero(self.dirty)
+        size = self.chunk
+        for index in changed.tolist():
+            c_x, c_y, c_z = (c * size for c in np.unravel_index(index, self.chunks))
+            # One more voxel than cubes, the border voxels are shared with the next chunk.
+            block = values[c_x:c_x + size + 1, c_y:c_y + size + 1, c_z:c_z + size + 1]
+            self.meshes[index] = march_cubes(block, (c_x, c_y, c_z))
+        self.dirty[:] = False
+        return changed
+
+    def combined(self) -> tuple[np.ndarray, np.ndarray]:
+        """Every chunk in one (vertices, indices) pair, for uploading the lot at once."""
+        offsets = np.cumsum([0] + [vertices.shape[0] for vertices, _ in self.meshes])
+        vertices = np.concatenate([vertices for vertices, _ in self.meshes])
+        indices = np.concatenate([indices + np.uint32(offset) for (_, indices), offset in zip(self.meshes, offsets)])
+        return vertices, indices
@@ -0,0 +1,81 @@
+"""
+Time the chunked numpy marching cubes and check it against the one cube at a time reference.
+
+    python -m marching2d.cubes_benchmark
+    python -m marching2d.cubes_benchmark --sizes 64 128 --chunk 16
+
+Every size meshes the same kind of blobby field from scratch, then a small sphere is added
+near one corner to see what remeshing just the chunks around it costs. The reference is far
+too slow for the full fields, so it meshes a --reference-size crop and the two have to match.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+
+from marching2d.cubes import ChunkedCubes, blob_field, march_cubes, march_cubes_reference
+
+
+def triangle_set(triangles: np.ndarray) -> list:
+    # Rounded and rotated to start from the smallest corner, so the order and float noise don't matter.
+    out = []
+    for triangle in np.round(triangles.astype(np.float64), 4).tolist():
+        first = min(range(3), key=triangle.__getitem__)
+        out.append(tuple(map(tuple, triangle[first:] + triangle[:first])))
+    return sorted(out)
+
+
+def check(field: np.ndarray, size: int):
+    crop = np.ascontiguousarray(field[:size, :size, :size])
+    start = perf_counter()
+    vertices, indices = march_cubes(crop)
+    fast = perf_counter() - start
+    start = perf_counter()
+    reference = march_cubes_reference(crop)
+    slow = perf_counter() - start
+
+    match = triangle_set(vertices[indices]) == triangle_set(reference)
+    print(f"  {size}^3 crop: numpy {indices.shape[0] / fast:12,.0f} tris/s  reference {reference.shape[0] / slow:10,.0f} tris/s"
+          f"  {'matches' if match else 'DOES NOT MATCH'} ({reference.shape[0]:,} triangles)")
+    # Shared vertices, versus three per triangle for the reference's triangle soup.
+    print(f"  {vertices.shape[0]:,} shared vertices vs {3 * reference.shape[0]:,} unshared")
+
+
+def run(size: int, chunk: int, reference_size: int):
+    field = blob_field(size)
+    print(f"{size}^3 field, {chunk}^3 chunks:")
+
+    mesh = ChunkedCubes(field.shape, chunk)
+    start = perf_counter()
+    mesh.rebuild(field)
+    took = perf_counter() - start
+    triangles = mesh.triangle_count
+    print(f"  full mesh {took * 1e3:9.1f}ms  {triangles:>10,} triangles  {triangles / took:12,.0f} tris/s")
+
+    # A small sphere near the corner touches a handful of chunks.
+    window = (slice(4, 12), slice(4, 12), slice(4, 12))
+    axis = np.arange(8, dtype=np.float32)
+    d2 = (axis[:, None, None] - 3.5) ** 2 + (axis[None, :, None] - 3.5) ** 2 + (axis[None, None, :] - 3.5) ** 2
+    np.maximum(field[window], 1.0 - np.sqrt(d2) / 3.0, out=field[window])
+    start = perf_counter()
+    mesh.mark_window(window)
+    changed = mesh.rebuild(field)
+    took = perf_counter() - start
+    print(f"  corner edit {took * 1e3:7.2f}ms  {changed.size} of {len(mesh.meshes)} chunks remeshed")
+
+    check(field, reference_size)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[128, 256])
+    parser.add_argument("--chunk", type=int, default=32)
+    parser.add_argument("--reference-size", type=int, default=48)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.chunk, args.reference_size)
+
+
+if __name__ == '__main__':
+    main()
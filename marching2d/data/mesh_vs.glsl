@@ -0,0 +1,14 @@
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform float square_size;
+
+in vec2 in_pos;
+
+void main(){
+    gl_Position = window.projection * window.view * vec4(in_pos * square_size, 0.0, 1.0);
+}
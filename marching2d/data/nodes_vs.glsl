@@ -0,0 +1,21 @@
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform float square_size;
+uniform int width;
+
+in float in_value;
+
+out vec4 vs_colour;
+
+void main(){
+    // Nodes are laid out row major, so the vertex id is y * width + x.
+    vec2 node = vec2(gl_VertexID % width, gl_VertexID / width);
+    gl_Position = window.projection * window.view * vec4(node * square_size, 0.0, 1.0);
+
+    vs_colour = vec4(float(in_value < 0.0), float(in_value > 0.0), 1.0, 1.0);
+}
@@ -0,0 +1,214 @@
+"""
+Marching squares over a whole field at once with numpy.
+
+The corners and edge midpoints of a square are numbered anticlockwise from the bottom left,
+the odd ones sit on an edge and slide along it to where the field crosses zero:
+
+    2 - 3 - 4
+    |       |
+    1       5
+    |       |
+    0 - 7 - 6
+
+`march` works out the case of every square, how many triangles each needs, and then the
+position of every triangle vertex straight from the tables below, so nothing is done per square
+in python. Runs of completely filled squares along a row are merged into one quad, so the
+inside of a shape costs two triangles per row instead of two per square. The result is one flat
+float32 array of triangle vertices ready to upload.
+
+`TiledMesh` splits a big field into tiles of squares that are each marched on their own, so an
+edit only remeshes the few tiles around it.
+"""
+from math import ceil
+
+import numpy as np
+
+__all__ = (
+    "triangulations",
+    "march",
+    "march_reference",
+    "wavy_field",
+    "TiledMesh"
+)
+
+triangulations = (
+    (), # 0000
+    ((0, 1, 7),), # 0001 x=0 (x, x+1, x-1)
+    ((2, 3, 1),), # 0010 x=2 (x, x+1, x-1)
+    ((0, 2, 7), (7, 2, 3),), # 0011 x=0 (x, x+2, x-1) (x-1, x+2, x+3)
+    ((4, 3, 5),), # 0100 x=4 (x, x+1, x-1)
+    ((0, 1, 7), (7, 1, 3), (7, 3, 5), (3, 4, 5),), # 0101 x=0 (x, x+1, x-1) (x-1, x+1, x+3) (x-1, x+3, x+5) (x+3, x+4, x+5)
+    ((2, 4, 1), (1, 4, 5),), # 0110 x=2 (x, x+2, x-1) (x-1, x+2, x+3)
+    ((2, 4, 5), (2, 5, 7), (2, 7, 0),), # 0111 x=2 (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
+    ((6, 7, 5),), # 1000 x=6 (x, x+1, x-1)
+    ((6, 0, 5), (5, 0, 1),), # 1001 x=6 (x, x+2, x-1) (x-1, x+2, x+3)
+    ((2, 3, 1), (1, 3, 5), (1, 5, 7), (5, 6, 7),), # 1010 x=2 (x, x+1, x-1) (x-1, x+1, x+3) (x-1, x+3, x+5) (x+3, x+4, x+5)
+    ((0, 2, 3), (0, 3, 5), (0, 5, 6),), # 1011 x=0  (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
+    ((4, 6, 3), (3, 6, 7),), # 1100 x=4 (x, x+2, x-1) (x-1, x+2, x+3)
+    ((6, 0, 1), (6, 1, 3), (6, 3, 4),), # 1101 x=6 (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
+    ((4, 6, 7), (4, 7, 1), (4, 1, 2),), # 1110 x=4 (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
+    ((0, 2, 4), (0, 4, 6),), # 1111 x=0 (x, x+2, x-2), (x-2, x+2, x+4)
+)
+
+# The triangulations padded out to 4 triangles per case so they can be indexed as one array.
+_TRIANGLE_COUNT = np.array([len(case) for case in triangulations], dtype=np.intp)
+_TRIANGLES = np.zeros((16, 4, 3), dtype=np.intp)
+for _case, _tris in enumerate(triangulations):
+    if _tris:
+        _TRIANGLES[_case, :len(_tris)] = _tris
+
+# Where each of the 8 points sits in its square: a base corner, plus a step along an edge
+# that is scaled by that edge's crossing. The corners never move. Edges are numbered by point // 2.
+_BASE_X = np.array((0, 0, 0, 0, 1, 1, 1, 0), dtype=np.float32)
+_BASE_Y = np.array((0, 0, 1, 1, 1, 0, 0, 0), dtype=np.float32)
+_STEP_X = np.array((0, 0, 0, 1, 0, 0, 0, 1), dtype=np.float32)
+_STEP_Y = np.array((0, 1, 0, 0, 0, 1, 0, 0), dtype=np.float32)
+
+
+def _crossing(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    # How far from start to end the field reaches zero, halfway when they are equal.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(start == end, 0.5, -start / (end - start))
+
+
+def march(values: np.ndarray, scale: float = 1.0, offset: tuple[int, int] = (0, 0)) -> np.ndarray:
+    """
+    Triangulate everything above zero in a (height, width) field, indexed [y, x] like MarchGrid.
+
+    Returns a (triangles * 3, 2) float32 array of vertex positions, each square is `scale` wide
+    and `offset` is the (x, y) index of values[0, 0] in a bigger field.
+    """
+    a = values[:-1, :-1]
+    b = values[1:, :-1]
+    c = values[1:, 1:]
+    d = values[:-1, 1:]
+    case = (a > 0).view(np.uint8) | (b > 0).view(np.uint8) << 1 | (c > 0).view(np.uint8) << 2 | (d > 0).view(np.uint8) << 3
+    height, width = case.shape
+
+    # The start and end of every run of full squares, the runs are padded so they can't wrap onto the next row.
+    full = np.zeros((height, width + 2), dtype=np.int8)
+    full[:, 1:-1] = case == 15
+    edge = np.diff(full, axis=1)
+    run_y, run_start = np.nonzero(edge == 1)
+    run_end = np.nonzero(edge == -1)[1]
+    quads = np.empty((run_y.size, 6, 2), dtype=np.float32)
+    quads[:, :, 0] = run_start[:, None] + offset[0]
+    quads[:, :, 1] = run_y[:, None] + offset[1]
+    # (0, 2, 4) (0, 4, 6) like the 1111 case, stretched over the run.
+    quads[:, (2, 4, 5), 0] = (run_end + offset[0])[:, None]
+    quads[:, (1, 2, 4), 1] += 1.0
+    quads = quads.reshape(-1, 2)
+
+    # Only the squares the surface passes through go any further.
+    case[case == 15] = 0
+    square = np.flatnonzero(case)
+    if not square.size:
+        return quads * scale if scale != 1.0 else quads
+    case = case.reshape(-1)[square]
+    s_y, s_x = np.divmod(square, width)
+
+    # Every edge crossing of just those squares, in the order of the edge numbers.
+    a, b, c, d = (corner.reshape(-1)[square] for corner in (a, b, c, d))
+    edges = np.stack((_crossing(a, b), _crossing(b, c), _crossing(d, c), _crossing(a, d)), axis=1).astype(np.float32)
+
+    counts = _TRIANGLE_COUNT[case]
+    owner = np.repeat(np.arange(square.size), counts)
+    nth = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    point = _TRIANGLES[case[owner], nth].reshape(-1)
+    owner = np.repeat(owner, 3)
+
+    t = edges[owner, point // 2]
+    vertices = np.empty((quads.shape[0] + point.size, 2), dtype=np.float32)
+    vertices[:quads.shape[0]] = quads
+    vertices[quads.shape[0]:, 0] = s_x[owner] + offset[0] + _BASE_X[point] + _STEP_X[point] * t
+    vertices[quads.shape[0]:, 1] = s_y[owner] + offset[1] + _BASE_Y[point] + _STEP_Y[point] * t
+    if scale != 1.0:
+        vertices *= scale
+    return vertices
+
+
+def march_reference(values: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """The same shape as `march` one square at a time without merging, how MarchGrid used to do it."""
+    rows = values.tolist()
+    vertices = []
+    for y in range(len(rows) - 1):
+        for x in range(len(rows[0]) - 1):
+            a, b, c, d = rows[y][x], rows[y + 1][x], rows[y + 1][x + 1], rows[y][x + 1]
+            a_b = 0.5 if a == b else -a / (b - a)
+            b_c = 0.5 if b == c else -b / (c - b)
+            d_c = 0.5 if d == c else -d / (c - d)
+            a_d = 0.5 if a == d else -a / (d - a)
+            idx = (a > 0) * 1 + (b > 0) * 2 + (c > 0) * 4 + (d > 0) * 8
+            points = (
+                (x, y), (x, y + a_b),
+                (x, y + 1), (x + b_c, y + 1),
+                (x + 1, y + 1), (x + 1, y + d_c),
+                (x + 1, y), (x + a_d, y)
+            )
+            for tri in triangulations[idx]:
+                vertices.extend(points[i] for i in tri)
+    return np.array(vertices, dtype=np.float32).reshape(-1, 2) * scale
+
+
+def wavy_field(width: int, height: int, scale: float = 0.05) -> np.ndarray:
+    """A smooth field of blobs in -1.0 - 1.0 to start from, so there is something to march."""
+    y, x = np.mgrid[0:height, 0:width] * scale
+    return np.clip(np.sin(x) * np.cos(1.3 * y) + 0.4 * np.sin(3.1 * x + y), -1.0, 1.0)
+
+
+class TiledMesh:
+    """
+    A marching squares mesh of a (height, width) field kept as one vertex array per tile of squares.
+
+    Mark the nodes that changed with `mark_window` or `mark_nodes`, then `rebuild` remeshes just
+    the tiles they touch. Tiles are numbered row major, `meshes[ty * tiles_x + tx]`.
+    """
+
+    def __init__(self, width: int, height: int, tile: int = 64):
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.squares_x = width - 1
+        self.squares_y = height - 1
+        self.tiles_x = ceil(self.squares_x / tile)
+        self.tiles_y = ceil(self.squares_y / tile)
+
+        self.meshes: list[np.ndarray] = [np.empty((0, 2), dtype=np.float32)] * (self.tiles_x * self.tiles_y)
+        self.dirty: np.ndarray = np.ones((self.tiles_y, self.tiles_x), dtype=bool)
+
+    @property
+    def vertex_count(self) -> int:
+        return sum(mesh.shape[0] for mesh in self.meshes)
+
+    def mark_all(self):
+        self.dirty[:] = True
+
+    def mark_window(self, window: tuple[slice, slice]):
+        """Mark the tiles around a (y, x) window of changed nodes."""
+        (y0, y1, _), (x0, x1, _) = window[0].indices(self.height), window[1].indices(self.width)
+        # A node is a corner of the squares before and after it.
+        s_y0, s_y1 = max(y0 - 1, 0), min(y1, self.squares_y)
+        s_x0, s_x1 = max(x0 - 1, 0), min(x1, self.squares_x)
+        if s_y0 >= s_y1 or s_x0 >= s_x1:
+            return
+        self.dirty[s_y0 // self.tile:(s_y1 - 1) // self.tile + 1, s_x0 // self.tile:(s_x1 - 1) // self.tile + 1] = True
+
+    def mark_nodes(self, index: np.ndarray):
+        """Mark the tiles around changed nodes given by flat row major indices."""
+        y, x = np.divmod(index, self.width)
+        for s_y in (y - 1, y):
+            for s_x in (x - 1, x):
+                inside = (0 <= s_x) & (s_x < self.squares_x) & (0 <= s_y) & (s_y < self.squares_y)
+                self.dirty[s_y[inside] // self.tile, s_x[inside] // self.tile] = True
+
+    def rebuild(self, values: np.ndarray) -> np.ndarray:
+        """Remesh every dirty tile from the field and return which tiles changed."""
+        changed = np.flatnonzero(self.dirty)
+        tile = self.tile
+        for index in changed.tolist():
+            t_y, t_x = divmod(index, self.tiles_x)
+            y0, x0 = t_y * tile, t_x * tile
+            # One more node than squares, the edge nodes are shared with the next tile.
+            self.meshes[index] = march(values[y0:y0 + tile + 1, x0:x0 + tile + 1], offset=(x0, y0))
+        self.dirty[:] = False
+        return changed
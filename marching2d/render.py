@@ -0,0 +1,102 @@
+import numpy as np
+from arcade import get_window
+import arcade.gl as gl
+
+from common.data_loading import make_package_string_loader
+from marching2d.mesher import TiledMesh
+import marching2d.data as data
+
+get_shader = make_package_string_loader(data, 'glsl')
+
+
+class MarchRenderer:
+    """
+    Draw a tiled marching squares mesh and the nodes of its field, one draw call each.
+
+    Every tile of the mesh gets a fixed slot of `slot_vertices` in one vertex buffer, the
+    part of a slot the tile doesn't use is zeros which only make empty triangles. So a
+    changed tile is one small write at its slot's offset and the whole mesh still draws at once.
+    When a tile outgrows its slot every slot doubles and the buffer is written again.
+    The nodes are just their values, the position of each comes from the vertex id.
+    """
+
+    def __init__(self, width: int, height: int, square_size: float, mesh: TiledMesh):
+        self.ctx = ctx = get_window().ctx
+        self.width = width
+        self.height = height
+        self.square_size = square_size
+
+        self.mesh: TiledMesh = mesh
+        # Always a whole number of triangles, so none of them straddle two slots.
+        self.slot_vertices: int = 3 * 256
+        self._written: np.ndarray = np.zeros(len(mesh.meshes), dtype=np.int64)
+        self.bytes_uploaded: int = 0
+        self._mesh_buffer = ctx.buffer(reserve=self.slot_vertices * len(mesh.meshes) * 8)
+        self._mesh = ctx.geometry(
+            [gl.BufferDescription(self._mesh_buffer, '2f', ['in_pos'])],
+            mode=ctx.TRIANGLES
+        )
+        self._mesh_program = ctx.program(
+            vertex_shader=get_shader('mesh_vs'),
+            fragment_shader=get_shader('mesh_fs')
+        )
+        self._mesh_program['square_size'] = square_size
+
+        self._node_buffer = ctx.buffer(reserve=width * height * 4)
+        self._nodes = ctx.geometry(
+            [gl.BufferDescription(self._node_buffer, '1f', ['in_value'])],
+            mode=ctx.POINTS
+        )
+        self._node_program = ctx.program(
+            vertex_shader=get_shader('nodes_vs'),
+            fragment_shader=get_shader('nodes_fs')
+        )
+        self._node_program['square_size'] = square_size
+        self._node_program['width'] = width
+
+    def _upload_all(self):
+        meshes = self.mesh.meshes
+        slots = np.zeros((len(meshes), self.slot_vertices, 2), dtype=np.float32)
+        for index, vertices in enumerate(meshes):
+            slots[index, :vertices.shape[0]] = vertices
+            self._written[index] = vertices.shape[0]
+        self._mesh_buffer.orphan(slots.nbytes)
+        self._mesh_buffer.write(slots)
+        self.bytes_uploaded += slots.nbytes
+
+    def upload_tiles(self, tiles):
+        """Write the given tiles of the mesh into their slots, clearing whatever they used to have."""
+        meshes = self.mesh.meshes
+        largest = max((meshes[index].shape[0] for index in tiles), default=0)
+        if largest > self.slot_vertices or len(tiles) == len(meshes):
+            while largest > self.slot_vertices:
+                self.slot_vertices *= 2
+            self._upload_all()
+            return
+
+        for index in tiles:
+            vertices = meshes[index]
+            count = vertices.shape[0]
+            # Zero out the end of the last mesh if this one is shorter.
+            data = vertices if count >= self._written[index] else np.concatenate(
+                (vertices, np.zeros((self._written[index] - count, 2), dtype=np.float32))
+            )
+            if data.size:
+                self._mesh_buffer.write(data, offset=index * self.slot_vertices * 8)
+                self.bytes_uploaded += data.nbytes
+            self._written[index] = count
+
+    def set_nodes(self, values: np.ndarray, rows: slice = slice(None)):
+        """Upload the node values, or just a band of rows of them."""
+        start, stop, _ = rows.indices(self.height)
+        band = values[start:stop].astype(np.float32)
+        self._node_buffer.write(band, offset=start * self.width * 4)
+        self.bytes_uploaded += band.nbytes
+
+    def draw_mesh(self, colour=(255, 255, 255, 255)):
+        self._mesh_program['colour'] = tuple(c / 255.0 for c in colour)
+        self._mesh.render(self._mesh_program, vertices=self.slot_vertices * len(self.mesh.meshes))
+
+    def draw_nodes(self, point_size: float = 5.0):
+        self.ctx.point_size = point_size
+        self._nodes.render(self._node_program, vertices=self.width * self.height)
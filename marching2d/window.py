@@ -1,53 +1,49 @@
 from __future__ import annotations
 
 import arcade
+import numpy as np
 from arcade.future.input.inputs import MouseButtons
-from arcade.draw import draw_triangle_filled
 
-from common.util.procedural_animator import ProceduralAnimator
+from common.util.animator_bank import AnimatorBank
+from common.util.duration_tracker import PERF_TRACKER, perf_timed_context
+from marching2d.field import Brush, BoxBrush, CapsuleBrush, CircleBrush, paint
+from marching2d.mesher import TiledMesh, wavy_field
+from marching2d.render import MarchRenderer
 
 
-GRID_WIDTH = 10
-GRID_HEIGHT = 10
+GRID_WIDTH = 1024
+GRID_HEIGHT = 1024
 
-SQUARE_SIZE = 50
-
-triangulations = (
-    (), # 0000
-    ((0, 1, 7),), # 0001 x=0 (x, x+1, x-1)
-    ((2, 3, 1),), # 0010 x=2 (x, x+1, x-1)
-    ((0, 2, 7), (7, 2, 3),), # 0011 x=0 (x, x+2, x-1) (x-1, x+2, x+3)
-    ((4, 3, 5),), # 0100 x=4 (x, x+1, x-1)
-    ((0, 1, 7), (7, 1, 3), (7, 3, 5), (3, 4, 5),), # 0101 x=0 (x, x+1, x-1) (x-1, x+1, x+3) (x-1, x+3, x+5) (x+3, x+4, x+5)
-    ((2, 4, 1), (1, 4, 5),), # 0110 x=2 (x, x+2, x-1) (x-1, x+2, x+3)
-    ((2, 4, 5), (2, 5, 7), (2, 7, 0),), # 0111 x=2 (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
-    ((6, 7, 5),), # 1000 x=6 (x, x+1, x-1)
-    ((6, 0, 5), (5, 0, 1),), # 1001 x=6 (x, x+2, x-1) (x-1, x+2, x+3)
-    ((2, 3, 1), (1, 3, 5), (1, 5, 7), (5, 6, 7),), # 1010 x=2 (x, x+1, x-1) (x-1, x+1, x+3) (x-1, x+3, x+5) (x+3, x+4, x+5)
-    ((0, 2, 3), (0, 3, 5), (0, 5, 6),), # 1011 x=0  (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
-    ((4, 6, 3), (3, 6, 7),), # 1100 x=4 (x, x+2, x-1) (x-1, x+2, x+3)
-    ((6, 0, 1), (6, 1, 3), (6, 3, 4),), # 1101 x=6 (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
-    ((4, 6, 7), (4, 7, 1), (4, 1, 2),), # 1110 x=4 (x, x+2, x+3) (x, x+3, x+5) (x, x+5, x+6)
-    ((0, 2, 4), (0, 4, 6),), # 1111 x=0 (x, x+2, x-2), (x-2, x+2, x+4)
-)
+SQUARE_SIZE = 10
+# Below this many pixels per square the nodes are just noise, so they aren't drawn.
+NODE_MIN_PX = 8.0
+# Squares per side of a mesh tile, only the tiles around an edit are remeshed.
+TILE_SIZE = 64
 
 
 class MarchGrid:
 
-    def __init__(self):
-        self.grid = list(
-            list(-1.0 for _ in range(GRID_WIDTH))
-            for _ in range(GRID_HEIGHT)
-        )
+    def __init__(self, width: int = GRID_WIDTH, height: int = GRID_HEIGHT, square_size: float = SQUARE_SIZE):
+        self.width = width
+        self.height = height
+        self.square_size = square_size
+        self.grid: np.ndarray = np.full((height, width), -1.0)
 
         self._freq = 1.0
         self._damp = 0.5
         self._resp = 2.0
 
-        self.animators: tuple[ProceduralAnimator, ...] = tuple(
-            ProceduralAnimator(1.0, 0.5, 2.0, -1.0, -1.0, 0.0)
-            for _ in range(GRID_WIDTH * GRID_HEIGHT)
-        )
+        self.animators: AnimatorBank = AnimatorBank((height, width), 1.0, 0.5, 2.0, -1.0, -1.0, 0.0)
+
+        # Only nodes whose target changed, or who are still animating towards it, get updated.
+        self.active: np.ndarray = np.empty(0, dtype=np.intp)
+        self._active_mask: np.ndarray = np.zeros(width * height, dtype=bool)
+        self.settle_epsilon: float = 1e-3
+
+        self.tiles: TiledMesh = TiledMesh(width, height, TILE_SIZE)
+        self.renderer: MarchRenderer = MarchRenderer(width, height, square_size, self.tiles)
+        # The band of node rows whose values need uploading, (start, stop) or None.
+        self._node_rows: tuple[int, int] | None = (0, height)
 
     @property
     def frequency(self):
@@ -59,8 +55,7 @@ class MarchGrid:
             return
 
         self._freq = new_freq
-        for anim in self.animators:
-            anim.update_frequency(new_freq)
+        self.animators.update_frequency(new_freq)
 
     @property
     def damping(self):
@@ -72,8 +67,7 @@ class MarchGrid:
             return
 
         self._damp = new_damp
-        for anim in self.animators:
-            anim.update_damping(new_damp)
+        self.animators.update_damping(new_damp)
 
     @property
     def response(self):
@@ -85,32 +79,81 @@ class MarchGrid:
             return
 
         self._resp = new_resp
-        for anim in self.animators:
-            anim.update_response(new_resp)
+        self.animators.update_response(new_resp)
 
     def __getitem__(self, item: tuple[int, int]):
         x, y = item
-        return self.grid[y][x]
+        return float(self.grid[y, x])
 
     def __setitem__(self, key: tuple[int, int], value: float):
         x, y = key
-        self.grid[y][x] = min(1.0, max(-1.0, value))
+        self.grid[y, x] = min(1.0, max(-1.0, value))
+        self.activate(np.array((self.from_point(x, y),), dtype=np.intp))
+        self._touch_rows(y, y + 1)
+
+    def _touch_rows(self, start: int, stop: int):
+        if self._node_rows is not None:
+            start, stop = min(start, self._node_rows[0]), max(stop, self._node_rows[1])
+        self._node_rows = (start, stop)
+
+    def paint(self, brush: Brush, subtract: bool = False, falloff: float = 1.0):
+        """Paint a brush (in node units) into the field, the nodes it changed animate towards it."""
+        window = paint(self.grid, brush, subtract, falloff)
+        if window is None:
+            return
+        rows, columns = window
+        index = (np.arange(rows.start, rows.stop)[:, None] * self.width + np.arange(columns.start, columns.stop)).reshape(-1)
+        changed = self.grid.reshape(-1)[index] != self.animators.xp.reshape(-1)[index]
+        self.activate(index[changed])
+        self._touch_rows(rows.start, rows.stop)
+
+    def set_field(self, values: np.ndarray):
+        """Jump straight to a whole new field without animating."""
+        self.grid[:] = np.clip(values, -1.0, 1.0)
+        self.animators.xp[:] = self.grid
+        self.animators.y[:] = self.grid
+        self.animators.dy[:] = 0.0
+        self.active = np.empty(0, dtype=np.intp)
+        self._active_mask[:] = False
+        self.tiles.mark_all()
+        self._touch_rows(0, self.height)
+
+    def activate(self, index: np.ndarray):
+        """Start animating the nodes at these flat indices, if they aren't already."""
+        index = index[~self._active_mask[index]]
+        if index.size:
+            self._active_mask[index] = True
+            self.active = np.concatenate((self.active, index))
 
     def to_point(self, idx: int):
-        return idx % GRID_WIDTH, idx // GRID_WIDTH
+        return idx % self.width, idx // self.width
 
     def from_point(self, x, y):
-        return y * GRID_WIDTH + x
+        return y * self.width + x
 
+    @perf_timed_context("updates")
     def update(self, dt: float):
-        for idx in range(GRID_WIDTH * GRID_HEIGHT):
-            x, y = self.to_point(idx)
-            val = self[x, y]
-            self.animators[idx].update(dt, val)
+        if not self.active.size:
+            return
+
+        # The grid is stored row major so it flattens to the same idx as `from_point`
+        active = self.active
+        targets = self.grid.reshape(-1)[active]
+        values = self.animators.update_at(dt, active, targets)
+        self.tiles.mark_nodes(active)
+
+        # Retire nodes that have arrived, snapping them exactly onto their target.
+        settled = (np.abs(values - targets) < self.settle_epsilon) & (np.abs(self.animators.dy.reshape(-1)[active]) < self.settle_epsilon)
+        if settled.any():
+            done = active[settled]
+            self.animators.y.reshape(-1)[done] = targets[settled]
+            self.animators.dy.reshape(-1)[done] = 0.0
+            self._active_mask[done] = False
+            self.active = active[~settled]
 
     def closest_point(self, x: float, y: float):
-        s_x = x / SQUARE_SIZE
-        s_y = y / SQUARE_SIZE
+        s_x = x / self.square_size
+        s_y = y / self.square_size
 
         i_x = int(round(s_x))
         i_y = int(round(s_y))
@@ -120,79 +163,59 @@ class MarchGrid:
     def set_closest_point(self, x: float, y: float, value: float):
         i_x, i_y = self.closest_point(x, y)
 
-        if 0 <= i_x < GRID_WIDTH and 0 <= i_y < GRID_HEIGHT:
+        if 0 <= i_x < self.width and 0 <= i_y < self.height:
             self[i_x, i_y] = value
 
     def get_closest_point(self, x, y):
         i_x, i_y = self.closest_point(x, y)
-        if 0 <= i_x < GRID_WIDTH and 0 <= i_y < GRID_HEIGHT:
+        if 0 <= i_x < self.width and 0 <= i_y < self.height:
             return self[i_x, i_y]
         return None
 
     def anim_val(self, x, y):
         idx = self.from_point(x, y)
-        return self.animators[idx].y
-
-    def triangulate_point(self, x: int, y: int):
-        a = self.anim_val(x, y)
-        b = self.anim_val(x, y+1)
-        c = self.anim_val(x+1, y+1)
-        d = self.anim_val(x+1, y)
-
-        a_b = (0.5 if a == b else (1.0 if b == 0.0 else -a/(b - a)))
-        b_c = (0.5 if b == c else (1.0 if c == 0.0 else -b/(c - b)))
-        d_c = (0.5 if d == c else (1.0 if c == 0.0 else -d/(c - d)))
-        a_d = (0.5 if a == d else (1.0 if d == 0.0 else -a/(d - a)))
-
-        idx = (a > 0) * 1 + (b > 0) * 2 + (c > 0) * 4 + (d > 0) * 8
-        triangulation = triangulations[idx]
-        points = (
-            (x, y), (x, y+a_b),
-            (x, y+1), (x+b_c, y+1),
-            (x+1, y+1), (x+1, y+d_c),
-            (x+1, y), (x+a_d, y)
-        )
-
-        return (tuple(points[i] for i in tri) for tri in triangulation)
+        return float(self.animators.y.reshape(-1)[idx])
 
     def update_animators(self, new_frequency = None, new_damping = None, new_response = None):
-        for animator in self.animators:
-            animator.update_values(new_frequency, new_damping, new_response)
-
-    def draw(self):
-        for y, row in enumerate(self.grid[:]):
-            for x, val in enumerate(row[:]):
-                if x < GRID_WIDTH-1 and y < GRID_HEIGHT-1:
-                    triangles = self.triangulate_point(x, y)
-                    for tri in triangles:
-                        a, b, c = tri
-                        draw_triangle_filled(
-                            a[0]*SQUARE_SIZE, a[1]*SQUARE_SIZE,
-                            b[0]*SQUARE_SIZE, b[1]*SQUARE_SIZE,
-                            c[0]*SQUARE_SIZE, c[1]*SQUARE_SIZE,
-                            (255, 255, 255, 255)# , 2
-                        )
-                c = (255 * (val < 0), 255 * (val > 0),  255, 255)
-                arcade.draw_point(x * SQUARE_SIZE, y * SQUARE_SIZE, c, 5)
+        self.animators.update_values(new_frequency, new_damping, new_response)
+
+    @perf_timed_context("mesh")
+    def mesh(self):
+        """Remesh and upload only the tiles around nodes that moved since the last time."""
+        changed = self.tiles.rebuild(self.animators.y)
+        if changed.size:
+            self.renderer.upload_tiles(changed)
+        if self._node_rows is not None:
+            self.renderer.set_nodes(self.grid, slice(*self._node_rows))
+            self._node_rows = None
+
+    @perf_timed_context("on_draw")
+    def draw(self, zoom: float = 1.0):
+        self.mesh()
+        self.renderer.draw_mesh()
+        if zoom * self.square_size >= NODE_MIN_PX:
+            self.renderer.draw_nodes(5.0)
 
 
 class SquareWindow(arcade.Window):
 
     def __init__(self):
         super().__init__(1280, 720, "Marching Squares")
-        self.cam = arcade.camera.Camera2D(position=(0.0, 0.0))
+        # Start with the bottom left of the grid in the bottom left of the window.
+        self.cam = arcade.camera.Camera2D(position=self.center)
         self.grid = MarchGrid()
+        self.grid.set_field(wavy_field(self.grid.width, self.grid.height))
 
-        self.grid[0, 0] = 1
-        self.grid[0, 1] = 1
-        self.grid[2, 3] = 1
-
-        self.grid.triangulate_point(0, 0)
-        self.grid.triangulate_point(0, 1)
+        # Left paints, right erases. [B] swaps between a round and a square brush, [ and ] resize it.
+        self.brush_radius: float = 4.0
+        self.box_brush: bool = False
+        self._last_stroke: tuple[float, float] | None = None
 
     def on_mouse_scroll(self, x: int, y: int, scroll_x: int, scroll_y: int):
         w_x, w_y, w_z = self.cam.unproject((x, y))
         v = self.grid.get_closest_point(w_x, w_y)
+        if v is None:
+            return
         self.grid.set_closest_point(w_x, w_y, v + scroll_y / 16.0)
 
     def on_mouse_drag(self, x: int, y: int, dx: int, dy: int, _buttons: int, _modifiers: int):
@@ -204,28 +227,42 @@ class SquareWindow(arcade.Window):
         if button == MouseButtons.MIDDLE:
             o_pos = self.cam.position
             self.cam.position = int(o_pos[0] - dx), int(o_pos[1] - dy)
-        elif button == MouseButtons.LEFT:
-            w_x, w_y, w_z = self.cam.unproject((x, y))
-            self.grid.set_closest_point(w_x, w_y, 1)
-        elif button == MouseButtons.RIGHT:
-            w_x, w_y, w_z = self.cam.unproject((x, y))
-            self.grid.set_closest_point(w_x, w_y, -1)
+        elif button in (MouseButtons.LEFT, MouseButtons.RIGHT):
+            self.stroke(x, y, button == MouseButtons.RIGHT)
 
     def on_mouse_press(self, x: int, y: int, button: int, modifiers: int):
         button = MouseButtons(button)
 
-        if button == MouseButtons.LEFT:
-            w_x, w_y, w_z = self.cam.unproject((x, y))
-            self.grid.set_closest_point(w_x, w_y, 1)
+        if button in (MouseButtons.LEFT, MouseButtons.RIGHT):
+            self._last_stroke = None
+            self.stroke(x, y, button == MouseButtons.RIGHT)
 
-        elif button == MouseButtons.RIGHT:
-            w_x, w_y, w_z = self.cam.unproject((x, y))
-            self.grid.set_closest_point(w_x, w_y, -1)
+    def stroke(self, x: int, y: int, subtract: bool):
+        w_x, w_y, w_z = self.cam.unproject((x, y))
+        n_x, n_y = w_x / self.grid.square_size, w_y / self.grid.square_size
+        r = self.brush_radius
+        if self.box_brush:
+            brush = BoxBrush(n_x, n_y, r, r)
+        elif self._last_stroke is None:
+            brush = CircleBrush(n_x, n_y, r)
+        else:
+            # Join up with the last position so fast strokes don't leave gaps.
+            brush = CapsuleBrush(*self._last_stroke, n_x, n_y, r)
+        self.grid.paint(brush, subtract)
+        self._last_stroke = (n_x, n_y)
 
     def on_key_press(self, symbol: int, modifiers: int):
         super().on_key_press(symbol, modifiers)
+        if symbol == arcade.key.B:
+            self.box_brush = not self.box_brush
+        elif symbol == arcade.key.BRACKETLEFT:
+            self.brush_radius = max(1.0, self.brush_radius / 1.25)
+        elif symbol == arcade.key.BRACKETRIGHT:
+            self.brush_radius = min(128.0, self.brush_radius * 1.25)
 
     def on_update(self, delta_time: float):
+        # The frame starts before any zone is open, so each zone's time lands in the frame it was spent in.
+        PERF_TRACKER.next_frame()
         self.grid.update(delta_time)
         return super().on_update(delta_time)
 
@@ -233,7 +270,7 @@ class SquareWindow(arcade.Window):
         self.clear()
         self.cam.use()
 
-        self.grid.draw()
+        self.grid.draw(self.cam.zoom)
 
 
 # For use once arcade-experiments has imgui
@@ -247,7 +284,7 @@ def draw_debug_menu(self):
     _, self.grid.damping = imgui.slider_float("Damping", self.grid.damping, 0.1, 10.0)
     _, self.grid.response = imgui.slider_float("Response", self.grid.response, 0.1, 10.0)
     imgui.separator()
-    PERF_TRACKER.imgui_draw("updates", "on_draw")
+    PERF_TRACKER.imgui_draw("updates", "mesh", "on_draw")
 
     imgui.end()
     imgui.end_frame()
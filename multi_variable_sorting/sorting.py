@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from common.util import clamp
+from common.util.spatial_index import SpatialIndex
 import multi_variable_sorting.data as data
 from common.data_loading import make_package_string_loader
 from json import loads
@@ -27,6 +28,7 @@ FONT_NAME = "GohuFont 11 Nerd Font Mono"
 SELECTED_CHOICES = 10
 BEST_X = 10
 TOP_X = 30
+HOVER_RADIUS = 6  # px
 #############
 
 dimensionmap = {
@@ -196,6 +198,12 @@ class PlotWindow(Window):
         self.top_x = []
         self.dists = []
 
+        # Points in graph units (before graph_size), used to hover them and to only draw the visible ones.
+        self.point_index: SpatialIndex[int] = SpatialIndex(cell_size=0.05)
+        self.hovered: int | None = None
+        self._visible_points: list[tuple[float, float]] = []
+        self._visible_key = None
+
         self.batch = Batch()
         self.texts: list[arcade.Text] = []
         for _ in range(TOP_X):
@@ -222,6 +230,9 @@ class PlotWindow(Window):
     def create_points(self) -> PointsAndLabels:
         self.dists = tuple(points_from_objects(self.current_height, self.objects, self.int_priority, self.one_priority))
         self.top_x = x_best(self.current_height, self.objects, TOP_X, self.int_priority, self.one_priority)
+        for index, (p, _, _) in enumerate(self.dists):
+            self.point_index.insert(index, (p[0], p[0], p[1], p[1]))
+        self._visible_key = None
 
         for index, vals in enumerate(self.top_x):
             dist, point, obj = vals
@@ -314,6 +325,26 @@ class PlotWindow(Window):
         if self.mouse_down:
             ox, oy = self.camera.position
             self.camera.position = ox - dx, oy - dy
+            return
+
+        m_x, m_y, _ = self.camera.unproject((x, y))
+        scale = self.graph_size
+        self.hovered = self.point_index.nearest(m_x / scale, m_y / scale, HOVER_RADIUS / (self.camera.zoom * scale))
+
+    def visible_points(self) -> list[tuple[float, float]]:
+        """The screen positions of only the points in view, only worked out again when the view changes."""
+        key = (tuple(self.camera.position), self.camera.zoom, self.graph_size, self.width, self.height)
+        if key != self._visible_key:
+            l, b, _ = self.camera.unproject((0, 0))
+            r, t, _ = self.camera.unproject((self.width, self.height))
+            scale = self.graph_size
+            points = self.dists
+            self._visible_points = [
+                (points[index][0][0] * scale, points[index][0][1] * scale)
+                for index in self.point_index.query_rect((l / scale, r / scale, b / scale, t / scale))
+            ]
+            self._visible_key = key
+        return self._visible_points
 
     def on_draw(self):
         if self.are_points_dirty:
@@ -325,16 +356,21 @@ class PlotWindow(Window):
         # Draw plot
         arcade.draw_line(-self.width * self.graph_size + self.camera.position[0], 0, self.width * self.graph_size + self.camera.position[0], 0, arcade.color.GRAY)
         arcade.draw_line(0, -self.height * self.graph_size + self.camera.position[1], 0, self.height * self.graph_size + self.camera.position[1], arcade.color.GRAY)
-        points = [(p[0] * self.graph_size, p[1] * self.graph_size) for p, _, _ in self.dists]
-
         # Draw points
-        arcade.draw_points(points, arcade.color.WHITE, POINT_SIZE)
+        arcade.draw_points(self.visible_points(), arcade.color.WHITE, POINT_SIZE)
 
         # Draw radius
         arcade.draw_circle_filled(0, 0, self.dist_limit * self.graph_size, (0, 0, 255, 32))
 
         self.batch.draw()
 
+        if self.hovered is not None:
+            p, _, obj = self.dists[self.hovered]
+            h_x, h_y = p[0] * self.graph_size, p[1] * self.graph_size
+            arcade.draw_circle_outline(h_x, h_y, HOVER_RADIUS / self.camera.zoom, arcade.color.YELLOW)
+            arcade.draw_text(f"{obj.name} {obj.unitlength:.2f}m", h_x + HOVER_RADIUS, h_y + HOVER_RADIUS,
+                             font_name=FONT_NAME, color=arcade.color.YELLOW, font_size=14)
+
         self.default_camera.use()
         # Draw current height
         arcade.draw_text(f"Current height: {self.current_height}m\nInteger priority: {self.int_priority}\nOneness priority: {self.one_priority}",
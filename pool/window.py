@@ -101,6 +101,7 @@ class PoolWindow(ExpWin):
         self._note_gen = generate_notes()
 
         self.show_fps(show_fps)
+        self.show_frame_graph(show_fps)
 
         self._textures = (
             get_texture('normal-1'),
@@ -1,11 +1,11 @@
 from array import array
-from PIL import Image
 from math import radians
 
 from arcade import gl
 from arcade import get_window
 
 from common.data_loading import make_package_string_loader, make_package_path_finder
+from common.data_loading.texture_cache import load_cached_texture
 import sphere.data as data
 
 get_shader_string = make_package_string_loader(data, 'glsl')
@@ -25,10 +25,8 @@ class Renderer:
         self._texture_program["radius"] = 6371
         self._texture_program["wrldText"] = 0
         self._texture_program["elevText"] = 1
-        img = Image.open(get_img_path("world_blend_oct"))
-        self._world_texture = ctx.texture(img.size, components=4, data=img.tobytes(), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.CLAMP_TO_EDGE)
-        img = Image.open(get_img_path("world_bump"))
-        self._elev_texture = ctx.texture(img.size, components=4, data=img.tobytes(), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.CLAMP_TO_EDGE)
+        self._world_texture = load_cached_texture(ctx, get_img_path("world_blend_oct"), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.CLAMP_TO_EDGE)
+        self._elev_texture = load_cached_texture(ctx, get_img_path("world_bump"), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.CLAMP_TO_EDGE)
 
         self._ring_program = ctx.program(
             vertex_shader=get_shader_string("blank_sphere_texture_vs"),